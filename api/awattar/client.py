@@ -1,32 +1,53 @@
 # api/awattar/client.py
-import requests
-from datetime import datetime, date
+from datetime import datetime, date, timedelta
 from ..models import PriceClient, PriceData
 
 '''
-Awattar prices 
-60min interval, 
+Awattar prices
+60min interval,
 EPEXSPOTAT
 Net price
 for the day
 ie 24*1=24 samples per day
 '''
 class Client(PriceClient):
+    # Longest window requested in one call; longer ranges are split
+    max_range_days = 31
+
     def __init__(self):
         super().__init__('awattar', 'ct/kWh')
         self.base_url = "https://api.awattar.at/v1/marketdata"
-    
+
     def fetch_day_prices(self, day: date = None) -> list[PriceData]:
         if day is None:
             day = date.today()
-            
-        start = int(datetime.combine(day, datetime.min.time()).timestamp() * 1000)
-        end = int(datetime.combine(day, datetime.max.time()).timestamp() * 1000)
-        
-        response = requests.get(self.base_url, params={'start': start, 'end': end})
+        return self.fetch_range_prices(day, day)
+
+    def fetch_range_prices(self, start: date, end: date) -> list[PriceData]:
+        """
+        Fetch prices for all days from start to end (both inclusive).
+
+        Ranges longer than max_range_days are split into several requests
+        and the results merged in timestamp order.
+        """
+        prices = {}
+        window_start = start
+        while window_start <= end:
+            window_end = min(end, window_start + timedelta(days=self.max_range_days - 1))
+            for price in self._fetch_window(window_start, window_end):
+                prices[price.timestamp] = price
+            window_start = window_end + timedelta(days=1)
+        return [prices[ts] for ts in sorted(prices)]
+
+    def _fetch_window(self, start: date, end: date) -> list[PriceData]:
+        start_ms = int(datetime.combine(start, datetime.min.time()).timestamp() * 1000)
+        end_ms = int(datetime.combine(end, datetime.max.time()).timestamp() * 1000)
+
+        response = self.session.get(self.base_url, params={'start': start_ms, 'end': end_ms},
+                                    timeout=self.timeout)
         response.raise_for_status()
         raw_data = response.json()['data']
-        
+
         return [
             PriceData(
                 timestamp=datetime.fromtimestamp(entry['start_timestamp'] / 1000),
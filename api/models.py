@@ -1,6 +1,8 @@
 from dataclasses import dataclass
-from datetime import datetime
+from datetime import date, datetime
 from typing import List
+import requests
+from requests.adapters import HTTPAdapter
 
 @dataclass
 class PriceData:
@@ -8,9 +10,26 @@ class PriceData:
     price: float
 
 class PriceClient:
-    def __init__(self, source: str, unit: str):
+    # Longest range a single request may cover
+    max_range_days = 1
+    # How many days before today the API still serves, None for no limit
+    history_days = None
+
+    def __init__(self, source: str, unit: str, pool_size: int = 4, timeout: float = 30):
         self.source = source
         self.unit = unit
-        
+        self.timeout = timeout
+        # Keep-alive pool shared by all requests of this client
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
     def get_prices(self) -> List[PriceData]:
-        raise NotImplementedError
\ No newline at end of file
+        raise NotImplementedError
+
+    def fetch_range_prices(self, start: date, end: date) -> List[PriceData]:
+        raise NotImplementedError
+
+    def close(self):
+        self.session.close()
@@ -1,5 +1,6 @@
 # api/smartenergy/client.py
-import requests
+import threading
+import time
 from datetime import datetime, date
 from ..models import PriceClient, PriceData
 
@@ -14,12 +15,21 @@ ie 24*4=96 samples per day
 '''
 
 class Client(PriceClient):
+    # The endpoint only serves the current and the next day
+    history_days = 0
+    max_range_days = 2
+    # Every request returns the whole dataset, so the windows of one
+    # ingestion run share a single download
+    reuse_seconds = 60
+
     def __init__(self):
         super().__init__('smartenergy', 'ct/kWh')
         self.base_url = "https://apis.smartenergy.at/market/v1/price"
+        self._lock = threading.Lock()
+        self._fetched = None  # (monotonic time, prices)
     
     def fetch_day_prices(self) -> list[PriceData]:
-        response = requests.get(self.base_url)
+        response = self.session.get(self.base_url, timeout=self.timeout)
         response.raise_for_status()
         raw_data = response.json()
         
@@ -29,4 +39,14 @@ class Client(PriceClient):
                 price=entry['value']/1.2
             )
             for entry in raw_data['data']
-        ]
\ No newline at end of file
+        ]
+
+    def _all_prices(self) -> list[PriceData]:
+        # Concurrent windows wait for the first download instead of repeating it
+        with self._lock:
+            if self._fetched is None or time.monotonic() - self._fetched[0] > self.reuse_seconds:
+                self._fetched = (time.monotonic(), self.fetch_day_prices())
+            return self._fetched[1]
+
+    def fetch_range_prices(self, start: date, end: date) -> list[PriceData]:
+        return [p for p in self._all_prices() if start <= p.timestamp.date() <= end]
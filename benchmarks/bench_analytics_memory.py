@@ -0,0 +1,90 @@
+# benchmarks/bench_analytics_memory.py
+# Peak memory of reading a multi-year range with get_spot_price_data in
+# one DataFrame versus streaming it in chunks, for growing ranges. Each
+# read runs in a fresh process so the peaks do not mix. Besides peak RSS,
+# which also counts SQLite's page cache and mmap (bounded by
+# SQLITE_PRAGMAS), the peak of Python/NumPy allocations is reported.
+#
+#   python benchmarks/bench_analytics_memory.py [chunksize] [years ...]
+import resource
+import subprocess
+import sys
+import tempfile
+import tracemalloc
+from pathlib import Path
+
+project_root = Path(__file__).parents[1]
+sys.path.append(str(project_root))
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is in KiB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def child(mode: str, db_file: str, chunksize: int):
+    from db.database import get_db_engine
+    from db.operations.price_analytics import get_spot_price_data
+
+    engine = get_db_engine(Path(db_file))
+    baseline = peak_rss_mb()
+    tracemalloc.start()
+    rows, total = 0, 0.0
+    if mode == 'full':
+        df = get_spot_price_data(engine=engine)
+        rows, total = len(df), float(df['price'].sum())
+    else:
+        for df in get_spot_price_data(engine=engine, chunksize=chunksize):
+            rows += len(df)
+            total += float(df['price'].sum())
+    heap = tracemalloc.get_traced_memory()[1] / 2 ** 20
+    print(f"{rows} {total:.6f} {peak_rss_mb() - baseline:.1f} {heap:.1f}")
+
+
+def fill(db_file: Path, years: int):
+    """15-minute prices written with one executemany, far faster than the ORM."""
+    from db.database import get_db_engine
+    from db.models.spot_prices import Base
+
+    engine = get_db_engine(db_file)
+    Base.metadata.create_all(engine)
+    start = 1577833200  # 2020-01-01 00:00 CET
+    rows = ((start + i * 900, 'awattar', start + (i + 1) * 900, (i * 37 % 200) / 10, 'ct/kWh')
+            for i in range(years * 365 * 96))
+    connection = engine.raw_connection()
+    try:
+        connection.cursor().executemany(
+            "INSERT INTO spot_prices (start_timestamp, source, end_timestamp, price, unit) "
+            "VALUES (?, ?, ?, ?, ?)", rows)
+        connection.commit()
+    finally:
+        connection.close()
+
+
+def run(mode: str, db_file: Path, chunksize: int):
+    out = subprocess.run([sys.executable, __file__, '--child', mode, str(db_file), str(chunksize)],
+                         capture_output=True, text=True, check=True).stdout.split()
+    return int(out[-4]), float(out[-3]), float(out[-2]), float(out[-1])
+
+
+if __name__ == "__main__":
+    if sys.argv[1:2] == ['--child']:
+        child(sys.argv[2], sys.argv[3], int(sys.argv[4]))
+        sys.exit()
+
+    from db.database import dispose_engines
+
+    chunksize = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    sizes = [int(arg) for arg in sys.argv[2:]] or [2, 10]
+    print(f"{'years':>5} {'rows':>9} | {'one DataFrame':^21} | {f'chunks of {chunksize}':^21}")
+    print(f"{'':>5} {'':>9} | {'RSS MB':>10} {'heap MB':>10} | {'RSS MB':>10} {'heap MB':>10}")
+    for years in sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            db_file = Path(tmp) / 'bench.db'
+            fill(db_file, years)
+            dispose_engines()
+
+            rows, total, full_rss, full_heap = run('full', db_file, chunksize)
+            rows_chunked, total_chunked, rss, heap = run('chunked', db_file, chunksize)
+            assert rows == rows_chunked and abs(total - total_chunked) < 1e-6 * abs(total)
+            print(f"{years:>5} {rows:>9} | {full_rss:>10.1f} {full_heap:>10.1f} | {rss:>10.1f} {heap:>10.1f}")
@@ -0,0 +1,62 @@
+# benchmarks/bench_analyzer.py
+# Compares the original per-month scan of average_price_analysis with the
+# rollup based implementation on synthetic 15 minute prices, and times
+# the full KPI report over the whole history.
+#
+#   python benchmarks/bench_analyzer.py [years]
+import sys
+import time
+from pathlib import Path
+from datetime import timedelta
+
+project_root = Path(__file__).parents[1]
+sys.path.append(str(project_root))
+
+import numpy as np
+import pandas as pd
+from utils.spot_price_analyzer import SpotPriceAnalyzer
+
+
+def synthetic_frame(years: int) -> pd.DataFrame:
+    index = pd.date_range('2019-01-01', periods=years * 365 * 96, freq='15min')
+    rng = np.random.default_rng(0)
+    return pd.DataFrame({'timestamp': index, 'price': rng.normal(10, 5, len(index))})
+
+
+def scan_analysis(data, start_date, end_date):
+    result = {"all_time_average": data['price'].mean(),
+              "selected_range_average": data.loc[start_date:end_date, 'price'].mean(),
+              "monthly_averages": {}}
+    for month in pd.date_range(end=end_date, periods=12, freq='ME'):
+        month_data = data[data.index.to_period('M') == month.to_period('M')]
+        result["monthly_averages"][month.strftime("%Y-%m")] = month_data['price'].mean()
+    result["last_month_average"] = data.loc[end_date - timedelta(days=30):end_date, 'price'].mean()
+    result["last_week_average"] = data.loc[end_date - timedelta(days=7):end_date, 'price'].mean()
+    return result
+
+
+def timed(fn, *args):
+    started = time.perf_counter()
+    fn(*args)
+    return time.perf_counter() - started
+
+
+if __name__ == "__main__":
+    years = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    analyzer = SpotPriceAnalyzer(synthetic_frame(years))
+    end = analyzer.data.index[-1]
+    ranges = [(end - timedelta(days=d), end - timedelta(days=o))
+              for d, o in ((365, 0), (200, 3), (90, 10), (700, 40), (30, 1))]
+
+    scan = sum(timed(scan_analysis, analyzer.data, s, e) for s, e in ranges)
+    build = timed(lambda: analyzer.rollups)
+    # Bypass the result cache so every range is computed from the rollups
+    rollup = sum(timed(analyzer._average_price_analysis, s, e) for s, e in ranges)
+
+    print(f"{len(analyzer.data)} rows ({years} years, 15 min), {len(ranges)} queries")
+    print(f"per-month scans:      {scan * 1000:8.1f} ms")
+    print(f"rollup build (once):  {build * 1000:8.1f} ms")
+    print(f"rollup queries:       {rollup * 1000:8.1f} ms")
+    print(f"speedup incl. build:  {scan / (build + rollup):8.1f}x")
+    kpis = timed(analyzer.kpi_analysis)
+    print(f"full KPI report:      {kpis * 1000:8.1f} ms")
@@ -0,0 +1,48 @@
+# benchmarks/bench_archive.py
+# Multi-year range read from SQLite alone versus the same range after
+# closed months were moved to the Parquet archive.
+#
+#   python benchmarks/bench_archive.py [years]
+import sys
+import tempfile
+from pathlib import Path
+
+project_root = Path(__file__).parents[1]
+sys.path.append(str(project_root))
+
+from db.database import dispose_engines, get_db_engine, session_scope
+from db.operations.archive import archive_closed_months, archive_dir
+from db.operations.price_arrays import load_prices
+from bench_price_query import best_of, fill
+
+
+def read(engine, start_ts, end_ts):
+    return load_prices(start_ts, end_ts, engine=engine).prices.sum()
+
+
+if __name__ == "__main__":
+    years = int(sys.argv[1]) if len(sys.argv) > 1 else 3
+    with tempfile.TemporaryDirectory() as tmp:
+        db_file = Path(tmp) / 'bench.db'
+        start_ts, end_ts = fill(db_file, years)
+        engine = get_db_engine(db_file)
+
+        total = read(engine, start_ts, end_ts)
+        sqlite = best_of(read, engine, start_ts, end_ts)
+        db_size = sum(f.stat().st_size for f in Path(tmp).glob("bench.db*"))
+
+        with session_scope(db_file) as session:
+            moved = archive_closed_months(session)
+        with engine.connect() as connection:
+            connection.exec_driver_sql("VACUUM")
+        assert abs(read(engine, start_ts, end_ts) - total) < 1e-6 * abs(total)
+        tiered = best_of(read, engine, start_ts, end_ts)
+        files = list(archive_dir(engine).rglob('*.parquet'))
+        archive_size = sum(f.stat().st_size for f in files)
+
+        print(f"{sum(moved.values())} rows archived into {len(files)} files ({years} years hourly)")
+        print(f"SQLite file before:   {db_size / 1e6:8.2f} MB")
+        print(f"Parquet archive:      {archive_size / 1e6:8.2f} MB")
+        print(f"read from SQLite:     {sqlite * 1000:8.1f} ms")
+        print(f"read archive+SQLite:  {tiered * 1000:8.1f} ms")
+        dispose_engines()
@@ -0,0 +1,50 @@
+# benchmarks/bench_optimizer.py
+# Appliance profile queries per second against two days of 15 minute
+# prices, the horizon the API schedules over.
+#
+#   python benchmarks/bench_optimizer.py [profiles]
+import sys
+import time
+from pathlib import Path
+
+project_root = Path(__file__).parents[1]
+sys.path.append(str(project_root))
+
+import numpy as np
+from utils.load_optimizer import ApplianceProfile, PriceSeries
+
+STEP = 900
+
+
+def random_profiles(n: int, start: int, rng) -> list:
+    profiles = []
+    for i in range(n):
+        earliest = start + STEP * int(rng.integers(0, 48))
+        latest = earliest + STEP * int(rng.integers(48, 144))
+        if i % 2:
+            profiles.append(ApplianceProfile(f'ev{i}', kind='slots', energy_kwh=float(rng.uniform(3, 40)),
+                                             max_power_kw=float(rng.choice([3.7, 7.4, 11.0])),
+                                             earliest=earliest, latest=latest))
+        else:
+            profiles.append(ApplianceProfile(f'run{i}', duration_hours=float(rng.choice([0.5, 1, 2, 3, 4])),
+                                             energy_kwh=1.5, earliest=earliest, latest=latest))
+    return profiles
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    rng = np.random.default_rng(0)
+    start = 1_740_000_000 - 1_740_000_000 % STEP
+    timestamps = start + STEP * np.arange(192)
+    prices = rng.normal(10, 6, len(timestamps))
+    profiles = random_profiles(n, start, rng)
+
+    started = time.perf_counter()
+    series = PriceSeries(timestamps, prices, STEP)
+    schedules = series.optimize(profiles)
+    elapsed = time.perf_counter() - started
+
+    scheduled = sum(s is not None for s in schedules)
+    print(f"{n} profiles over {len(timestamps)} slots, {scheduled} scheduled")
+    print(f"total:   {elapsed * 1000:8.1f} ms")
+    print(f"rate:    {n / elapsed:8.0f} profiles/s")
@@ -0,0 +1,77 @@
+# benchmarks/bench_price_query.py
+# Compares loading a multi-year price range through the ORM with the
+# columnar NumPy path in db/operations/price_arrays.py.
+#
+#   python benchmarks/bench_price_query.py [years]
+import sys
+import tempfile
+import time
+from pathlib import Path
+from datetime import datetime, timedelta
+
+project_root = Path(__file__).parents[1]
+sys.path.append(str(project_root))
+
+from sqlalchemy import select
+from api.models import PriceData
+from db.database import dispose_engines, get_db_engine, session_scope
+from db.models.spot_prices import SpotPrice
+from db.operations.price_arrays import load_prices
+from db.operations.spot_prices import bulk_upsert_prices
+
+
+def fill(db_file: Path, years: int) -> tuple[int, int]:
+    start = datetime(2020, 1, 1)
+    hours = years * 365 * 24
+    prices = [PriceData(timestamp=start + timedelta(hours=h), price=(h * 37 % 200) / 10)
+              for h in range(hours)]
+    with session_scope(db_file) as session:
+        bulk_upsert_prices(session, prices, 'awattar', 'ct/kWh', chunk_size=5000)
+    return int(start.timestamp()), int(prices[-1].timestamp.timestamp())
+
+
+def orm_path(db_file, start_ts, end_ts):
+    with session_scope(db_file) as session:
+        stmt = select(SpotPrice).where(
+            SpotPrice.start_timestamp >= start_ts,
+            SpotPrice.start_timestamp <= end_ts,
+            SpotPrice.source == 'awattar'
+        ).order_by(SpotPrice.start_timestamp)
+        prices = session.execute(stmt).scalars().all()
+        timestamps = [datetime.fromtimestamp(p.start_timestamp) for p in prices]
+        values = [p.price for p in prices]
+    return len(timestamps), sum(values)
+
+
+def array_path(db_file, start_ts, end_ts):
+    prices = load_prices(start_ts, end_ts, engine=get_db_engine(db_file))
+    local = prices.local_times()
+    return len(local), prices.prices.sum()
+
+
+def best_of(fn, *args, repeat=5):
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn(*args)
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+if __name__ == "__main__":
+    years = int(sys.argv[1]) if len(sys.argv) > 1 else 3
+    with tempfile.TemporaryDirectory() as tmp:
+        db_file = Path(tmp) / 'bench.db'
+        start_ts, end_ts = fill(db_file, years)
+
+        rows, total = orm_path(db_file, start_ts, end_ts)
+        rows_np, total_np = array_path(db_file, start_ts, end_ts)
+        assert rows == rows_np and abs(total - total_np) < 1e-6 * abs(total)
+
+        orm = best_of(orm_path, db_file, start_ts, end_ts)
+        arrays = best_of(array_path, db_file, start_ts, end_ts)
+        print(f"{rows} rows ({years} years hourly)")
+        print(f"ORM + datetime objects: {orm * 1000:8.1f} ms")
+        print(f"NumPy columnar path:    {arrays * 1000:8.1f} ms")
+        print(f"speedup:                {orm / arrays:8.1f}x")
+        dispose_engines()
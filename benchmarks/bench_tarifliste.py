@@ -0,0 +1,68 @@
+# benchmarks/bench_tarifliste.py
+# Load test of GET /tarifliste: re-reading and parsing the report on every
+# request (the previous implementation) against the cached parsed report.
+#
+#   python benchmarks/bench_tarifliste.py [requests] [threads]
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from unittest import mock
+
+project_root = Path(__file__).parents[1]
+sys.path.append(str(project_root))
+
+from fastapi import FastAPI, Query
+from fastapi.testclient import TestClient
+from electricity.api.v1.endpoints import tarifliste
+from utils.artifacts import ArtifactIndex, register_artifact, report_kind
+
+HEADER = ('| Stromanbieter | Tarifname | Tarifart | Preisanpassung | Strompreis | Kurzbeschreibung |\n'
+          '|---|---|---|---|---|---|\n')
+
+
+async def uncached_tarifliste(rows: int = Query(default=10, ge=1, le=100)) -> dict:
+    report_file, modified_time = tarifliste.get_latest_report()
+    with open(report_file, 'r', encoding='utf-8') as f:
+        tarife = tarifliste.parse_markdown_table(f.read())
+    return {"tariffs": tarife[:rows],
+            "metadata": {"report_date": None, "last_modified": modified_time.isoformat()}}
+
+
+def load(client, url, requests, threads):
+    def worker(n):
+        for _ in range(n):
+            client.get(url, params={'rows': 100})
+    started = time.perf_counter()
+    with ThreadPoolExecutor(threads) as pool:
+        list(pool.map(worker, [requests // threads] * threads))
+    return requests / (time.perf_counter() - started)
+
+
+if __name__ == "__main__":
+    requests = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    threads = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+    with tempfile.TemporaryDirectory() as tmp:
+        manifest = Path(tmp) / 'artifacts.json'
+        report = Path(tmp) / 'report_20250301_tab.md'
+        report.write_text(HEADER + ''.join(
+            f'| Anbieter {i} | Tarif {i} | Bezug | monatlich | {i}.5 ct/kWh | Beschreibung {i} |\n'
+            for i in range(100)), encoding='utf-8')
+        register_artifact(report_kind('tab.md'), report, manifest)
+
+        with mock.patch.object(tarifliste, 'artifact_index', ArtifactIndex(manifest)):
+            app = FastAPI()
+            app.include_router(tarifliste.router)
+            app.add_api_route('/uncached', uncached_tarifliste)
+            client = TestClient(app)
+            before = load(client, '/uncached', requests, threads)
+            after = load(client, '/tarifliste', requests, threads)
+            etag = client.get('/tarifliste', params={'rows': 100}).headers['etag']
+            client.headers['If-None-Match'] = etag
+            revalidate = load(client, '/tarifliste', requests, threads)
+
+    print(f"{requests} requests, {threads} threads, 100 tariffs")
+    print(f"parse per request: {before:8.0f} req/s")
+    print(f"cached body:       {after:8.0f} req/s")
+    print(f"304 revalidation:  {revalidate:8.0f} req/s")
@@ -4,7 +4,16 @@ import json
 
 CONFIG = {
     'db_file': 'spotprices.db',
-    'db_path': Path(__file__).parent / 'data'
+    'db_path': Path(__file__).parent / 'data',
+    'db_pool_size': 5,
+    'artifact_manifest': 'artifacts.json',
+    'price_notify_file': 'prices.updated'
+}
+
+# Length of one price interval per source in seconds
+SOURCE_CONFIG = {
+    'awattar': {'resolution': 3600},
+    'smartenergy': {'resolution': 900},
 }
 
 TARIF_CONFIG = {'Tarifueberblick': [
@@ -14,9 +23,9 @@ PRODUCT_CONFIG = {'Produktueberblick': [
     {"url": "https://docs.google.com/spreadsheets/d/e/2PACX-1vQ0WJfm_6j_0Sg4E7iW6lJys8bt_X2kneqXIsuKUDFDLObds11UbRDbgadO6nzIfm5yiy-QBbPEduLj/pub?gid=1310884312&single=true&output=csv"}]}
 
 CRAWL_CONFIG = {
-    'w3m': [{"PREFIX": "https://amd1.mooo.com/api/w3m?url=", "Bearer": "test23", "Format": "txt"}],
-    'lynx': [{"PREFIX": "https://amd1.mooo.com/api/lynx?url=", "Bearer": "test23", "Format": "txt"}],
-    'markdowner': [{"PREFIX": "https://md.dhr.wtf/?url=", "Bearer": "", "format": "md"}], }
+    'w3m': [{"PREFIX": "https://amd1.mooo.com/api/w3m?url=", "Bearer": "test23", "Format": "txt", "min_interval": 0}],
+    'lynx': [{"PREFIX": "https://amd1.mooo.com/api/lynx?url=", "Bearer": "test23", "Format": "txt", "min_interval": 2}],
+    'markdowner': [{"PREFIX": "https://md.dhr.wtf/?url=", "Bearer": "", "format": "md", "min_interval": 2}], }
 
 # Load API keys from passwords.json
 try:
@@ -30,6 +39,8 @@ except json.JSONDecodeError:
     print("Warning: passwords.json is not valid JSON. API keys will be missing.")
 
 
+# Optional per entry: "RPM" (requests per minute, default 60) and
+# "MAX_CONCURRENCY" (parallel requests, default 4), see utils/llm_client.py
 LLM_CONFIG = {
     'amp1_qwen': [{"BASEURL": "https://amp1.mooo.com:11444/", "APIKEY": "amp1_api_key", "MODEL": "qwen2.5:0.5b", }],
     'amp1_deepseek': [{"BASEURL": "https://amp1.mooo.com:11444/", "APIKEY": "amp1_api_key", "MODEL": "deepseek-r1:1.5b"}],
@@ -0,0 +1,103 @@
+# db/database.py
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator, Optional
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session, sessionmaker
+from config import CONFIG
+from db.models.spot_prices import Base
+# Imported so that create_all knows every table
+from db.models import coverage, daily_stats  # noqa: F401
+
+# Applied to every new SQLite connection. WAL lets the API read while the
+# cron job writes; with WAL, synchronous=NORMAL is still crash safe.
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': 5000,           # ms to wait for a writer instead of failing
+    'cache_size': -64000,           # negative = KiB, i.e. 64 MB page cache
+    'mmap_size': 256 * 1024 * 1024,
+    'temp_store': 'MEMORY',
+}
+
+_engines: dict[str, Engine] = {}
+_factories: dict[str, sessionmaker] = {}
+_lock = threading.Lock()
+
+
+def _set_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    for name, value in SQLITE_PRAGMAS.items():
+        cursor.execute(f"PRAGMA {name}={value}")
+    cursor.close()
+
+
+def get_db_url(db_file: Optional[Path] = None) -> str:
+    db_file = db_file or CONFIG['db_path'] / CONFIG['db_file']
+    return f'sqlite:///{db_file}'
+
+
+def get_db_engine(db_file: Optional[Path] = None) -> Engine:
+    """
+    Return the process-wide engine for db_file (default: CONFIG db_path/db_file).
+
+    The engine is created once per database file with a connection pool,
+    the SQLITE_PRAGMAS applied on connect and all tables created.
+    """
+    url = get_db_url(db_file)
+    engine = _engines.get(url)
+    if engine is not None:
+        return engine
+
+    with _lock:
+        engine = _engines.get(url)
+        if engine is None:
+            Path(url.removeprefix('sqlite:///')).parent.mkdir(parents=True, exist_ok=True)
+            engine = create_engine(
+                url,
+                pool_size=CONFIG.get('db_pool_size', 5),
+                max_overflow=CONFIG.get('db_max_overflow', 10),
+                pool_pre_ping=True,
+                connect_args={'check_same_thread': False},
+            )
+            event.listen(engine, 'connect', _set_pragmas)
+            Base.metadata.create_all(engine)
+            _engines[url] = engine
+            _factories[url] = sessionmaker(bind=engine)
+    return engine
+
+
+def get_session(db_file: Optional[Path] = None) -> Session:
+    """New session bound to the shared engine; the caller closes it."""
+    get_db_engine(db_file)
+    return _factories[get_db_url(db_file)]()
+
+
+@contextmanager
+def session_scope(db_file: Optional[Path] = None) -> Iterator[Session]:
+    """
+    Session context manager used by all modules.
+
+    Commits when the block finishes, rolls back on an exception and
+    always closes the session.
+    """
+    session = get_session(db_file)
+    try:
+        yield session
+        session.commit()
+    except Exception:
+        session.rollback()
+        raise
+    finally:
+        session.close()
+
+
+def dispose_engines():
+    """Close all pooled connections, e.g. after forking or in tests."""
+    with _lock:
+        for engine in _engines.values():
+            engine.dispose()
+        _engines.clear()
+        _factories.clear()
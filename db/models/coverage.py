@@ -0,0 +1,11 @@
+# db/models/coverage.py
+from sqlalchemy import Column, Integer, String
+from .spot_prices import Base
+
+class PriceCoverage(Base):
+    """Merged [start_timestamp, end_timestamp) intervals covered by spot_prices rows."""
+    __tablename__ = 'price_coverage'
+
+    source = Column(String, primary_key=True)
+    start_timestamp = Column(Integer, primary_key=True)
+    end_timestamp = Column(Integer, nullable=False)
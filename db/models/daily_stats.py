@@ -1,11 +1,16 @@
+# db/models/daily_stats.py
+from sqlalchemy import Column, Integer, Float, String
+from .spot_prices import Base
+
 class DailyStats(Base):
     __tablename__ = 'daily_stats'
     
-    date = Column(String, primary_key=True)
+    date = Column(String, primary_key=True)  # local date, YYYY-MM-DD
     source = Column(String, primary_key=True)
     min_price = Column(Float)
-    min_time = Column(String)
+    min_time = Column(Integer)  # start_timestamp of the cheapest price
     max_price = Column(Float)
-    max_time = Column(String)
+    max_time = Column(Integer)  # start_timestamp of the most expensive price
     avg_price = Column(Float)
-    data_points = Column(Integer)
\ No newline at end of file
+    data_points = Column(Integer)
+    digest = Column(String)  # sha1 of the day's (start_timestamp, price) pairs, see data_version
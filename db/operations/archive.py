@@ -0,0 +1,262 @@
+# db/operations/archive.py
+# Closed months of spot_prices are compacted into one Parquet file per
+# source and local month next to the database:
+#
+#   data/archive/<source>/<YYYY-MM>.parquet
+#
+# SQLite keeps the recent days that still receive writes, but a closed month
+# can still be corrected there. Everything derived from the prices
+# (load_price_arrays, daily_stats, coverage) reads both tiers through
+# read_archive and merge_tiers, with the SQLite row winning.
+import os
+import tempfile
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+import numpy as np
+from sqlalchemy import delete, func, select
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+from ..models.spot_prices import SpotPrice
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # optional; without it everything stays in SQLite
+    pa = pq = None
+
+# Days that stay in SQLite; older closed months are archived
+KEEP_DAYS = 60
+ARCHIVE_COLUMNS = ('start_timestamp', 'end_timestamp', 'price', 'unit')
+_DTYPES = {'start_timestamp': np.int64, 'end_timestamp': np.int64, 'price': np.float64,
+           'unit': object}
+
+
+def archive_available() -> bool:
+    return pq is not None
+
+
+def archive_dir(engine: Engine) -> Optional[Path]:
+    """Archive directory of the database behind engine, None for in-memory databases."""
+    database = engine.url.database
+    if not database or database == ':memory:':
+        return None
+    return Path(database).resolve().parent / 'archive'
+
+
+def _month_start(day: date) -> date:
+    return day.replace(day=1)
+
+
+def _next_month(month: date) -> date:
+    return (month + timedelta(days=32)).replace(day=1)
+
+
+def _ts(day: date) -> int:
+    return int(datetime.combine(day, datetime.min.time()).timestamp())
+
+
+def month_range(month: date) -> Tuple[int, int]:
+    """Epoch seconds of the local month starting at month, end exclusive."""
+    return _ts(month), _ts(_next_month(month))
+
+
+def month_path(directory: Path, source: str, month: date) -> Path:
+    return directory / source / f"{month:%Y-%m}.parquet"
+
+
+def archived_months(directory: Optional[Path], source: str) -> List[date]:
+    """Months of source that have an archive file, in order."""
+    if directory is None:
+        return []
+    try:
+        names = os.listdir(directory / source)
+    except FileNotFoundError:
+        return []
+    return sorted(datetime.strptime(name[:7], '%Y-%m').date()
+                  for name in names if name.endswith('.parquet'))
+
+
+def archived_sources(directory: Optional[Path]) -> List[str]:
+    """Sources that have an archive directory, in order."""
+    if directory is None or not directory.is_dir():
+        return []
+    return sorted(entry.name for entry in directory.iterdir() if entry.is_dir())
+
+
+def _write_atomic(table, path: Path):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, suffix='.tmp')
+    os.close(fd)
+    pq.write_table(table, tmp, compression='zstd')
+    os.replace(tmp, path)
+
+
+def archive_month(session: Session, source: str, month: date, directory: Path) -> int:
+    """
+    Move the rows of source in the local month starting at month from
+    spot_prices into its Parquet file. Rows already in the file are kept
+    unless SQLite has a newer value for the same start_timestamp.
+
+    Returns:
+        Number of rows moved
+    """
+    if not archive_available():
+        raise RuntimeError("pyarrow is required to archive prices")
+    start_ts, end_ts = month_range(month)
+    rows = session.execute(
+        select(SpotPrice.start_timestamp, SpotPrice.end_timestamp, SpotPrice.price, SpotPrice.unit)
+        .where(SpotPrice.source == source,
+               SpotPrice.start_timestamp >= start_ts,
+               SpotPrice.start_timestamp < end_ts)
+        .order_by(SpotPrice.start_timestamp)
+    ).all()
+    if not rows:
+        return 0
+
+    columns = dict(zip(ARCHIVE_COLUMNS, zip(*rows)))
+    table = pa.table({
+        'start_timestamp': pa.array(columns['start_timestamp'], pa.int64()),
+        'end_timestamp': pa.array(columns['end_timestamp'], pa.int64()),
+        'price': pa.array(columns['price'], pa.float64()),
+        'unit': pa.array(columns['unit'], pa.string()).dictionary_encode(),
+    })
+    path = month_path(directory, source, month)
+    if path.exists():
+        old = pq.read_table(path)
+        keep = np.isin(old['start_timestamp'].to_numpy(), table['start_timestamp'].to_numpy(), invert=True)
+        table = pa.concat_tables([old.filter(pa.array(keep)), table.cast(old.schema)])
+        table = table.take(pa.compute.sort_indices(table, [('start_timestamp', 'ascending')]))
+    _write_atomic(table, path)
+
+    # Only delete once the file is in place
+    session.execute(delete(SpotPrice).where(
+        SpotPrice.source == source,
+        SpotPrice.start_timestamp >= start_ts,
+        SpotPrice.start_timestamp < end_ts))
+    session.flush()
+    return len(rows)
+
+
+def normalize_archive(directory: Optional[Path], source: str, resolution: int) -> int:
+    """
+    Rewrite the archived months of source whose end_timestamp is not
+    start_timestamp + resolution. Returns the number of fixed rows.
+    """
+    months = archived_months(directory, source)
+    if months and not archive_available():
+        raise RuntimeError(f"pyarrow is required to normalize the archived prices of {source}")
+    fixed = 0
+    for month in months:
+        path = month_path(directory, source, month)
+        table = pq.read_table(path)
+        ends = table['start_timestamp'].to_numpy() + resolution
+        wrong = int(np.count_nonzero(table['end_timestamp'].to_numpy() != ends))
+        if wrong:
+            index = table.schema.get_field_index('end_timestamp')
+            table = table.set_column(index, 'end_timestamp', pa.array(ends, pa.int64()))
+            _write_atomic(table, path)
+            fixed += wrong
+    return fixed
+
+
+def archive_closed_months(session: Session, sources: Optional[Iterable[str]] = None,
+                          keep_days: int = KEEP_DAYS, today: Optional[date] = None) -> Dict[str, int]:
+    """
+    Archive every month of every source that ended more than keep_days ago.
+
+    Coverage and daily_stats are built before any row leaves SQLite and
+    are left alone afterwards; they describe the data of both tiers, and
+    later refreshes and rebuilds read both tiers too.
+
+    Returns:
+        Number of archived rows per source
+    """
+    # Imported here, both modules read the archive themselves
+    from .coverage import ensure_coverage
+    from .daily_stats import ensure_daily_stats
+
+    directory = archive_dir(session.get_bind())
+    if directory is None or not archive_available():
+        return {}
+    today = today or datetime.now().date()
+    # First month that must stay in SQLite
+    cutoff = _month_start(today - timedelta(days=keep_days))
+    if sources is None:
+        sources = session.execute(select(SpotPrice.source).distinct()).scalars().all()
+
+    moved = {}
+    for source in sources:
+        ensure_coverage(session, source)
+        ensure_daily_stats(session, source)
+        first = session.execute(
+            select(func.min(SpotPrice.start_timestamp)).where(
+                SpotPrice.source == source, SpotPrice.start_timestamp < _ts(cutoff))
+        ).scalar()
+        count = 0
+        if first is not None:
+            month = _month_start(datetime.fromtimestamp(first).date())
+            while month < cutoff:
+                count += archive_month(session, source, month, directory)
+                month = _next_month(month)
+        moved[source] = count
+    session.commit()
+    return moved
+
+
+def read_archive(directory: Optional[Path], source: str, start_ts: int, end_ts: int,
+                 columns: Sequence[str] = ('start_timestamp', 'price'), strict: bool = False) -> tuple:
+    """
+    Archived column arrays of source with start_timestamp in
+    [start_ts, end_ts], not necessarily in order.
+
+    Only files of months overlapping the range are opened, and the time
+    filter is pushed down to the Parquet row groups.
+
+    Args:
+        directory: Archive directory, see archive_dir
+        source: Price source
+        start_ts: First start_timestamp to include
+        end_ts: Last start_timestamp to include
+        columns: Columns to return, out of ARCHIVE_COLUMNS
+        strict: Raise instead of ignoring archived months when pyarrow is
+            missing; for callers that would otherwise drop archived history
+
+    Returns:
+        Tuple with one NumPy array per column
+    """
+    empty = tuple(np.empty(0, _DTYPES[column]) for column in columns)
+    months = archived_months(directory, source)
+    if not months:
+        return empty
+    if not archive_available():
+        if strict:
+            raise RuntimeError(f"pyarrow is required to read the archived prices of {source}")
+        print(f"Warning: pyarrow is not installed, ignoring archived prices of {source}")
+        return empty
+
+    paths = [str(month_path(directory, source, month)) for month in months
+             if month_range(month)[1] > start_ts and month_range(month)[0] <= end_ts]
+    if not paths:
+        return empty
+    # One dataset read over all files; callers sort the result (merge_tiers)
+    table = pq.read_table(paths, columns=list(columns),
+                          filters=[('start_timestamp', '>=', int(start_ts)),
+                                   ('start_timestamp', '<=', int(end_ts))])
+    return tuple(table[column].to_numpy() for column in columns)
+
+
+def merge_tiers(archived: Sequence[np.ndarray], current: Sequence[np.ndarray]) -> tuple:
+    """
+    Merge column arrays of archived and SQLite rows (start_timestamp first)
+    into start_timestamp order. Where both tiers hold a slot, the SQLite
+    row wins. current is returned unchanged if nothing is archived.
+    """
+    if not len(archived[0]):
+        return tuple(current)
+    merged = [np.concatenate((a, c)) for a, c in zip(archived, current)]
+    # Stable sort keeps archive rows before SQLite rows of the same slot
+    order = np.argsort(merged[0], kind='stable')
+    merged = [column[order] for column in merged]
+    last = np.r_[merged[0][1:] != merged[0][:-1], True]
+    return tuple(column[last] for column in merged)
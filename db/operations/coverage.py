@@ -0,0 +1,234 @@
+# db/operations/coverage.py
+from datetime import date, datetime, timedelta
+from typing import Iterable, List, Optional, Tuple
+from weakref import WeakKeyDictionary
+import numpy as np
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.orm import Session
+from ..models.coverage import PriceCoverage
+from ..models.spot_prices import SpotPrice
+from .archive import (archive_dir, archived_months, archived_sources, merge_tiers,
+                      normalize_archive, read_archive)
+from .sources import source_resolution
+
+# Engines (and sources) whose coverage table is known to exist and be populated
+_ensured = WeakKeyDictionary()
+# PRAGMA user_version of databases whose end_timestamps match their source's
+# resolution; older versions stored one hour for every source
+END_TIMESTAMPS_VERSION = 1
+
+
+def merge_intervals(intervals: Iterable[Tuple[int, int]]) -> List[Tuple[int, int]]:
+    """Merge overlapping or touching [start, end) intervals."""
+    merged = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def group_date_ranges(dates) -> List[Tuple[date, date]]:
+    """
+    Collapse dates into runs of consecutive days.
+
+    Args:
+        dates: Iterable of dates, in any order and possibly with duplicates
+
+    Returns:
+        List of (first, last) tuples, both inclusive, in ascending order
+    """
+    ranges = []
+    for day in sorted(set(dates)):
+        if ranges and day - ranges[-1][1] == timedelta(days=1):
+            ranges[-1] = (ranges[-1][0], day)
+        else:
+            ranges.append((day, day))
+    return ranges
+
+
+def add_coverage(session: Session, source: str, intervals: Iterable[Tuple[int, int]]):
+    """
+    Record that [start, end) intervals of source are now stored.
+
+    Each interval is merged with the stored intervals it overlaps or touches,
+    so the table keeps one row per contiguous run of data.
+    """
+    for start, end in merge_intervals(intervals):
+        neighbours = session.execute(
+            select(PriceCoverage.start_timestamp, PriceCoverage.end_timestamp).where(
+                PriceCoverage.source == source,
+                PriceCoverage.start_timestamp <= end,
+                PriceCoverage.end_timestamp >= start
+            )
+        ).all()
+        if neighbours:
+            start = min(start, *(n[0] for n in neighbours))
+            end = max(end, *(n[1] for n in neighbours))
+            session.execute(delete(PriceCoverage).where(
+                PriceCoverage.source == source,
+                PriceCoverage.start_timestamp.in_([n[0] for n in neighbours])
+            ))
+        session.add(PriceCoverage(source=source, start_timestamp=start, end_timestamp=end))
+    session.flush()
+
+
+def rebuild_coverage(session: Session, source: str):
+    """Recreate the coverage intervals of source with one scan over spot_prices and the archive."""
+    session.execute(delete(PriceCoverage).where(PriceCoverage.source == source))
+    rows = session.execute(
+        select(SpotPrice.start_timestamp, SpotPrice.end_timestamp)
+        .where(SpotPrice.source == source)
+        .order_by(SpotPrice.start_timestamp)
+    ).all()
+    current = (np.array([r[0] for r in rows], np.int64), np.array([r[1] for r in rows], np.int64))
+    archived = read_archive(archive_dir(session.get_bind()), source, 0, 2 ** 62,
+                            columns=('start_timestamp', 'end_timestamp'), strict=True)
+    starts, ends = merge_tiers(archived, current)
+    intervals = []
+    for start, end in zip(starts.tolist(), ends.tolist()):
+        if intervals and start <= intervals[-1][1]:
+            intervals[-1][1] = max(intervals[-1][1], end)
+        else:
+            intervals.append([start, end])
+    session.add_all(PriceCoverage(source=source, start_timestamp=s, end_timestamp=e)
+                    for s, e in intervals)
+    session.flush()
+
+
+def normalize_end_timestamps(session: Session, source: str) -> int:
+    """
+    Set end_timestamp = start_timestamp + source_resolution(source) on rows
+    stored with a different interval length (all sources used to get one
+    hour). Returns the number of fixed rows.
+    """
+    resolution = source_resolution(source)
+    result = session.execute(
+        update(SpotPrice)
+        .where(SpotPrice.source == source,
+               SpotPrice.end_timestamp - SpotPrice.start_timestamp != resolution)
+        .values(end_timestamp=SpotPrice.start_timestamp + resolution)
+        .execution_options(synchronize_session=False)
+    )
+    return result.rowcount
+
+
+def migrate_end_timestamps(session: Session) -> bool:
+    """
+    Normalize end_timestamps of every source, in SQLite and in the archive,
+    once per database; PRAGMA user_version records that it has run, so
+    later processes only read the marker. New rows get the right length
+    at ingest (bulk_upsert_prices). The marker is part of the session's
+    transaction and is kept when the session commits. Returns whether the
+    migration ran.
+    """
+    connection = session.connection()
+    if connection.exec_driver_sql("PRAGMA user_version").scalar() >= END_TIMESTAMPS_VERSION:
+        return False
+    directory = archive_dir(session.get_bind())
+    sources = set(session.execute(select(SpotPrice.source).distinct()).scalars())
+    sources.update(archived_sources(directory))
+    for source in sorted(sources):
+        fixed = normalize_end_timestamps(session, source)
+        fixed += normalize_archive(directory, source, source_resolution(source))
+        if fixed:
+            PriceCoverage.__table__.create(connection, checkfirst=True)
+            rebuild_coverage(session, source)
+    connection.exec_driver_sql(f"PRAGMA user_version = {END_TIMESTAMPS_VERSION}")
+    return True
+
+
+def ensure_coverage(session: Session, source: str):
+    """
+    Create the coverage table if needed and build it once for databases
+    filled before the index existed. The first call per engine runs
+    migrate_end_timestamps if the database has not been migrated yet.
+    """
+    engine = session.get_bind()
+    if engine not in _ensured:
+        migrate_end_timestamps(session)
+    sources = _ensured.setdefault(engine, set())
+    if source in sources:
+        return
+
+    PriceCoverage.__table__.create(session.connection(), checkfirst=True)
+    has_coverage = session.execute(
+        select(PriceCoverage.start_timestamp).where(PriceCoverage.source == source).limit(1)
+    ).first()
+    if not has_coverage:
+        has_prices = session.execute(
+            select(SpotPrice.start_timestamp).where(SpotPrice.source == source).limit(1)
+        ).first()
+        if has_prices or archived_months(archive_dir(engine), source):
+            rebuild_coverage(session, source)
+    sources.add(source)
+
+
+def covered_intervals(session: Session, source: str, start_ts: Optional[int] = None,
+                      end_ts: Optional[int] = None) -> List[Tuple[int, int]]:
+    """Stored intervals of source overlapping [start_ts, end_ts], in order."""
+    ensure_coverage(session, source)
+    stmt = select(PriceCoverage.start_timestamp, PriceCoverage.end_timestamp)\
+        .where(PriceCoverage.source == source)
+    if start_ts is not None:
+        stmt = stmt.where(PriceCoverage.end_timestamp > start_ts)
+    if end_ts is not None:
+        stmt = stmt.where(PriceCoverage.start_timestamp <= end_ts)
+    return [tuple(row) for row in session.execute(stmt.order_by(PriceCoverage.start_timestamp))]
+
+
+def coverage_bounds(session: Session, source: str) -> Optional[Tuple[int, int]]:
+    """First start and last end timestamp covered for source, None if empty."""
+    ensure_coverage(session, source)
+    first, last = session.execute(
+        select(func.min(PriceCoverage.start_timestamp), func.max(PriceCoverage.end_timestamp))
+        .where(PriceCoverage.source == source)
+    ).one()
+    if first is None:
+        return None
+    return first, last
+
+
+def _day_start(day: date) -> int:
+    return int(datetime.combine(day, datetime.min.time()).timestamp())
+
+
+def missing_days(session: Session, source: str, first_day: date, last_day: date,
+                 step: Optional[int] = None) -> List[date]:
+    """
+    Days between first_day and last_day (inclusive) without any stored price.
+
+    Only the uncovered spans between intervals are walked, so the cost grows
+    with the number of gaps, not with the number of stored rows.
+
+    Args:
+        session: SQLAlchemy session
+        source: Price source
+        first_day: First day to check
+        last_day: Last day to check
+        step: Length of one price interval in seconds, defaults to the
+            resolution of source
+    """
+    step = step or source_resolution(source)
+    window_start = _day_start(first_day)
+    window_end = _day_start(last_day + timedelta(days=1)) - 1
+    intervals = covered_intervals(session, source, window_start, window_end)
+
+    missing = []
+    # previous covered slot start, None before the first interval
+    previous = None
+    for start, end in intervals + [(None, None)]:
+        day = first_day
+        if previous is not None:
+            day = max(day, datetime.fromtimestamp(previous).date() + timedelta(days=1))
+        if start is None:
+            until = last_day
+        else:
+            until = min(last_day, datetime.fromtimestamp(start).date() - timedelta(days=1))
+        while day <= until:
+            missing.append(day)
+            day += timedelta(days=1)
+        if end is not None:
+            previous = end - step
+    return missing
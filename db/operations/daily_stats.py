@@ -0,0 +1,149 @@
+# db/operations/daily_stats.py
+import hashlib
+from datetime import date, datetime, timedelta
+from typing import Iterable, List, Optional
+from weakref import WeakKeyDictionary
+import numpy as np
+from sqlalchemy import delete, select
+from sqlalchemy.orm import Session
+from ..models.daily_stats import DailyStats
+from ..models.spot_prices import SpotPrice
+from .archive import archive_dir, archived_months, merge_tiers, read_archive
+from .coverage import group_date_ranges
+
+# Engines (and sources) whose daily_stats table is known to exist and be populated
+_ensured = WeakKeyDictionary()
+
+
+def _day_start(day: date) -> int:
+    return int(datetime.combine(day, datetime.min.time()).timestamp())
+
+
+def _compute_rows(session: Session, source: str, start_ts: int, end_ts: int,
+                  days: Optional[set] = None) -> List[DailyStats]:
+    rows = session.execute(
+        select(SpotPrice.start_timestamp, SpotPrice.price)
+        .where(SpotPrice.source == source,
+               SpotPrice.start_timestamp >= start_ts,
+               SpotPrice.start_timestamp < end_ts)
+        .order_by(SpotPrice.start_timestamp)
+    ).all()
+    current = (np.array([r[0] for r in rows], np.int64), np.array([r[1] for r in rows], np.float64))
+    # Archived months count too, with corrections in SQLite taking precedence
+    archived = read_archive(archive_dir(session.get_bind()), source, start_ts, end_ts - 1, strict=True)
+    timestamps, prices = merge_tiers(archived, current)
+
+    stats = {}
+    # Index range of each day in the sorted arrays, for the content digest
+    spans = {}
+    for i, (ts, price) in enumerate(zip(timestamps.tolist(), prices.tolist())):
+        day = datetime.fromtimestamp(ts).date().isoformat()
+        if days is not None and day not in days:
+            continue
+        stat = stats.get(day)
+        if stat is None:
+            stats[day] = DailyStats(date=day, source=source, min_price=price, min_time=ts,
+                                    max_price=price, max_time=ts, avg_price=price, data_points=1)
+            spans[day] = [i, i + 1]
+            continue
+        spans[day][1] = i + 1
+        if price < stat.min_price:
+            stat.min_price, stat.min_time = price, ts
+        if price > stat.max_price:
+            stat.max_price, stat.max_time = price, ts
+        # running sum, turned into the average below
+        stat.avg_price += price
+        stat.data_points += 1
+
+    for day, stat in stats.items():
+        stat.avg_price = stat.avg_price / stat.data_points
+        first, last = spans[day]
+        stat.digest = hashlib.sha1(np.ascontiguousarray(timestamps[first:last], np.int64).tobytes()
+                                   + np.ascontiguousarray(prices[first:last], np.float64).tobytes()).hexdigest()
+    return list(stats.values())
+
+
+def refresh_daily_stats(session: Session, source: str, days: Iterable[date]):
+    """
+    Recompute the daily_stats rows of source for the given local days.
+
+    Only the prices of those days are read, from SQLite and the archive;
+    days that no longer have any prices lose their row.
+    """
+    days = set(days)
+    if not days:
+        return
+    ensure_daily_stats(session, source)
+    keys = {d.isoformat() for d in days}
+    session.execute(delete(DailyStats).where(
+        DailyStats.source == source, DailyStats.date.in_(keys)))
+    for first, last in group_date_ranges(days):
+        session.add_all(_compute_rows(session, source, _day_start(first),
+                                      _day_start(last + timedelta(days=1)), keys))
+    session.flush()
+
+
+def rebuild_daily_stats(session: Session, source: str):
+    """Recompute all daily_stats rows of source with one scan over spot_prices and the archive."""
+    session.execute(delete(DailyStats).where(DailyStats.source == source))
+    session.add_all(_compute_rows(session, source, 0, 2 ** 62))
+    session.flush()
+
+
+def ensure_daily_stats(session: Session, source: str):
+    """
+    Create the daily_stats table if needed and fill it once for databases
+    filled before the rollup was maintained, or before it kept a digest.
+    """
+    engine = session.get_bind()
+    sources = _ensured.setdefault(engine, set())
+    if source in sources:
+        return
+
+    connection = session.connection()
+    DailyStats.__table__.create(connection, checkfirst=True)
+    columns = [row[1] for row in connection.exec_driver_sql("PRAGMA table_info(daily_stats)")]
+    if 'digest' not in columns:
+        connection.exec_driver_sql("ALTER TABLE daily_stats ADD COLUMN digest VARCHAR")
+    has_stats = session.execute(
+        select(DailyStats.date).where(DailyStats.source == source).limit(1)
+    ).first()
+    # Rows written before the digest existed are recomputed once
+    stale = session.execute(
+        select(DailyStats.date).where(DailyStats.source == source, DailyStats.digest.is_(None)).limit(1)
+    ).first()
+    if stale:
+        rebuild_daily_stats(session, source)
+    elif not has_stats:
+        has_prices = session.execute(
+            select(SpotPrice.start_timestamp).where(SpotPrice.source == source).limit(1)
+        ).first()
+        if has_prices or archived_months(archive_dir(engine), source):
+            rebuild_daily_stats(session, source)
+    sources.add(source)
+
+
+def get_daily_stats(session: Session, source: str, first_day: date, last_day: date) -> List[DailyStats]:
+    """daily_stats rows of source from first_day to last_day (inclusive), in date order."""
+    ensure_daily_stats(session, source)
+    return session.execute(
+        select(DailyStats)
+        .where(DailyStats.source == source,
+               DailyStats.date >= first_day.isoformat(),
+               DailyStats.date <= last_day.isoformat())
+        .order_by(DailyStats.date)
+    ).scalars().all()
+
+
+def data_version(session: Session, source: str, first_day: date, last_day: date) -> str:
+    """
+    Fingerprint of the prices of source from first_day to last_day.
+
+    Hashes the per-day content digests of the daily_stats rows in the
+    range, so it changes whenever a price inside the range changes, even if
+    the day's aggregates stay the same.
+    """
+    digest = hashlib.sha1(source.encode())
+    for stat in get_daily_stats(session, source, first_day, last_day):
+        digest.update(f"{stat.date}:{stat.digest};".encode())
+    return digest.hexdigest()
@@ -0,0 +1,108 @@
+# db/operations/ingest.py
+import asyncio
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
+from typing import Callable, List, Optional, Tuple
+from sqlalchemy.orm import Session
+from api.models import PriceClient, PriceData
+from .spot_prices import bulk_upsert_prices
+from .coverage import group_date_ranges
+from .update_db import find_missing_dates
+
+
+@dataclass
+class IngestResult:
+    source: str
+    windows: int = 0
+    inserted: int = 0
+    updated: int = 0
+    errors: list[str] = field(default_factory=list)
+
+
+def plan_windows(client: PriceClient, missing_dates: List[date]) -> List[Tuple[date, date]]:
+    """
+    Turn missing dates into the request windows for one client.
+
+    Dates the source can no longer serve (older than client.history_days)
+    are dropped, runs of consecutive days are split at client.max_range_days.
+    """
+    if client.history_days is not None:
+        oldest = datetime.now().date() - timedelta(days=client.history_days)
+        missing_dates = [d for d in missing_dates if d >= oldest]
+
+    windows = []
+    for start, end in group_date_ranges(missing_dates):
+        while start <= end:
+            window_end = min(end, start + timedelta(days=client.max_range_days - 1))
+            windows.append((start, window_end))
+            start = window_end + timedelta(days=1)
+    return windows
+
+
+async def _fetch_source(client: PriceClient, windows, semaphore: asyncio.Semaphore):
+    async def fetch(window):
+        async with semaphore:
+            return await asyncio.to_thread(client.fetch_range_prices, *window)
+
+    results = await asyncio.gather(*(fetch(w) for w in windows), return_exceptions=True)
+
+    prices: List[PriceData] = []
+    errors = []
+    for (start, end), result in zip(windows, results):
+        if isinstance(result, Exception):
+            errors.append(f"{start} - {end}: {result}")
+        else:
+            prices.extend(result)
+    return client, prices, errors
+
+
+async def ingest_sources(session: Session, clients: List[PriceClient],
+                         find_missing: Optional[Callable[[Session, str], List[date]]] = None,
+                         max_concurrency: int = 4) -> dict[str, IngestResult]:
+    """
+    Fetch the missing windows of all clients concurrently and store them.
+
+    HTTP requests run in worker threads, at most max_concurrency at a time
+    across all sources. Database writes stay on the calling thread; each
+    source is upserted and committed as soon as all of its windows are in.
+
+    Args:
+        session: SQLAlchemy session used for planning and writing
+        clients: Price clients to ingest
+        find_missing: Callable (session, source) -> missing dates,
+                      defaults to update_db.find_missing_dates
+        max_concurrency: Maximum number of requests in flight
+
+    Returns:
+        Dictionary of IngestResult per source
+    """
+    find_missing = find_missing or find_missing_dates
+    semaphore = asyncio.Semaphore(max_concurrency)
+    results = {}
+    tasks = []
+
+    for client in clients:
+        windows = plan_windows(client, find_missing(session, client.source))
+        results[client.source] = IngestResult(source=client.source, windows=len(windows))
+        if windows:
+            tasks.append(_fetch_source(client, windows, semaphore))
+
+    for finished in asyncio.as_completed(tasks):
+        client, prices, errors = await finished
+        result = results[client.source]
+        result.errors.extend(errors)
+        if prices:
+            upsert = bulk_upsert_prices(session, prices, client.source, client.unit)
+            result.inserted = upsert.inserted
+            result.updated = upsert.updated
+        print(f"{client.source}: {result.windows} windows, "
+              f"{result.inserted} new, {result.updated} updated, {len(result.errors)} errors")
+
+    return results
+
+
+def run_ingestion(session: Session, clients: List[PriceClient],
+                  find_missing: Optional[Callable[[Session, str], List[date]]] = None,
+                  max_concurrency: int = 4) -> dict[str, IngestResult]:
+    """Synchronous wrapper around ingest_sources for scripts and cron jobs."""
+    return asyncio.run(ingest_sources(session, clients, find_missing, max_concurrency))
@@ -1,61 +1,163 @@
-import pandas as pd
-from sqlalchemy import text
-from typing import Optional, Dict, List, Tuple
+# db/operations/price_analytics.py
+# Analytic read path: spot prices as DataFrames with 'timestamp' (naive
+# local datetime64) and 'price' columns, whole or streamed in chunks.
+# Both storage tiers are read, see db.operations.archive.
 from datetime import datetime, timedelta
+from typing import Iterator, Optional, Tuple, Union
+import numpy as np
+import pandas as pd
+from sqlalchemy.engine import Engine
 
 from db.database import get_db_engine
+from .archive import archive_dir, archived_months, month_range
+from .price_arrays import ROW_DTYPE, load_prices, to_local_datetime64
 
+DEFAULT_CHUNKSIZE = 100_000
+# Upper bound for open ranges; datetime64[s] and SQLite integers both hold it
+_MAX_TS = 2 ** 40
 
-def get_spot_price_data(start_date: Optional[datetime] = None,
-                        end_date: Optional[datetime] = None) -> pd.DataFrame:
-    """
-    Retrieve spot price data from the database within the specified date range.
 
-    Args:
-        start_date: Optional start date for filtering data
-        end_date: Optional end date for filtering data
+def _bounds(start_date: Optional[datetime], end_date: Optional[datetime]) -> Tuple[int, int]:
+    start_ts = int(start_date.timestamp()) if start_date else 0
+    end_ts = int(end_date.timestamp()) if end_date else _MAX_TS
+    return start_ts, end_ts
 
-    Returns:
-        DataFrame containing timestamp and price data
-    """
-    engine = get_db_engine()
 
-    # Build query based on date filters
-    query = """
-    SELECT timestamp, price 
-    FROM spot_prices
-    """
+def _frame(timestamps: np.ndarray, prices: np.ndarray, price_dtype) -> pd.DataFrame:
+    return pd.DataFrame({'timestamp': to_local_datetime64(timestamps),
+                         'price': prices.astype(price_dtype, copy=False)})
+
 
-    conditions = []
-    params = {}
+def _segments(engine: Engine, source: str, start_ts: int, end_ts: int):
+    """
+    Split [start_ts, end_ts] into (lo, hi, archived) pieces in time order:
+    archived months, which may also have rows in SQLite, and the spans
+    between them, which live in SQLite only.
+    """
+    segments = []
+    lo = start_ts
+    for month in archived_months(archive_dir(engine), source):
+        first, after = month_range(month)
+        if after <= start_ts or first > end_ts:
+            continue
+        if first > lo:
+            segments.append((lo, first - 1, False))
+        segments.append((max(lo, first), min(after - 1, end_ts), True))
+        lo = after
+    if lo <= end_ts:
+        segments.append((lo, end_ts, False))
+    return segments
+
+
+def _read_blocks(engine: Engine, source: str, start_ts: int, end_ts: int, chunksize: int):
+    """(timestamps, prices) blocks of at most one month or chunksize rows, in time order."""
+    for lo, hi, archived in _segments(engine, source, start_ts, end_ts):
+        if archived:
+            prices = load_prices(lo, hi, source, engine)
+            yield prices.timestamps, prices.prices
+            continue
+        connection = engine.raw_connection()
+        try:
+            cursor = connection.cursor()
+            cursor.execute(
+                "SELECT start_timestamp, price FROM spot_prices "
+                "WHERE source = ? AND start_timestamp >= ? AND start_timestamp <= ? "
+                "ORDER BY start_timestamp",
+                (source, lo, hi))
+            while True:
+                rows = cursor.fetchmany(chunksize)
+                if not rows:
+                    break
+                block = np.fromiter(rows, dtype=ROW_DTYPE, count=len(rows))
+                yield block['start_timestamp'], block['price']
+            cursor.close()
+        finally:
+            connection.close()
+
+
+def iter_spot_price_data(start_date: Optional[datetime] = None,
+                         end_date: Optional[datetime] = None,
+                         source: str = 'awattar',
+                         chunksize: int = DEFAULT_CHUNKSIZE,
+                         engine: Optional[Engine] = None,
+                         price_dtype=np.float64) -> Iterator[pd.DataFrame]:
+    """
+    Stream spot prices as DataFrames of at most chunksize rows, in time order.
 
-    if start_date:
-        conditions.append("timestamp >= :start_date")
-        params['start_date'] = start_date
+    Memory stays bounded by one chunk plus one archived month, whatever
+    the length of the range.
 
-    if end_date:
-        conditions.append("timestamp <= :end_date")
-        params['end_date'] = end_date
+    Args:
+        start_date: First slot start to include, None for no lower bound
+        end_date: Last slot start to include, None for no upper bound
+        source: Price source
+        chunksize: Maximum rows per DataFrame
+        engine: Engine to read from, defaults to the shared engine
+        price_dtype: dtype of the price column, e.g. np.float32
+
+    Yields:
+        DataFrames with 'timestamp' and 'price' columns
+    """
+    engine = engine or get_db_engine()
+    start_ts, end_ts = _bounds(start_date, end_date)
+    pending_ts, pending_prices, pending = [], [], 0
+    for timestamps, prices in _read_blocks(engine, source, start_ts, end_ts, chunksize):
+        pending_ts.append(timestamps)
+        pending_prices.append(prices)
+        pending += len(timestamps)
+        if pending < chunksize:
+            continue
+        timestamps, prices = np.concatenate(pending_ts), np.concatenate(pending_prices)
+        full = len(timestamps) - len(timestamps) % chunksize
+        for i in range(0, full, chunksize):
+            yield _frame(timestamps[i:i + chunksize], prices[i:i + chunksize], price_dtype)
+        pending_ts, pending_prices = [timestamps[full:]], [prices[full:]]
+        pending = len(timestamps) - full
+    if pending:
+        yield _frame(np.concatenate(pending_ts), np.concatenate(pending_prices), price_dtype)
 
-    if conditions:
-        query += " WHERE " + " AND ".join(conditions)
 
-    query += " ORDER BY timestamp"
+def get_spot_price_data(start_date: Optional[datetime] = None,
+                        end_date: Optional[datetime] = None,
+                        source: str = 'awattar',
+                        engine: Optional[Engine] = None,
+                        price_dtype=np.float64,
+                        chunksize: Optional[int] = None) -> Union[pd.DataFrame, Iterator[pd.DataFrame]]:
+    """
+    Retrieve spot prices of source with slot start in [start_date, end_date].
 
-    # Execute query and return as DataFrame
-    with engine.connect() as connection:
-        result = connection.execute(text(query), params)
-        df = pd.DataFrame(result.fetchall(), columns=result.keys())
+    Args:
+        start_date: Optional start date for filtering data
+        end_date: Optional end date for filtering data
+        source: Price source
+        engine: Engine to read from, defaults to the shared engine
+        price_dtype: dtype of the price column, e.g. np.float32
+        chunksize: If given, return an iterator of DataFrames instead (see
+            iter_spot_price_data), like pandas.read_sql
 
-    return df
+    Returns:
+        DataFrame with 'timestamp' (datetime64, local time) and 'price' columns
+    """
+    if chunksize:
+        return iter_spot_price_data(start_date, end_date, source, chunksize, engine, price_dtype)
+    start_ts, end_ts = _bounds(start_date, end_date)
+    prices = load_prices(start_ts, end_ts, source, engine)
+    return _frame(prices.timestamps, prices.prices, price_dtype)
 
 
-def get_latest_spot_price_data(days: int = 365) -> pd.DataFrame:
+def get_latest_spot_price_data(days: int = 365, source: str = 'awattar',
+                               engine: Optional[Engine] = None,
+                               price_dtype=np.float64,
+                               chunksize: Optional[int] = None) -> Union[pd.DataFrame, Iterator[pd.DataFrame]]:
     """
     Retrieve the most recent spot price data for the specified number of days.
 
     Args:
         days: Number of days of data to retrieve
+        source: Price source
+        engine: Engine to read from, defaults to the shared engine
+        price_dtype: dtype of the price column
+        chunksize: Stream DataFrames of this many rows instead
 
     Returns:
         DataFrame containing timestamp and price data
@@ -63,4 +165,4 @@ def get_latest_spot_price_data(days: int = 365) -> pd.DataFrame:
     end_date = datetime.now()
     start_date = end_date - timedelta(days=days)
 
-    return get_spot_price_data(start_date, end_date)
+    return get_spot_price_data(start_date, end_date, source, engine, price_dtype, chunksize)
@@ -0,0 +1,188 @@
+# db/operations/price_arrays.py
+import time
+from dataclasses import dataclass
+from typing import Iterable, Optional
+import numpy as np
+from sqlalchemy.engine import Engine
+from db.database import get_db_engine
+from .archive import archive_dir, merge_tiers, read_archive
+from .sources import source_resolution
+
+ROW_DTYPE = np.dtype([('start_timestamp', '<i8'), ('price', '<f8')])
+
+# DST rules never switch twice within this many seconds (EU: >= 148 days)
+_OFFSET_PROBE = 60 * 86400
+
+DAY = 86400
+# Resolutions offered by the API, in seconds
+RESOLUTIONS = {'15m': 900, '1h': 3600, '1d': DAY}
+
+
+@dataclass
+class PriceArrays:
+    source: str
+    timestamps: np.ndarray  # int64 epoch seconds, ascending
+    prices: np.ndarray      # float64
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
+
+    def local_times(self) -> np.ndarray:
+        """Timestamps as naive local datetime64[s], like datetime.fromtimestamp."""
+        return to_local_datetime64(self.timestamps)
+
+    def to_frame(self):
+        """DataFrame with a local DatetimeIndex named 'timestamp' and a 'price' column."""
+        import pandas as pd
+        index = pd.DatetimeIndex(self.local_times(), name='timestamp')
+        return pd.DataFrame({'price': self.prices}, index=index)
+
+
+def _utc_offset(ts: int) -> int:
+    return time.localtime(ts).tm_gmtoff
+
+
+def local_utc_offsets(timestamps: np.ndarray) -> np.ndarray:
+    """
+    Local UTC offset in seconds for every timestamp.
+
+    Offsets are probed at most every _OFFSET_PROBE seconds and DST switches
+    located by bisection, so the cost does not depend on the number of rows.
+    """
+    offsets = np.empty(len(timestamps), dtype=np.int64)
+    if not len(timestamps):
+        return offsets
+
+    # Sorted epoch seconds where the offset changes, with the offset after it
+    switches = []
+    lo = int(timestamps[0])
+    lo_offset = _utc_offset(lo)
+    first_offset = lo_offset
+    last = int(timestamps[-1])
+    while lo < last:
+        hi = min(lo + _OFFSET_PROBE, last)
+        hi_offset = _utc_offset(hi)
+        if hi_offset != lo_offset:
+            a, b = lo, hi
+            while b - a > 1:
+                mid = (a + b) // 2
+                if _utc_offset(mid) == lo_offset:
+                    a = mid
+                else:
+                    b = mid
+            switches.append((b, hi_offset))
+        lo, lo_offset = hi, hi_offset
+
+    offsets[:] = first_offset
+    for switch_ts, offset in switches:
+        offsets[np.searchsorted(timestamps, switch_ts):] = offset
+    return offsets
+
+
+def to_local_datetime64(timestamps: np.ndarray) -> np.ndarray:
+    """Epoch seconds to naive local datetime64[s] without per-row Python objects."""
+    timestamps = np.asarray(timestamps, dtype=np.int64)
+    return (timestamps + local_utc_offsets(timestamps)).astype('datetime64[s]')
+
+
+def bucket_starts(timestamps: np.ndarray, step: int) -> np.ndarray:
+    """
+    Start of the step-sized bucket of every timestamp (epoch seconds, ascending).
+
+    Buckets shorter than a day are aligned to the epoch; day buckets start
+    at local midnight, so DST days have 23 or 25 hours.
+    """
+    timestamps = np.asarray(timestamps, dtype=np.int64)
+    if step < DAY:
+        return timestamps - timestamps % step
+    local = timestamps + local_utc_offsets(timestamps)
+    midnight = local - local % DAY
+    # The offset at midnight can differ from the one later that day
+    return midnight - local_utc_offsets(midnight - local_utc_offsets(timestamps))
+
+
+def resample_prices(prices: PriceArrays, step: int, native_step: Optional[int] = None) -> PriceArrays:
+    """
+    Resample to step seconds: coarser buckets get the mean price, finer
+    ones repeat the price of the interval they fall into (forward fill).
+
+    Args:
+        prices: Prices at their native resolution
+        step: Target resolution in seconds (see RESOLUTIONS)
+        native_step: Resolution of prices, defaults to source_resolution(prices.source)
+
+    Returns:
+        Resampled PriceArrays; timestamps are the bucket starts
+    """
+    native_step = native_step or source_resolution(prices.source)
+    if step == native_step or not len(prices):
+        return prices
+    if step > native_step:
+        buckets = bucket_starts(prices.timestamps, step)
+        starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+        counts = np.diff(np.r_[starts, len(buckets)])
+        means = np.add.reduceat(prices.prices, starts) / counts
+        return PriceArrays(source=prices.source, timestamps=buckets[starts], prices=means)
+    repeat = native_step // step
+    timestamps = (prices.timestamps[:, None] + step * np.arange(repeat)).ravel()
+    return PriceArrays(source=prices.source, timestamps=timestamps,
+                       prices=np.repeat(prices.prices, repeat))
+
+
+def load_price_arrays(start_ts: int, end_ts: int, sources: Iterable[str] = ('awattar',),
+                      engine: Optional[Engine] = None,
+                      resolution: Optional[int] = None) -> dict[str, PriceArrays]:
+    """
+    Load prices with start_timestamp in [start_ts, end_ts] as NumPy arrays.
+
+    Rows are read through a raw DB-API cursor straight into a structured
+    array, bypassing the ORM identity map and per-row datetime objects.
+    Months archived to Parquet (see db.operations.archive) are merged in;
+    where both tiers hold a slot, the SQLite row wins.
+
+    Args:
+        start_ts: First start_timestamp to include (epoch seconds)
+        end_ts: Last start_timestamp to include (epoch seconds)
+        sources: Sources to load
+        engine: Engine to read from, defaults to the shared engine
+        resolution: Resample every source to this many seconds (see
+            resample_prices); None keeps each source's own resolution
+
+    Returns:
+        Dictionary of PriceArrays per source, empty arrays if there is no data
+    """
+    engine = engine or get_db_engine()
+    directory = archive_dir(engine)
+    result = {}
+    connection = engine.raw_connection()
+    try:
+        cursor = connection.cursor()
+        for source in sources:
+            cursor.execute(
+                "SELECT start_timestamp, price FROM spot_prices "
+                "WHERE source = ? AND start_timestamp >= ? AND start_timestamp <= ? "
+                "ORDER BY start_timestamp",
+                (source, int(start_ts), int(end_ts)))
+            rows = np.fromiter(cursor, dtype=ROW_DTYPE)
+            timestamps = np.ascontiguousarray(rows['start_timestamp'])
+            values = np.ascontiguousarray(rows['price'])
+            timestamps, values = merge_tiers(read_archive(directory, source, start_ts, end_ts),
+                                             (timestamps, values))
+            prices = PriceArrays(source=source, timestamps=timestamps, prices=values)
+            result[source] = prices if resolution is None else resample_prices(prices, resolution)
+        cursor.close()
+    finally:
+        connection.close()
+    return result
+
+
+def load_prices(start_ts: int, end_ts: int, source: str = 'awattar',
+                engine: Optional[Engine] = None, resolution: Optional[int] = None) -> PriceArrays:
+    """Single-source shortcut for load_price_arrays."""
+    return load_price_arrays(start_ts, end_ts, (source,), engine, resolution)[source]
+
+
+def load_price_frame(start_ts: int, end_ts: int, source: str = 'awattar',
+                     engine: Optional[Engine] = None):
+    """Prices of one source as a DataFrame indexed by local time."""
+    return load_prices(start_ts, end_ts, source, engine).to_frame()
@@ -0,0 +1,174 @@
+# db/operations/price_buffer.py
+# Process-resident prices of the last few days and tomorrow, so the
+# frequent "now", "today" and "cheapest hours" requests never touch SQLite.
+import os
+import threading
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Dict, Iterable, Optional
+import numpy as np
+from sqlalchemy.engine import Engine
+from config import CONFIG
+from utils.load_optimizer import PriceSeries, Schedule
+from .price_arrays import PriceArrays, load_price_arrays
+from .sources import source_resolution
+
+
+class UnknownSourceError(Exception):
+    """Requested source is not held by the PriceBuffer."""
+
+
+def notify_path(engine: Optional[Engine] = None) -> Optional[Path]:
+    """
+    Notify file next to the database behind engine (default: the configured
+    database), None for in-memory databases, which no other process reads.
+    """
+    name = CONFIG.get('price_notify_file', 'prices.updated')
+    if engine is None:
+        return CONFIG['db_path'] / name
+    database = engine.engine.url.database
+    if not database or database == ':memory:':
+        return None
+    return Path(database).resolve().parent / name
+
+
+def notify_prices_changed(path: Optional[Path] = None):
+    """Tell running PriceBuffers that spot_prices changed (touches the notify file)."""
+    path = Path(path or notify_path())
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.touch()
+    # touch keeps a coarse mtime on some filesystems; set it explicitly
+    os.utime(path)
+
+
+def _midnight(day: date) -> int:
+    return int(datetime.combine(day, datetime.min.time()).timestamp())
+
+
+@dataclass
+class Slot:
+    start_timestamp: int
+    end_timestamp: int
+    price: float
+
+
+@dataclass
+class _Snapshot:
+    today: date
+    signature: Optional[tuple]
+    prices: Dict[str, PriceArrays]
+    steps: Dict[str, int]
+    series: Dict[str, PriceSeries]
+
+
+class PriceBuffer:
+    """
+    Prices of the last `days` days (including today) and tomorrow per source.
+
+    The window is loaded in one query per source and replaced as a whole
+    when the notify file changes or the local day rolls over; requests only
+    stat() the notify file. Readers always see a complete snapshot.
+    """
+
+    def __init__(self, sources: Iterable[str] = ('awattar', 'smartenergy'), days: int = 2,
+                 engine: Optional[Engine] = None, notify_file: Optional[Path] = None):
+        self.sources = tuple(sources)
+        self.days = days
+        self.engine = engine
+        self.notify_file = notify_file
+        self.loads = 0
+        self._snapshot: Optional[_Snapshot] = None
+        self._lock = threading.Lock()
+
+    def _signature(self) -> Optional[tuple]:
+        path = self.notify_file or notify_path(self.engine)
+        if path is None:
+            return None
+        try:
+            st = Path(path).stat()
+        except FileNotFoundError:
+            return None
+        return (st.st_mtime_ns, st.st_size)
+
+    def load(self) -> None:
+        """(Re)load the window from the database."""
+        today = datetime.now().date()
+        signature = self._signature()
+        start = _midnight(today - timedelta(days=self.days - 1))
+        end = _midnight(today + timedelta(days=2)) - 1
+        prices = load_price_arrays(start, end, self.sources, self.engine)
+        steps = {source: source_resolution(source) for source in prices}
+        series = {source: PriceSeries(arrays.timestamps, arrays.prices, steps[source])
+                  for source, arrays in prices.items()}
+        self._snapshot = _Snapshot(today=today, signature=signature, prices=prices,
+                                   steps=steps, series=series)
+        self.loads += 1
+
+    def snapshot(self) -> _Snapshot:
+        snapshot = self._snapshot
+        if (snapshot is None or snapshot.today != datetime.now().date()
+                or snapshot.signature != self._signature()):
+            with self._lock:
+                # Another thread may have reloaded while we waited
+                snapshot = self._snapshot
+                if (snapshot is None or snapshot.today != datetime.now().date()
+                        or snapshot.signature != self._signature()):
+                    self.load()
+                snapshot = self._snapshot
+        return snapshot
+
+    @staticmethod
+    def _arrays(snapshot: _Snapshot, source: str) -> PriceArrays:
+        if source not in snapshot.prices:
+            raise UnknownSourceError(f"Source {source} is not buffered")
+        return snapshot.prices[source]
+
+    def prices(self, source: str) -> PriceArrays:
+        return self._arrays(self.snapshot(), source)
+
+    def current_price(self, source: str, now: Optional[datetime] = None) -> Optional[Slot]:
+        """Slot containing now, or None if its price is not known."""
+        snapshot = self.snapshot()
+        prices = self._arrays(snapshot, source)
+        ts = int((now or datetime.now()).timestamp())
+        i = int(np.searchsorted(prices.timestamps, ts, side='right')) - 1
+        step = snapshot.steps[source]
+        if i < 0 or ts >= prices.timestamps[i] + step:
+            return None
+        start = int(prices.timestamps[i])
+        return Slot(start_timestamp=start, end_timestamp=start + step, price=float(prices.prices[i]))
+
+    def day_curve(self, source: str, day: Optional[date] = None) -> PriceArrays:
+        """Prices of one buffered local day (default today)."""
+        prices = self.prices(source)
+        day = day or datetime.now().date()
+        lo, hi = np.searchsorted(prices.timestamps,
+                                 [_midnight(day), _midnight(day + timedelta(days=1))])
+        return PriceArrays(source=source, timestamps=prices.timestamps[lo:hi],
+                           prices=prices.prices[lo:hi])
+
+    def series(self, source: str, now: Optional[datetime] = None) -> tuple[PriceSeries, int]:
+        """
+        Optimizer view of the buffered prices of source and the start of the
+        current slot, the earliest time a load can be scheduled.
+        """
+        snapshot = self.snapshot()
+        prices = self._arrays(snapshot, source)
+        ts = int((now or datetime.now()).timestamp())
+        i = int(np.searchsorted(prices.timestamps, ts, side='right')) - 1
+        earliest = int(prices.timestamps[i]) if i >= 0 else ts
+        return snapshot.series[source], earliest
+
+    def cheapest_window(self, source: str, hours: float,
+                        now: Optional[datetime] = None) -> Optional[Schedule]:
+        """
+        Cheapest contiguous window of the given length starting at or after
+        the current slot, within the buffered prices.
+
+        Returns:
+            Schedule of the window, None if no gap-free window of that
+            length is left
+        """
+        series, earliest = self.series(source, now)
+        return series.cheapest_window(hours, earliest=earliest)
@@ -0,0 +1,10 @@
+# db/operations/sources.py
+from config import SOURCE_CONFIG
+
+# Interval length of sources missing from SOURCE_CONFIG
+DEFAULT_RESOLUTION = 3600
+
+
+def source_resolution(source: str) -> int:
+    """Length in seconds of one price interval of source."""
+    return SOURCE_CONFIG.get(source, {}).get('resolution', DEFAULT_RESOLUTION)
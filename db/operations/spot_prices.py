@@ -1,31 +1,144 @@
 # db/operations/spot_prices.py
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+from sqlalchemy import select
+from sqlalchemy.dialects.sqlite import insert
 from sqlalchemy.orm import Session
 from datetime import datetime
 from ..models.spot_prices import SpotPrice
+from .archive import ARCHIVE_COLUMNS, archive_dir, archived_sources, read_archive
+from .coverage import add_coverage, ensure_coverage
+from .daily_stats import refresh_daily_stats
+from .price_buffer import notify_path, notify_prices_changed
+from .sources import source_resolution
 from api.models import PriceData
 
-def save_prices(session: Session, prices: list[PriceData], source: str, unit: str):
+# SQLite caps bound parameters per statement (32766 on current builds,
+# 999 on old ones); 5 columns * 150 rows stays below the old limit.
+UPSERT_CHUNK_SIZE = 150
+
+
+@dataclass
+class UpsertResult:
+    inserted: int = 0
+    updated: int = 0
+
+    @property
+    def total(self) -> int:
+        return self.inserted + self.updated
+
+
+def bulk_upsert_prices(session: Session, prices: list[PriceData], source: str, unit: str,
+                       chunk_size: int = UPSERT_CHUNK_SIZE, commit: bool = True,
+                       resolution: Optional[int] = None, notify_file: Optional[Path] = None) -> UpsertResult:
+    """
+    Writes prices with one INSERT ... ON CONFLICT DO UPDATE statement per chunk.
+
+    All chunks run in the session's current transaction, which is committed
+    once at the end unless commit is False.
+
+    Args:
+        session: SQLAlchemy session
+        prices: Prices to store, duplicates within the list are collapsed (last wins)
+        source: Source name stored with every row
+        unit: Unit stored with every row
+        chunk_size: Number of rows per statement
+        commit: Whether to commit the transaction when done. A commit that
+            changed rows notifies running PriceBuffers.
+        resolution: Interval length in seconds, defaults to source_resolution(source)
+        notify_file: Notify file to touch, defaults to notify_path() of the
+            session's database; in-memory databases notify nobody
+
+    Returns:
+        UpsertResult with the number of inserted and updated rows
+    """
+    resolution = resolution or source_resolution(source)
+    rows = {}
     for price in prices:
-        spot_price = SpotPrice(
-            start_timestamp=int(price.timestamp.timestamp()),
-            end_timestamp=int(price.timestamp.timestamp()) + 3600,
-            price=price.price,
-            unit=unit,
-            source=source
+        start_ts = int(price.timestamp.timestamp())
+        rows[start_ts] = {
+            'start_timestamp': start_ts,
+            'end_timestamp': start_ts + resolution,
+            'price': price.price,
+            'unit': unit,
+            'source': source
+        }
+
+    ensure_coverage(session, source)
+    result = UpsertResult()
+    values = [rows[ts] for ts in sorted(rows)]
+    # Slots of archived months are corrections, not new rows. The archive
+    # is read once for the whole input, not per chunk.
+    archived = set()
+    if values:
+        archived = set(read_archive(archive_dir(session.get_bind()), source, values[0]['start_timestamp'],
+                                    values[-1]['start_timestamp'], columns=('start_timestamp',),
+                                    strict=True)[0].tolist())
+    for i in range(0, len(values), chunk_size):
+        chunk = values[i:i + chunk_size]
+        existing = session.execute(
+            select(SpotPrice.start_timestamp).where(
+                SpotPrice.source == source,
+                SpotPrice.start_timestamp.between(
+                    chunk[0]['start_timestamp'], chunk[-1]['start_timestamp'])
+            )
+        ).scalars().all()
+        existing = set(existing)
+        updated = sum(1 for row in chunk
+                      if row['start_timestamp'] in existing or row['start_timestamp'] in archived)
+
+        stmt = insert(SpotPrice).values(chunk)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[SpotPrice.start_timestamp, SpotPrice.source],
+            set_={
+                'end_timestamp': stmt.excluded.end_timestamp,
+                'price': stmt.excluded.price,
+                'unit': stmt.excluded.unit,
+            }
         )
-        session.merge(spot_price)
-    session.commit()
+        session.execute(stmt)
+        result.updated += updated
+        result.inserted += len(chunk) - updated
+
+    add_coverage(session, source, ((row['start_timestamp'], row['end_timestamp']) for row in values))
+    refresh_daily_stats(session, source, {datetime.fromtimestamp(ts).date() for ts in rows})
+
+    if commit:
+        session.commit()
+        notify_file = notify_file or notify_path(session.get_bind())
+        if result.total and notify_file is not None:
+            notify_prices_changed(notify_file)
+    return result
+
+
+def save_prices(session: Session, prices: list[PriceData], source: str, unit: str) -> UpsertResult:
+    return bulk_upsert_prices(session, prices, source, unit)
 
-def get_day_prices(session: Session, day: datetime, source: str = None):
+def get_day_prices(session: Session, day: datetime, source: str = None) -> list[SpotPrice]:
+    """
+    Prices of the local day of day, ordered by source and start_timestamp.
+
+    Months archived to Parquet (see db.operations.archive) are merged in,
+    as transient SpotPrice objects; where both tiers hold a slot, the
+    SQLite row wins.
+    """
     start = int(day.replace(hour=0, minute=0, second=0).timestamp())
     end = int(day.replace(hour=23, minute=59, second=59).timestamp())
-    
+
     query = session.query(SpotPrice).filter(
         SpotPrice.start_timestamp >= start,
         SpotPrice.start_timestamp <= end
     )
-    
+
     if source:
         query = query.filter(SpotPrice.source == source)
-        
-    return query.all()
\ No newline at end of file
+
+    rows = {(row.source, row.start_timestamp): row for row in query}
+    directory = archive_dir(session.get_bind())
+    for name in [source] if source else archived_sources(directory):
+        archived = read_archive(directory, name, start, end, columns=ARCHIVE_COLUMNS, strict=True)
+        for start_ts, end_ts, price, unit in zip(*(column.tolist() for column in archived)):
+            rows.setdefault((name, start_ts), SpotPrice(
+                start_timestamp=start_ts, source=name, end_timestamp=end_ts, price=price, unit=unit))
+    return [rows[key] for key in sorted(rows)]
@@ -1,17 +1,19 @@
 from datetime import datetime, timedelta
 from typing import List, Tuple, Optional
-from sqlalchemy import select, text
 from sqlalchemy.orm import Session
-from ..models.spot_prices import SpotPrice
+from .coverage import covered_intervals, group_date_ranges, missing_days
+from .sources import source_resolution
+from .spot_prices import bulk_upsert_prices
 from api.awattar.client import Client
 
-def find_missing_dates(session: Session) -> List[datetime.date]:
+def find_missing_dates(session: Session, source: str = 'awattar') -> List[datetime.date]:
     """
     Find dates with missing data from last 30 days until end of today or tomorrow.
     If current time is after 14:00, include tomorrow's data.
     
     Args:
         session: SQLAlchemy session
+        source: Price source to check (default: 'awattar')
 
     Returns:
         List of dates with missing data
@@ -24,32 +26,10 @@ def find_missing_dates(session: Session) -> List[datetime.date]:
     if now.hour >= 14:
         end_date = (now + timedelta(days=1)).date()
 
-    stmt = text("""
-        SELECT DISTINCT date(datetime(start_timestamp, 'unixepoch')) 
-        FROM spot_prices 
-        WHERE source='awattar' 
-        AND start_timestamp >= :start_ts
-        AND start_timestamp <= :end_ts
-        ORDER BY start_timestamp
-    """)
-    
-    start_ts = int(datetime.combine(start_date, datetime.min.time()).timestamp())
-    end_ts = int(datetime.combine(end_date, datetime.max.time()).timestamp())
-    
-    dates = [row[0] for row in session.execute(stmt, {'start_ts': start_ts, 'end_ts': end_ts})]
-    
-    date_set = set(dates)
-    missing_dates = set()
-    
-    current = start_date
-    while current <= end_date:
-        if current.strftime('%Y-%m-%d') not in date_set:
-            missing_dates.add(current)
-        current += timedelta(days=1)
-    
-    return sorted(missing_dates)
+    return missing_days(session, source, start_date, end_date)
 
-def find_gaps(session: Session, start_date: datetime, end_date: datetime) -> List[Tuple[datetime, datetime]]:
+def find_gaps(session: Session, start_date: datetime, end_date: datetime,
+              source: str = 'awattar') -> List[Tuple[datetime, datetime]]:
     """
     Find time periods without data within the specified date range.
     
@@ -57,33 +37,40 @@ def find_gaps(session: Session, start_date: datetime, end_date: datetime) -> Lis
         session: SQLAlchemy session
         start_date: Start of the period to check
         end_date: End of the period to check
+        source: Price source to check (default: 'awattar')
 
     Returns:
         List of (start, end) tuples representing gaps
     """
-    timestamps = session.query(SpotPrice.start_timestamp)\
-        .filter(SpotPrice.source == 'awattar')\
-        .filter(SpotPrice.start_timestamp.between(
-            int(start_date.timestamp()),
-            int(end_date.timestamp())))\
-        .order_by(SpotPrice.start_timestamp).all()
-    
-    if not timestamps:
+    step = source_resolution(source)
+    start_ts = start_date.timestamp()
+    end_ts = end_date.timestamp()
+
+    # First and last price start of every covered run inside the period
+    runs = []
+    for run_start, run_end in covered_intervals(session, source, int(start_ts), int(end_ts)):
+        first = run_start
+        if first < start_ts:
+            first += -(-(int(start_ts) - run_start) // step) * step
+        last = run_end - step
+        if last > end_ts:
+            last = run_start + (int(end_ts) - run_start) // step * step
+        if first <= last:
+            runs.append((first, last))
+
+    if not runs:
         return [(start_date, end_date)]
-    
+
     gaps = []
-    timestamps = [datetime.fromtimestamp(t[0]) for t in timestamps]
-    
-    if timestamps[0] - start_date > timedelta(hours=1):
-        gaps.append((start_date, timestamps[0]))
-    
-    for i in range(len(timestamps)-1):
-        if timestamps[i+1] - timestamps[i] > timedelta(hours=1):
-            gaps.append((timestamps[i], timestamps[i+1]))
-    
-    if end_date - timestamps[-1] > timedelta(hours=1):
-        gaps.append((timestamps[-1], end_date))
-    
+    if runs[0][0] - start_ts > step:
+        gaps.append((start_date, datetime.fromtimestamp(runs[0][0])))
+
+    for (_, last), (first, _) in zip(runs, runs[1:]):
+        gaps.append((datetime.fromtimestamp(last), datetime.fromtimestamp(first)))
+
+    if end_ts - runs[-1][1] > step:
+        gaps.append((datetime.fromtimestamp(runs[-1][1]), end_date))
+
     return gaps
 
 def update_db(session: Session, days_back: Optional[int] = 30) -> int:
@@ -100,60 +87,44 @@ def update_db(session: Session, days_back: Optional[int] = 30) -> int:
     client = Client()
     total_prices = 0
     
-    # First check for completely missing dates
+    # First check for completely missing dates, one request per contiguous run
     missing_dates = find_missing_dates(session)
-    for date in missing_dates:
-        prices = client.fetch_day_prices(date)
+    for range_start, range_end in group_date_ranges(missing_dates):
+        prices = client.fetch_range_prices(range_start, range_end)
         if prices:
-            for price in prices:
-                spot_price = SpotPrice(
-                    start_timestamp=int(price.timestamp.timestamp()),
-                    end_timestamp=int(price.timestamp.timestamp()) + 3600,
-                    price=price.price,
-                    unit='ct/kWh',
-                    source='awattar'
-                )
-                session.merge(spot_price)
-                total_prices += 1
-            print(f"Added data for {date}: {len(prices)} prices")
-            session.commit()
+            result = bulk_upsert_prices(session, prices, client.source, client.unit)
+            total_prices += result.total
+            print(f"Added data for {range_start} - {range_end}: "
+                  f"{result.inserted} new, {result.updated} updated")
     
     # Then check for gaps in recent data
     end_date = datetime.now()
     start_date = end_date - timedelta(days=days_back)
     
     gaps = find_gaps(session, start_date, end_date)
+    gap_days = set()
     for gap_start, gap_end in gaps:
-        prices = client.fetch_day_prices(gap_start.date())
+        day = gap_start.date()
+        while day <= gap_end.date():
+            gap_days.add(day)
+            day += timedelta(days=1)
+
+    for range_start, range_end in group_date_ranges(gap_days):
+        prices = client.fetch_range_prices(range_start, range_end)
+        prices = [p for p in prices
+                  if any(gap_start <= p.timestamp <= gap_end for gap_start, gap_end in gaps)]
         if prices:
-            for price in prices:
-                if gap_start <= price.timestamp <= gap_end:
-                    spot_price = SpotPrice(
-                        start_timestamp=int(price.timestamp.timestamp()),
-                        end_timestamp=int(price.timestamp.timestamp()) + 3600,
-                        price=price.price,
-                        unit='ct/kWh',
-                        source='awattar'
-                    )
-                    session.merge(spot_price)
-                    total_prices += 1
-            session.commit()
+            result = bulk_upsert_prices(session, prices, client.source, client.unit)
+            total_prices += result.total
     
     return total_prices
 
 if __name__ == "__main__":
     # For direct script execution
-    from sqlalchemy import create_engine
-    from config import CONFIG
-    
-    db_file = CONFIG['db_path'] / CONFIG['db_file']
-    engine = create_engine(f'sqlite:///{db_file}')
-    
-    try:
-        db_file = CONFIG['db_path'] / CONFIG['db_file']
-        engine = create_engine(f'sqlite:///{db_file}')
+    from db.database import session_scope
 
-        with Session(engine) as session:
+    try:
+        with session_scope() as session:
             missing_dates = find_missing_dates(session)
             if not missing_dates:
                 print("No missing data found")
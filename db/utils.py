@@ -1,11 +1,12 @@
 # db/utils.py
 
 import calendar
-from config import CONFIG
-from db.models.spot_prices import SpotPrice
-from sqlalchemy.orm import Session
-from sqlalchemy import create_engine
-from datetime import datetime, timedelta
+from db.database import session_scope
+from config import SOURCE_CONFIG
+from db.operations.coverage import coverage_bounds
+from db.operations.daily_stats import get_daily_stats
+from db.operations.sources import source_resolution
+from datetime import date, datetime, timedelta
 from dataclasses import dataclass, field
 
 
@@ -39,11 +40,9 @@ def db_stat_timerange(day: datetime = datetime.today(), days: int = 1) -> list[D
     Returns:
         list[DBStatsResult]: A list containing statistics for each source.
     """
-    db_file = CONFIG['db_path'] / CONFIG['db_file']
-    engine = create_engine(f'sqlite:///{db_file}')
     results = []
 
-    with Session(engine) as session:
+    with session_scope() as session:
         # Calculate start and end timestamps for the specified time range
         start_day = day - timedelta(days=days - 1)
         end_day = day
@@ -53,31 +52,25 @@ def db_stat_timerange(day: datetime = datetime.today(), days: int = 1) -> list[D
                      end_day.day) + timedelta(days=1)).timestamp())
 
         for source in ['awattar']:
-            prices = (session.query(SpotPrice)
-                      .filter(SpotPrice.source == source)
-                      .filter(SpotPrice.start_timestamp >= start_ts)
-                      .filter(SpotPrice.start_timestamp < end_ts)
-                      .all())
+            # One pre-aggregated row per day instead of every price
+            daily = get_daily_stats(session, source,
+                                    date(start_day.year, start_day.month, start_day.day),
+                                    date(end_day.year, end_day.month, end_day.day))
 
-            if prices:
-                min_price_with_date = min(prices, key=lambda x: x.price)
-                max_price_with_date = max(prices, key=lambda x: x.price)
-
-                min_price = (min_price_with_date.price,
-                             min_price_with_date.start_timestamp)
-                max_price = (max_price_with_date.price,
-                             max_price_with_date.start_timestamp)
-
-                avg_price = sum(p.price for p in prices) / len(prices)
+            if daily:
+                min_day = min(daily, key=lambda x: x.min_price)
+                max_day = max(daily, key=lambda x: x.max_price)
+                records = sum(d.data_points for d in daily)
+                avg_price = sum(d.avg_price * d.data_points for d in daily) / records
 
                 result = DBStatsResult(
                     source=source,
                     start_ts=start_ts,
                     end_ts=end_ts,
-                    min_price=min_price,
-                    max_price=max_price,
+                    min_price=(min_day.min_price, min_day.min_time),
+                    max_price=(max_day.max_price, max_day.max_time),
                     avg_price=avg_price,
-                    records=len(prices)
+                    records=records
                 )
                 results.append(result)
             else:
@@ -89,7 +82,8 @@ def db_stat_timerange(day: datetime = datetime.today(), days: int = 1) -> list[D
 
 def db_check(beginning: bool = True, end: bool = True) -> DBCheckResult:
     """
-    Retrieves the first and/or last timestamps from the database.
+    Retrieves the first and/or last start timestamps of the configured
+    sources, archived months included.
 
     Args:
         beginning (bool, optional): Whether to retrieve the first timestamp. Defaults to True.
@@ -98,22 +92,20 @@ def db_check(beginning: bool = True, end: bool = True) -> DBCheckResult:
     Returns:
         DBCheckResult: An object containing the first and/or last timestamps.
     """
-    db_file = CONFIG['db_path'] / CONFIG['db_file']
-    engine = create_engine(f'sqlite:///{db_file}')
     result = DBCheckResult()
 
-    with Session(engine) as session:
-        if beginning:
-            first_price = session.query(SpotPrice).order_by(
-                SpotPrice.start_timestamp).first()
-            if first_price:
-                result.beginning = datetime.fromtimestamp(
-                    first_price.start_timestamp)
-        if end:
-            last_price = session.query(SpotPrice).order_by(
-                SpotPrice.start_timestamp.desc()).first()
-            if last_price:
-                result.end = datetime.fromtimestamp(last_price.start_timestamp)
+    with session_scope() as session:
+        # Coverage spans both storage tiers, archived months included
+        bounds = {source: coverage_bounds(session, source) for source in SOURCE_CONFIG}
+    bounds = {source: b for source, b in bounds.items() if b}
+    if not bounds:
+        return result
+    if beginning:
+        result.beginning = datetime.fromtimestamp(min(b[0] for b in bounds.values()))
+    if end:
+        # Last start_timestamp: the end of its interval minus its length
+        result.end = datetime.fromtimestamp(
+            max(b[1] - source_resolution(source) for source, b in bounds.items()))
     return result
 
 
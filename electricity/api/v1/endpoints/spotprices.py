@@ -1,13 +1,45 @@
 from pathlib import Path
+import hashlib
+import io
+import json
 import re
-from fastapi import HTTPException, Query, Response
+from dataclasses import asdict
+from datetime import date, datetime, timedelta
+from typing import Literal, Optional
+import numpy as np
+from fastapi import HTTPException, Header, Query, Response
 from fastapi import APIRouter
+from db.database import session_scope
+from db.operations.daily_stats import data_version
+from db.operations.price_buffer import PriceBuffer, UnknownSourceError
+from db.operations.price_arrays import DAY, RESOLUTIONS, load_prices, resample_prices
+from db.operations.sources import source_resolution
+from utils.artifacts import CHART_RANGE, CHART_SINGLEDAY, ArtifactIndex
+from utils.chart_cache import ChartCache
+from utils.load_optimizer import ApplianceProfile
+from utils.svg_chart import ChartLayout, render_price_chart
+from ..models import OptimizeRequest
+from ..responses import compressed_response, dumps
 
 router = APIRouter(prefix="/spotprices", tags=["spotprices"])
 
 # Update with your actual chart directory
 CHART_DIR = Path(__file__).resolve().parents[4] / "data" / "charts"
 
+# On-demand renders, keyed by parameters and data version
+chart_cache = ChartCache(CHART_DIR / "cache")
+# Latest charts registered by gen_chartsvg.py
+artifact_index = ArtifactIndex()
+# Recent days and tomorrow in memory, reloaded when the ingestion job notifies
+price_buffer = PriceBuffer()
+
+
+def load_price_buffer():
+    price_buffer.load()
+
+
+router.on_startup.append(load_price_buffer)
+
 
 def find_latest_chart(chart_range: str = "singleday") -> Path:
     """
@@ -16,7 +48,6 @@ def find_latest_chart(chart_range: str = "singleday") -> Path:
     - 'range': filenames matching price_chart_YYYY-MM-DD_YYYY-MM-DD.svg
     """
     chart_dir = CHART_DIR
-    print(chart_dir)
     if chart_range == "singleday":
         pattern = re.compile(r"^price_chart_\d{4}-\d{2}-\d{2}\.svg$")
     else:  # chart_range == "range"
@@ -42,7 +73,199 @@ async def get_latest_daychart(chart_range: str = Query("singleday", alias="range
     if chart_range not in ("singleday", "range"):
         chart_range = "singleday"
 
+    kind = CHART_SINGLEDAY if chart_range == "singleday" else CHART_RANGE
+    latest = artifact_index.read(kind)
+    if latest is not None:
+        return Response(content=latest[1], media_type="image/svg+xml")
+
+    # Charts written before the artifact manifest existed
     latest_chart_path = find_latest_chart(chart_range=chart_range)
     with open(latest_chart_path, "rb") as f:
         svg_content = f.read()
     return Response(content=svg_content, media_type="image/svg+xml")
+
+
+def chart_key(source: str, start: date, end: date, minmaxdot: bool,
+              width: int, height: int, version: str) -> str:
+    params = json.dumps([source, start.isoformat(), end.isoformat(), minmaxdot, width, height, version])
+    return hashlib.sha256(params.encode()).hexdigest()[:32]
+
+
+def render_chart(source: str, start: date, end: date, minmaxdot: bool, width: int, height: int) -> bytes:
+    start_ts = int(datetime.combine(start, datetime.min.time()).timestamp())
+    end_ts = int(datetime.combine(end, datetime.max.time()).timestamp())
+    prices = load_prices(start_ts, end_ts, source)
+    if not len(prices):
+        raise HTTPException(status_code=404, detail="No data found for the specified period")
+    stream = io.StringIO()
+    render_price_chart(stream, prices.timestamps, prices.prices, minmaxdot=minmaxdot,
+                       layout=ChartLayout(width=width, height=height))
+    return stream.getvalue().encode()
+
+
+@router.get("/chart")
+def get_chart(
+    start: Optional[date] = Query(None, description="First day, defaults to today"),
+    end: Optional[date] = Query(None, description="Last day (inclusive), defaults to start + 1 day"),
+    source: str = Query("awattar"),
+    minmaxdot: bool = Query(True),
+    width: int = Query(800, ge=200, le=4000),
+    height: int = Query(400, ge=150, le=2000),
+    if_none_match: Optional[str] = Header(None),
+) -> Response:
+    """
+    Render a price chart for start..end on demand.
+
+    Renders are cached in memory and on disk under a key derived from the
+    parameters and the daily_stats of the range, so re-ingesting other days
+    does not invalidate them. The key is sent as ETag; a matching
+    If-None-Match is answered with 304 without rendering or reading the cache.
+    """
+    start = start or datetime.now().date()
+    end = end or start + timedelta(days=1)
+    if end < start:
+        raise HTTPException(status_code=400, detail="end must not be before start")
+    if (end - start).days > 366:
+        raise HTTPException(status_code=400, detail="Range is limited to one year")
+
+    with session_scope() as session:
+        version = data_version(session, source, start, end)
+    key = chart_key(source, start, end, minmaxdot, width, height, version)
+    etag = f'"{key}"'
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+
+    if if_none_match and etag in [tag.strip() for tag in if_none_match.split(",")]:
+        return Response(status_code=304, headers=headers)
+
+    content = chart_cache.get_or_render(
+        key, lambda: render_chart(source, start, end, minmaxdot, width, height))
+    return Response(content=content, media_type="image/svg+xml", headers=headers)
+
+
+def _local_midnight(ts: int, days: int = 0) -> int:
+    day = datetime.fromtimestamp(ts).date() + timedelta(days=days)
+    return int(datetime.combine(day, datetime.min.time()).timestamp())
+
+
+def _page_end(cursor: int, step: int, limit: int) -> int:
+    """Exclusive end of a page of limit buckets starting at cursor."""
+    if step >= DAY:
+        return _local_midnight(cursor, limit)
+    return cursor + limit * step
+
+
+@router.get("/prices")
+def get_prices(
+    start: Optional[date] = Query(None, description="First day, defaults to today"),
+    end: Optional[date] = Query(None, description="Last day (inclusive), defaults to start"),
+    source: str = Query("awattar"),
+    resolution: Literal["15m", "1h", "1d"] = Query("1h"),
+    format: Literal["columnar", "records"] = Query("columnar"),
+    limit: int = Query(5000, ge=1, le=50000, description="Buckets per page"),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page"),
+    accept_encoding: Optional[str] = Header(None),
+) -> Response:
+    """
+    Spot prices of start..end, resampled to resolution.
+
+    Coarser resolutions average the stored prices per bucket (days run
+    from local midnight), finer ones repeat the stored price. The default
+    columnar format returns parallel arrays of epoch seconds and prices;
+    records returns one object per bucket. Pages hold at most limit
+    buckets; pass next_cursor back to get the following page.
+    """
+    start = start or datetime.now().date()
+    end = end or start
+    if end < start:
+        raise HTTPException(status_code=400, detail="end must not be before start")
+
+    step = RESOLUTIONS[resolution]
+    range_start = int(datetime.combine(start, datetime.min.time()).timestamp())
+    range_end = _local_midnight(range_start, (end - start).days + 1)
+    page_start = range_start
+    if cursor is not None:
+        try:
+            page_start = int(cursor)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        if not range_start <= page_start < range_end:
+            raise HTTPException(status_code=400, detail="Cursor outside of the requested range")
+
+    page_end = min(_page_end(page_start, step, limit), range_end)
+    # Start one native interval early so a stored interval that began
+    # before a mid-interval cursor still fills the start of the page
+    native = source_resolution(source)
+    prices = resample_prices(load_prices(page_start - native + 1, page_end - 1, source), step, native)
+    inside = (prices.timestamps >= page_start) & (prices.timestamps < page_end)
+    timestamps, values = prices.timestamps[inside], np.round(prices.prices[inside], 4)
+    next_cursor = str(page_end) if page_end < range_end else None
+
+    if format == "columnar":
+        payload = {"source": source, "resolution": resolution,
+                   "timestamps": timestamps, "prices": values, "next_cursor": next_cursor}
+    else:
+        times = [datetime.fromtimestamp(ts).isoformat() for ts in timestamps.tolist()]
+        payload = {"source": source, "resolution": resolution,
+                   "prices": [{"timestamp": t, "price": p} for t, p in zip(times, values.tolist())],
+                   "next_cursor": next_cursor}
+    return compressed_response(dumps(payload), accept_encoding)
+
+
+def _buffered(fn, *args):
+    # Callers are plain def handlers: FastAPI runs them in its threadpool, so
+    # a PriceBuffer reload from SQLite does not block the event loop.
+    try:
+        return fn(*args)
+    except UnknownSourceError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+
+@router.get("/now")
+def get_current_price(source: str = Query("awattar")) -> dict:
+    """Price of the current slot, served from the in-memory PriceBuffer."""
+    slot = _buffered(price_buffer.current_price, source)
+    if slot is None:
+        raise HTTPException(status_code=404, detail="No price for the current time")
+    return {"source": source, **asdict(slot)}
+
+
+@router.get("/today")
+def get_day_curve(source: str = Query("awattar"),
+                  day: Literal["today", "tomorrow"] = Query("today")) -> Response:
+    """Price curve of today or tomorrow as parallel arrays, from the PriceBuffer."""
+    target = datetime.now().date() + timedelta(days=1 if day == "tomorrow" else 0)
+    prices = _buffered(price_buffer.day_curve, source, target)
+    return Response(content=dumps({"source": source, "date": target.isoformat(),
+                                   "timestamps": prices.timestamps, "prices": prices.prices}),
+                    media_type="application/json")
+
+
+@router.get("/cheapest")
+def get_cheapest_window(source: str = Query("awattar"),
+                        hours: float = Query(3, gt=0, le=24)) -> dict:
+    """Cheapest contiguous window of the given length from now on, from the PriceBuffer."""
+    window = _buffered(price_buffer.cheapest_window, source, hours)
+    if window is None:
+        raise HTTPException(status_code=404, detail="Not enough known prices for this window")
+    return {"source": source, "hours": hours, "start_timestamp": window.start_timestamp,
+            "end_timestamp": window.end_timestamp, "price": window.avg_price}
+
+
+@router.post("/optimize")
+def optimize_loads(request: OptimizeRequest) -> dict:
+    """
+    Schedule many appliance profiles at once over the known prices from
+    the current slot until the end of tomorrow (PriceBuffer).
+
+    'window' profiles get the cheapest uninterrupted run of duration_hours,
+    'slots' profiles the cheapest slots for energy_kwh at max_power_kw.
+    Profiles that cannot be scheduled are returned as null.
+    """
+    series, earliest = _buffered(price_buffer.series, request.source)
+    profiles = [ApplianceProfile(name=p.name, kind=p.kind, duration_hours=p.duration_hours,
+                                 energy_kwh=p.energy_kwh, max_power_kw=p.max_power_kw,
+                                 earliest=max(earliest, p.earliest or earliest), latest=p.latest)
+                for p in request.profiles]
+    schedules = series.optimize(profiles)
+    return {"source": request.source,
+            "schedules": [None if s is None else asdict(s) for s in schedules]}
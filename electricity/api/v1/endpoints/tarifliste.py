@@ -1,15 +1,24 @@
 # /electricity/api/v1/endpoints/tarifliste.py
 
-from fastapi import APIRouter, HTTPException, Query
-from typing import List
+from fastapi import APIRouter, Header, HTTPException, Query, Response
+from typing import List, Optional
 from pathlib import Path
+from dataclasses import dataclass, field
+from email.utils import formatdate, parsedate_to_datetime
+import hashlib
+import json
 import re
 from datetime import datetime
 
 from ..models import TarifInfo
+from utils.artifacts import ArtifactIndex, report_kind
 
 router = APIRouter(prefix="/tarifliste", tags=["tarifliste"])
 
+# Latest tariff table registered by llm_analyze.solidify_report
+REPORT_KIND = report_kind('tab.md')
+artifact_index = ArtifactIndex()
+
 
 def parse_markdown_table(content: str) -> List[TarifInfo]:
     """Parse markdown table content into TarifInfo objects."""
@@ -48,7 +57,16 @@ def parse_markdown_table(content: str) -> List[TarifInfo]:
 
 
 def get_latest_report() -> tuple[Path, datetime]:
-    """Get the path and timestamp of the latest report file."""
+    """
+    Get the path and timestamp of the latest report file.
+
+    Resolved from the artifact manifest; the report directory is only
+    scanned for reports written before the manifest existed.
+    """
+    latest = artifact_index.latest(REPORT_KIND)
+    if latest is not None:
+        return latest.path, datetime.fromtimestamp(latest.updated_at)
+
     report_pattern = re.compile(r'report_\d{8}_tab\.md$')
 
     # Get the spotprices directory path
@@ -77,48 +95,110 @@ def get_latest_report() -> tuple[Path, datetime]:
     return latest_report, modified_time
 
 
+@dataclass
+class ParsedReport:
+    """A parsed report with every tariff pre-serialized as a JSON fragment."""
+    key: tuple
+    last_modified: str
+    etag: str
+    fragments: List[bytes]
+    metadata: bytes
+    bodies: dict = field(default_factory=dict)
+
+    def body(self, rows: int) -> bytes:
+        body = self.bodies.get(rows)
+        if body is None:
+            body = (b'{"tariffs":[' + b','.join(self.fragments[:rows])
+                    + b'],"metadata":' + self.metadata + b'}')
+            self.bodies[rows] = body
+        return body
+
+
+# Latest parsed report; replaced when the report's (path, mtime, size) changes
+_parsed: Optional[ParsedReport] = None
+
+
+def _dumps(obj) -> bytes:
+    # Same encoding as FastAPI's JSONResponse
+    return json.dumps(obj, ensure_ascii=False, allow_nan=False, indent=None,
+                      separators=(",", ":")).encode("utf-8")
+
+
+def load_parsed_report() -> ParsedReport:
+    """Parsed latest report, re-read only when the file's path, mtime or size changed."""
+    global _parsed
+    report_file, modified_time = get_latest_report()
+    st = report_file.stat()
+    key = (str(report_file), st.st_mtime_ns, st.st_size)
+    parsed = _parsed
+    if parsed is not None and parsed.key == key:
+        return parsed
+
+    # Extract date from filename (format: report_YYYYMMDD_tab.md)
+    date_match = re.search(r'report_(\d{4})(\d{2})(\d{2})_tab\.md$', report_file.name)
+    report_date = None
+    if date_match:
+        year, month, day = date_match.groups()
+        report_date = f"{year}-{month}-{day}"
+
+    with open(report_file, 'r', encoding='utf-8') as f:
+        content = f.read()
+    tarife = parse_markdown_table(content)
+
+    parsed = ParsedReport(
+        key=key,
+        last_modified=formatdate(st.st_mtime, usegmt=True),
+        etag=hashlib.sha1(repr(key).encode()).hexdigest()[:20],
+        fragments=[_dumps(t.model_dump()) for t in tarife],
+        metadata=_dumps({"report_date": report_date,
+                         "last_modified": modified_time.isoformat()}),
+    )
+    _parsed = parsed
+    return parsed
+
+
+def _not_modified(parsed: ParsedReport, etag: str, if_none_match: Optional[str],
+                  if_modified_since: Optional[str]) -> bool:
+    if if_none_match is not None:
+        return etag in [tag.strip() for tag in if_none_match.split(",")] or if_none_match.strip() == "*"
+    if if_modified_since is not None:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        return parsedate_to_datetime(parsed.last_modified) <= since
+    return False
+
+
 @router.get("")
 async def get_tarifliste(
     rows: int = Query(default=10, ge=1, le=100),
     # Added to match WordPress expectations
-    contentformat: str = Query(default="json")
-) -> dict:
+    contentformat: str = Query(default="json"),
+    if_none_match: Optional[str] = Header(None),
+    if_modified_since: Optional[str] = Header(None),
+) -> Response:
     """
     Get list of electricity tariffs.
 
+    The parsed report and its JSON are cached until the report file
+    changes; responses carry ETag and Last-Modified and conditional
+    requests are answered with 304.
+
     Args:
         rows: Number of tariffs to return (1-100)
         contentformat: Format of the response (always json)
 
     Returns:
-        Dictionary with tariffs list and metadata
+        JSON with tariffs list and metadata
     """
     try:
-        # Get latest report file
-        report_file, modified_time = get_latest_report()
-
-        # Extract date from filename (format: report_YYYYMMDD_tab.md)
-        date_match = re.search(r'report_(\d{4})(\d{2})(\d{2})_tab\.md$', report_file.name)
-        report_date = None
-        if date_match:
-            year, month, day = date_match.groups()
-            report_date = f"{year}-{month}-{day}"
-        
-        # Read and parse report content
-        with open(report_file, 'r', encoding='utf-8') as f:
-            content = f.read()
-
-        # Parse markdown table into tariff objects
-        tarife = parse_markdown_table(content)
-
-        # Return requested number of tariffs with metadata
-        return {
-            "tariffs": tarife[:rows],
-            "metadata": {
-                "report_date": report_date,
-                "last_modified": modified_time.isoformat()
-            }
-        }
+        parsed = load_parsed_report()
+        etag = f'"{parsed.etag}-{rows}"'
+        headers = {"ETag": etag, "Last-Modified": parsed.last_modified}
+        if _not_modified(parsed, etag, if_none_match, if_modified_since):
+            return Response(status_code=304, headers=headers)
+        return Response(content=parsed.body(rows), media_type="application/json", headers=headers)
 
     except HTTPException:
         raise
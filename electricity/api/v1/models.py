@@ -1,7 +1,7 @@
 # /electricity/api/v1/models.py
 
-from pydantic import BaseModel
-from typing import List, Optional
+from pydantic import BaseModel, Field, model_validator
+from typing import List, Literal, Optional
 from datetime import datetime
 
 
@@ -17,3 +17,26 @@ class TarifInfo(BaseModel):
 class TarifListeResponse(BaseModel):
     tarife: List[TarifInfo]
     updated_at: Optional[datetime] = None
+
+
+class ApplianceProfileRequest(BaseModel):
+    name: str
+    kind: Literal["window", "slots"] = "window"
+    duration_hours: Optional[float] = Field(default=None, gt=0, le=48)
+    energy_kwh: Optional[float] = Field(default=None, gt=0)
+    max_power_kw: Optional[float] = Field(default=None, gt=0)
+    earliest: Optional[int] = None  # epoch seconds
+    latest: Optional[int] = None
+
+    @model_validator(mode="after")
+    def check_kind(self):
+        if self.kind == "window" and self.duration_hours is None:
+            raise ValueError("window profiles need duration_hours")
+        if self.kind == "slots" and (self.energy_kwh is None or self.max_power_kw is None):
+            raise ValueError("slots profiles need energy_kwh and max_power_kw")
+        return self
+
+
+class OptimizeRequest(BaseModel):
+    source: str = "awattar"
+    profiles: List[ApplianceProfileRequest] = Field(min_length=1, max_length=1000)
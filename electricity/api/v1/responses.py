@@ -0,0 +1,52 @@
+# electricity/api/v1/responses.py
+# JSON encoding and compression shared by the data endpoints.
+import gzip
+import json
+from typing import Optional
+from fastapi import Response
+
+try:
+    import orjson
+except ImportError:  # optional, ~5x faster and serializes numpy arrays directly
+    orjson = None
+
+try:
+    import brotli
+except ImportError:  # optional, gzip is used instead
+    brotli = None
+
+# Bodies smaller than this are not worth compressing
+MIN_COMPRESS_BYTES = 1024
+
+
+def dumps(obj) -> bytes:
+    """Serialize obj to compact JSON; numpy arrays are written as lists."""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(obj, separators=(",", ":"), default=_to_list).encode("utf-8")
+
+
+def _to_list(obj):
+    if hasattr(obj, "tolist"):
+        return obj.tolist()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def compressed_response(body: bytes, accept_encoding: Optional[str],
+                        media_type: str = "application/json",
+                        headers: Optional[dict] = None) -> Response:
+    """
+    Response with body compressed as brotli (if available) or gzip,
+    whichever the client accepts first in that order.
+    """
+    headers = dict(headers or {})
+    headers["Vary"] = "Accept-Encoding"
+    accepted = {part.split(";")[0].strip() for part in (accept_encoding or "").split(",")}
+    if len(body) >= MIN_COMPRESS_BYTES:
+        if brotli is not None and "br" in accepted:
+            body = brotli.compress(body, quality=5)
+            headers["Content-Encoding"] = "br"
+        elif "gzip" in accepted:
+            body = gzip.compress(body, compresslevel=6)
+            headers["Content-Encoding"] = "gzip"
+    return Response(content=body, media_type=media_type, headers=headers)
@@ -6,9 +6,9 @@ import json
 import os
 from datetime import datetime, timedelta
 from pathlib import Path
-import time
-import urllib.parse
 import re
+from utils.crawl_manifest import CrawlManifest, content_hash
+from utils.crawler import Crawler, crawl_job
 
 
 def fetch_and_convert_csv_to_dict():
@@ -65,20 +65,62 @@ def print_data_beautifully(data):
                 print("----")
 
 
-def crawl_data(data, default_crawler='w3m', n=1, fetchinterval=20, verbose=True, savetofile=True):
+def clean_crawl_text(text, energieanbieter):
+    """Normalizes crawled page text and prefixes it with the provider name."""
+    # add energieanbieter to response text
+    cleaned_text = f"Energieanbieter: {energieanbieter}\n{text}"
+
+    # Remove unwanted characters.
+    # remove multiple line breaks
+    cleaned_text = re.sub(r'[\r\n]+', '\n', cleaned_text)
+    # remove multiple spaces
+    cleaned_text = re.sub(r'\s+', ' ', cleaned_text)
+    # remove multiple --
+    cleaned_text = re.sub(r'-+', ' ', cleaned_text)
+    # remove &nbsp; (non-breaking space)
+    cleaned_text = re.sub(r'[\xa0]', ' ', cleaned_text)
+    # remove □
+    cleaned_text = re.sub(r'□', '', cleaned_text)
+    # remove multiple number of ━
+    cleaned_text = re.sub(r'━{2,}', '━', cleaned_text)
+    return cleaned_text
+
+
+def response_encoding(response):
+    """Charset from the Content-Type header, utf-8 if it does not define one."""
+    content_type = response.headers.get('Content-Type', '')
+    if 'charset' in content_type:
+        return content_type.split('charset=')[-1].strip()
+    return 'utf-8'
+
+
+def crawl_data(data, default_crawler='w3m', n=1, fetchinterval=20, verbose=True, savetofile=True,
+               max_workers=8, crawl_dir=Path("data/crawls")):
     """Fetches and saves crawl data for the first n crawlable entries using specified crawler,
-    checking file modification time for the fetch interval."""
-    crawl_dir = Path("data/crawls")
+    checking the last check time for the fetch interval.
+
+    As before, n counts successful fetches (0 = no limit): the first n due
+    entries are fetched, and for every failed one the next due entry is
+    tried in a following round.
+
+    Pages are fetched concurrently by up to max_workers threads; see utils.crawler
+    for the per-proxy and per-host politeness limits. The crawl manifest
+    (utils.crawl_manifest) supplies ETag / Last-Modified for conditional
+    requests; a page whose cleaned text hashes the same as last time is not
+    written again.
+
+    Returns:
+        List of CrawlResult, one per fetched entry, with changed set
+    """
+    crawl_dir = Path(crawl_dir)
     crawl_dir.mkdir(parents=True, exist_ok=True)
+    manifest = CrawlManifest.for_dir(crawl_dir)
 
-    crawled_count = 0
-    last_crawl_time = None  # Initialize variable to track last crawl time
+    jobs = []
+    targets = {}  # id(job) -> (energieanbieter, base_filename, filepath)
 
     for description, rows in data.items():
         for entry in rows:
-            if n > 0 and crawled_count >= n:
-                break
-
             if entry.get('crawl', False) == True or entry.get('crawl', False) == 'y':
 
                 # Use 'tool' from data or default
@@ -86,126 +128,107 @@ def crawl_data(data, default_crawler='w3m', n=1, fetchinterval=20, verbose=True,
                 crawler = entry.get('tool', default_crawler)
                 if crawler not in CRAWL_CONFIG:
                     crawler = default_crawler
-                print(f"Crawling with {crawler}...")
-                crawler_config = CRAWL_CONFIG.get(crawler, [])
-
-                if not crawler_config:
-                    print(f"No configuration found for crawler: {crawler}")
-                    continue
-
-                crawler_prefix = crawler_config[0].get('PREFIX', '')
-                crawler_bearer = crawler_config[0].get('Bearer', '')
 
                 url = entry.get("Link")
                 energieanbieter = entry.get("Anbieter", "unknown")
                 tariftype = entry.get("Typ", "unknown")
-                if url:
-                    now = datetime.now()
-                    base_filename = f"crawl_{energieanbieter}_{tariftype}"
-
-                    matching_files = list(
-                        crawl_dir.glob(f"{base_filename}*.txt"))
-                    filepath = None  # Initialize filepath here
-
-                    if matching_files:
-                        # sort the files based on modification time, latest first
-                        matching_files.sort(
-                            key=lambda f: f.stat().st_mtime, reverse=True)
-                        filepath = matching_files[0]
-
-                        timestamp_match = re.search(
-                            r'_(\d{8}_\d{6})\.txt$', filepath.name)
-                        if timestamp_match:
-                            file_timestamp_str = timestamp_match.group(1)
-                            file_timestamp = datetime.strptime(
-                                file_timestamp_str, "%Y%m%d_%H%M%S")
-                            time_diff = now - file_timestamp
-                            print(f"  File exists: {
-                                  filepath} Last modified: {time_diff}")
-                            if time_diff <= timedelta(seconds=fetchinterval):
-                                print(f"  Skipping {
-                                      url} due to fetch interval.")
-                                continue
-                            # we still need to add the timestamp
-                            timestamp = now.strftime("%Y%m%d_%H%M%S")
-                            filepath = crawl_dir / \
-                                f"{base_filename}_{timestamp}.txt"
-                        else:
-                            print(f"  No timestamp found in filename {
-                                  filepath.name}")
-                            timestamp = now.strftime("%Y%m%d_%H%M%S")
-                            filepath = crawl_dir / \
-                                f"{base_filename}_{timestamp}.txt"
+                if not url:
+                    continue
 
+                job = crawl_job(crawler, url, CRAWL_CONFIG)
+                if job is None:
+                    print(f"No configuration found for crawler: {crawler}")
+                    continue
+
+                now = datetime.now()
+                base_filename = f"crawl_{energieanbieter}_{tariftype}"
+
+                checked_at = manifest.get(base_filename).get('checked_at')
+                matching_files = list(crawl_dir.glob(f"{base_filename}*.txt"))
+                if checked_at:
+                    time_diff = now - datetime.fromtimestamp(checked_at)
+                    print(f"  Last checked: {base_filename} {time_diff} ago")
+                    if time_diff <= timedelta(seconds=fetchinterval):
+                        print(f"  Skipping {url} due to fetch interval.")
+                        continue
+                elif matching_files:
+                    # sort the files based on modification time, latest first
+                    matching_files.sort(key=lambda f: f.stat().st_mtime, reverse=True)
+                    filepath = matching_files[0]
+
+                    timestamp_match = re.search(r'_(\d{8}_\d{6})\.txt$', filepath.name)
+                    if timestamp_match:
+                        file_timestamp = datetime.strptime(timestamp_match.group(1), "%Y%m%d_%H%M%S")
+                        time_diff = now - file_timestamp
+                        print(f"  File exists: {filepath} Last modified: {time_diff}")
+                        if time_diff <= timedelta(seconds=fetchinterval):
+                            print(f"  Skipping {url} due to fetch interval.")
+                            continue
                     else:
-                        print(f"  File does not exist: {filepath}")
-                        timestamp = now.strftime("%Y%m%d_%H%M%S")
-                        filepath = crawl_dir / \
-                            f"{base_filename}_{timestamp}.txt"
-
-                    try:
-                        # Enforce wait time after last crawl
-                        if last_crawl_time:
-                            time_since_last_crawl = datetime.now() - last_crawl_time
-                            if time_since_last_crawl < timedelta(seconds=2) and crawler != 'w3m':
-                                wait_seconds = (
-                                    timedelta(seconds=2) - time_since_last_crawl).total_seconds()
-                                print(f"  Waiting {
-                                      wait_seconds:.2f} seconds before next crawl...")
-                                time.sleep(wait_seconds)
-
-                        encoded_url = urllib.parse.quote_plus(url)
-                        crawl_url = f"{crawler_prefix}{encoded_url}"
-                        headers = {}
-                        if crawler_bearer:
-                            headers['Authorization'] = f'Bearer {
-                                crawler_bearer}'
-
-                        response = requests.get(crawl_url, headers=headers)
-                        response.raise_for_status()
-
-                        # Decode content based on Content-Type header or try utf-8 if header not found or if it does not define charset
-                        if 'Content-Type' in response.headers and 'charset' in response.headers['Content-Type']:
-                            encoding = response.headers['Content-Type'].split(
-                                'charset=')[-1].strip()
-
-                        else:
-                            encoding = 'utf-8'
-
-                        cleaned_text = response.text
-                        # add energieanbieter to response text
-                        cleaned_text = f"Energieanbieter: {
-                            energieanbieter}\n{cleaned_text}"
-
-                        # ADD CLEANUP HERE
-                        # Remove unwanted characters.
-                        # remove multiple line breaks
-                        cleaned_text = re.sub(r'[\r\n]+', '\n', cleaned_text)
-                        # remove multiple spaces
-                        cleaned_text = re.sub(r'\s+', ' ', cleaned_text)
-                        # remove multiple --
-                        cleaned_text = re.sub(r'-+', ' ', cleaned_text)
-                        # remove &nbsp; (non-breaking space)
-                        cleaned_text = re.sub(r'[\xa0]', ' ', cleaned_text)
-                        # remove □
-                        cleaned_text = re.sub(r'□', '', cleaned_text)
-                        # remove multiple number of ━
-                        cleaned_text = re.sub(r'━{2,}', '━', cleaned_text)
-
-                        if verbose:
-                            print(f"Fetched data from {url}")
-                        if savetofile:
-                            with open(filepath, "w", encoding=encoding) as file:
-                                file.write(cleaned_text)
-                            print(f"Successfully crawled and saved {filepath}")
-
-                        crawled_count += 1
-                        last_crawl_time = datetime.now()  # Update last crawl time
-
-                    except requests.exceptions.RequestException as e:
-                        print(f"Error fetching URL {url}: {e}")
-                    except Exception as e:
-                        print(f"An unexpected error occurred: {e}")
+                        print(f"  No timestamp found in filename {filepath.name}")
+                else:
+                    print(f"  File does not exist: {base_filename}")
+
+                # Validators only help while the content they refer to is still on disk
+                if manifest.latest_file(base_filename, crawl_dir):
+                    job.headers = manifest.conditional_headers(base_filename, url)
+                timestamp = now.strftime("%Y%m%d_%H%M%S")
+                jobs.append(job)
+                targets[id(job)] = (energieanbieter, base_filename,
+                                    crawl_dir / f"{base_filename}_{timestamp}.txt")
+
+    def save(result):
+        url = result.job.url
+        if not result.ok:
+            print(f"Error fetching URL {url}: {result.error}")
+            return
+        energieanbieter, base_filename, filepath = targets[id(result.job)]
+        etag = result.response.headers.get('ETag')
+        last_modified = result.response.headers.get('Last-Modified')
+        try:
+            if result.not_modified:
+                result.changed = False
+                if savetofile:
+                    manifest.checked(base_filename, url, etag, last_modified)
+                print(f"  Not modified: {url}")
+                return
+            cleaned_text = clean_crawl_text(result.response.text, energieanbieter)
+            if verbose:
+                print(f"Fetched data from {url} with {result.job.crawler} in {result.seconds:.1f}s")
+            digest = content_hash(cleaned_text)
+            if (digest == manifest.get(base_filename).get('hash')
+                    and manifest.latest_file(base_filename, crawl_dir)):
+                result.changed = False
+                if savetofile:
+                    manifest.checked(base_filename, url, etag, last_modified)
+                print(f"  Unchanged: {url}")
+                return
+            result.changed = True
+            if savetofile:
+                with open(filepath, "w", encoding=response_encoding(result.response)) as file:
+                    file.write(cleaned_text)
+                result.path = filepath
+                manifest.changed(base_filename, url, digest, filepath.name, etag, last_modified)
+                print(f"Successfully crawled and saved {filepath}")
+        except Exception as e:
+            print(f"An unexpected error occurred: {e}")
+
+    crawler = Crawler(max_workers=max_workers)
+    results = []
+    pending = jobs
+    while pending:
+        wanted = len(pending) if n <= 0 else n - sum(r.ok for r in results)
+        if wanted <= 0:
+            break
+        batch, pending = pending[:wanted], pending[wanted:]
+        print(f"Crawling {len(batch)} pages with up to {max_workers} workers...")
+        results.extend(crawler.run(batch, on_result=save))
+
+    changed = [targets[id(r.job)][1] for r in results if r.changed]
+    if savetofile:
+        manifest.save()
+    print(f"Changed: {len(changed)} of {len(results)} crawled pages {changed}")
+    return results
 
 
 def cleanup(n=1):
@@ -1,28 +1,27 @@
-import requests
-import json
 from config import LLM_CONFIG, QUERY_CONFIG, PASSWORDS
 import os
+import re
 import time
+from utils.artifacts import register_artifact, report_kind
+from utils.crawl_manifest import CrawlManifest
+from utils.llm_cache import LLMResultCache
+from utils.llm_client import LLMExecutor, LLMTask
+from utils.text_chunks import count_tokens, merge_partials, split_text
 
 
-def llm_analyze(llm_model_name, query_name, context=None):
-    """
-    Sends a query to a specified LLM model and returns the response.
+_executor = None
 
-    Args:
-        llm_model_name (str): The name of the LLM model to use (e.g., 'amp1', 'openrouter_llama3.3:70b').
-        query_name (str): The name of the query to use (e.g., 'BEZUGSPREIS_ABFRAGE').
-        context (str, optional): An optional context string to add to the query. Defaults to None.
 
-    Returns:
-        str: The response from the LLM model, or None if an error occurs.
-    """
+def get_executor():
+    """Shared LLMExecutor for LLM_CONFIG, so sessions and rate limits span all calls."""
+    global _executor
+    if _executor is None:
+        _executor = LLMExecutor(LLM_CONFIG, PASSWORDS)
+    return _executor
 
-    llm_config = LLM_CONFIG.get(llm_model_name)
-    if not llm_config:
-        print(f"Error: No configuration found for LLM model: {llm_model_name}")
-        return None
 
+def build_prompt(query_name, context=None):
+    """Query text of query_name followed by context, None if the query is unknown."""
     query_config = QUERY_CONFIG.get(query_name)
     if not query_config:
         print(f"Error: No query found for query name: {query_name}")
@@ -33,133 +32,263 @@ def llm_analyze(llm_model_name, query_name, context=None):
     # Add context to the query if provided
     if context:
         query = f"{query}\n\n{context}"
+    return query
 
-    base_url = llm_config[0].get("BASEURL")
-    api_key_handle = llm_config[0].get("APIKEY")
-    api_key = PASSWORDS.get(api_key_handle)
-    if not api_key:
-        print(f"Error: No API key found for {api_key_handle}")
-        return None
-    model = llm_config[0].get("MODEL")
-
-    headers = {
-        "Content-Type": "application/json"
-    }
-
-    if 'openrouter' in llm_model_name:
-        headers['Authorization'] = f'Bearer {api_key}'
-        data = {
-            "model": model,
-            "messages": [{"role": "user", "content": query}]
-        }
-
-    elif 'amp1' in llm_model_name:
-        data = {
-            "prompt": query,
-            "model": model
-        }
-    else:  # openai fallback
-        headers['Authorization'] = f'Bearer {api_key}'
-        data = {
-            "model": model,
-            "messages": [{"role": "user", "content": query}]
-        }
-
-    try:
-        if 'openrouter' in llm_model_name:
-            response = requests.post(
-                f"{base_url}/chat/completions", headers=headers, json=data)
-        elif 'amp1' in llm_model_name:
-            response = requests.post(
-                f"{base_url}/v1/completions", headers=headers, json=data)
-        else:
-            response = requests.post(
-                f"{base_url}/chat/completions", headers=headers, json=data)
 
-        response.raise_for_status()  # Raise an exception for bad status codes
+def llm_analyze(llm_model_name, query_name, context=None):
+    """
+    Sends a query to a specified LLM model and returns the response.
 
-        if 'openrouter' in llm_model_name:
-            return response.json()['choices'][0]['message']['content']
-        elif 'amp1' in llm_model_name:
-            return response.json()['choices'][0]['text']
-        else:
-            return response.json()['choices'][0]['message']['content']
+    Args:
+        llm_model_name (str): The name of the LLM model to use (e.g., 'amp1', 'openrouter_llama3.3:70b').
+        query_name (str): The name of the query to use (e.g., 'BEZUGSPREIS_ABFRAGE').
+        context (str, optional): An optional context string to add to the query. Defaults to None.
 
-    except requests.exceptions.RequestException as e:
-        print(f"Error during request to {llm_model_name}: {e}")
+    Returns:
+        str: The response from the LLM model, or None if an error occurs.
+    """
+    query = build_prompt(query_name, context)
+    if query is None:
         return None
-    except KeyError as e:
-        print(f"Error parsing response from {llm_model_name}: {e}")
-        print(response.text)
+
+    outcome = get_executor().complete(llm_model_name, query)
+    if not outcome.ok:
+        print(f"Error during request to {llm_model_name}: {outcome.error}")
         return None
+    return outcome.result
+
+
+def analyze_contexts(llm_model, query_name, contexts, cache=None, executor=None):
+    """
+    Runs query_name on every context concurrently, reusing cached answers.
+
+    Args:
+        llm_model (str): The name of the LLM model to use.
+        query_name (str): The name of the query to use.
+        contexts (dict): Context text per caller-chosen key (str).
+        cache (LLMResultCache, optional): Answer cache; None calls the LLM for every context.
+        executor (LLMExecutor, optional): Executor to run requests on, defaults to get_executor().
+
+    Returns:
+        tuple: (answers by key, error messages by key); a key is in exactly one of them
+    """
+    prompt = build_prompt(query_name)
+    if prompt is None:
+        return {}, {key: f"No query found for query name: {query_name}" for key in contexts}
+
+    answers, cache_keys, tasks = {}, {}, []
+    for key, context in contexts.items():
+        if cache is not None:
+            cache_keys[key] = cache.key(llm_model, query_name, prompt, context)
+            cached = cache.get(cache_keys[key])
+            if cached is not None:
+                answers[key] = cached
+                continue
+        tasks.append(LLMTask(key=key, provider=llm_model, prompt=f"{prompt}\n\n{context}"))
+
+    def store(outcome):
+        key = outcome.task.key
+        if not outcome.ok:
+            print(f"Failed to get a response from {llm_model} for {key}: {outcome.error}")
+            return
+        # Print response in light grey
+        print(f"\033[37mResponse from {llm_model} for {key} ({outcome.seconds:.1f}s):\n"
+              f"{outcome.result[:2000]}\033[0m")
+        if cache is not None:
+            cache.put(cache_keys[key], outcome.result, model=llm_model, query=query_name, file=key)
+
+    failures = {}
+    if tasks:
+        print(f" {llm_model}: {len(tasks)} requests, {len(answers)} cached")
+        for outcome in (executor or get_executor()).map(tasks, on_result=store):
+            if outcome.ok:
+                answers[outcome.task.key] = outcome.result
+            else:
+                failures[outcome.task.key] = outcome.error
+    return answers, failures
+
+
+def current_crawl_files(crawl_dir='data/crawls', files='crawl_'):
+    """
+    Name of the current crawl file per target (crawl_<Anbieter>_<Typ>) in crawl_dir.
+
+    The crawl manifest names the file holding each target's current content;
+    targets it does not know fall back to the newest timestamp in the name.
+    Older versions are left out, so every provider is analyzed once.
 
+    Args:
+        crawl_dir (str): Directory of the crawl files.
+        files (str): Substring the file names must contain.
 
-def llmanalyze_files(llm_model='arli_nemo', files='crawl_', query_to_use='TARIFLISTE_ABFRAGE', maxtokens=12000):
+    Returns:
+        list: Sorted file names.
+    """
+    manifest = CrawlManifest.for_dir(crawl_dir)
+    by_target = {}
+    for f in sorted(f for f in os.listdir(crawl_dir) if files in f):
+        match = re.match(r'(crawl_[^_]+_[^_]+)_\d{8}_\d{6}\.txt$', f)
+        # timestamps sort as text, so the last one seen is the newest
+        by_target[match.group(1) if match else f] = f
+    for target in by_target:
+        latest = manifest.latest_file(target, crawl_dir)
+        if latest is not None and files in latest.name:
+            by_target[target] = latest.name
+    return sorted(by_target.values())
+
+
+def llmanalyze_files(llm_model='arli_nemo', files='crawl_', query_to_use='TARIFLISTE_ABFRAGE', maxtokens=12000,
+                     use_cache=True, cache=None, executor=None, reduce_query=None):
     """
     Processes files in the 'data/crawls' directory, sends them to the LLM for analysis,
     and saves the results to a report file.
 
+    Files longer than maxtokens are split on structural boundaries (see
+    utils.text_chunks) instead of being truncated. All chunks of all files
+    are sent concurrently within the provider's rate limit (map); the
+    answers for one file are then merged (reduce), by dropping repeated
+    lines or, with reduce_query, by another LLM call.
+
+    Only the current file of each crawl target is read (see
+    current_crawl_files). Answers are cached per (model, query, prompt +
+    context), so only crawls whose content changed since the last run cost
+    an LLM call. A file with any failed chunk is reported and left out of
+    the report without stopping the others; its successful chunks stay
+    cached for the next run. The dated report is rewritten from the cached
+    and new answers on every run.
+
     Args:
         llm_model (str): The name of the LLM model to use.
         query_to_use (str): The name of the query to use.
-        maxtokens (int, optional): The maximum number of tokens to use from a file. Defaults to 12000.
+        maxtokens (int, optional): The maximum number of tokens per request context. Defaults to 12000.
+        use_cache (bool, optional): Reuse and store answers. Defaults to True.
+        cache (LLMResultCache, optional): Cache to use, defaults to data/llm_cache.
+        executor (LLMExecutor, optional): Executor to run requests on, defaults to get_executor().
+        reduce_query (str, optional): Query merging the chunk answers of one file.
+
+    Returns:
+        str: Path of the report, or None if the query is unknown.
     """
-    flist = [f for f in os.listdir('data/crawls') if files in f]
+    flist = current_crawl_files('data/crawls', files)
     print(flist)
+    if use_cache and cache is None:
+        cache = LLMResultCache()
+    elif not use_cache:
+        cache = None
+    if build_prompt(query_to_use) is None:
+        return None
 
-    # Create or open the report file
+    contexts = {}
+    chunk_keys = {}
+    for f in flist:
+        with open(f'data/crawls/{f}', 'r', encoding='utf-8') as file:
+            example_context = file.read()
+        # stromanbieter is the second part of the filename
+        Stromanbietername = f.split('_')[1]
+        chunks = split_text(example_context, maxtokens)
+        if len(chunks) > 1:
+            print(f"{f}: {count_tokens(example_context)} tokens, split into {len(chunks)} chunks")
+            # Later chunks lose the provider line at the top of the crawl
+            chunks = [chunks[0]] + [f"Energieanbieter: {Stromanbietername} (Teil {i + 1}/{len(chunks)})\n{chunk}"
+                                    for i, chunk in enumerate(chunks) if i > 0]
+        chunk_keys[f] = [f if len(chunks) == 1 else f"{f}#{i + 1}" for i in range(len(chunks))]
+        contexts.update(zip(chunk_keys[f], chunks))
+
+    answers, chunk_failures = analyze_contexts(llm_model, query_to_use, contexts, cache, executor)
+
+    results = {}
+    reduce_contexts = {}
+    failures = {}
+    for f in flist:
+        failed = [key for key in chunk_keys[f] if key in chunk_failures]
+        if failed:
+            # A partial answer would silently miss tariff rows, so the whole file is left out
+            error = chunk_failures[failed[0]]
+            if len(chunk_keys[f]) > 1:
+                error = f"{len(failed)} of {len(chunk_keys[f])} chunks failed, first: {error}"
+            failures[f] = error
+            continue
+        partials = [answers.get(key) for key in chunk_keys[f]]
+        if not any(partials):
+            continue
+        if len(partials) == 1:
+            results[f] = partials[0]
+        elif reduce_query:
+            reduce_contexts[f] = merge_partials(partials)
+        else:
+            results[f] = merge_partials(partials)
+    if reduce_contexts:
+        reduced, reduce_failures = analyze_contexts(llm_model, reduce_query, reduce_contexts, cache, executor)
+        results.update(reduced)
+        failures.update(reduce_failures)
+
+    report = []
+    for f in flist:
+        if results.get(f):
+            Stromanbietername = f.split('_')[1]
+            report.append(f"-- Stromanbieter: {Stromanbietername}\n{results[f]}\n\n")
+
+    # Create or replace the report file
     report_file_path = f'data/crawls/report_{time.strftime("%Y%m%d")}.txt'
-    with open(report_file_path, 'a', encoding='utf-8') as report_file:
-        # Loop through the file list
-        for f in flist:
-            with open(f'data/crawls/{f}', 'r', encoding='utf-8') as file:
-                example_context = file.read()
-                tokens = round(len(example_context) / 4)
-                if tokens > maxtokens:
-                    print(f"Context is too long ({tokens} tokens). Truncated at {
-                          maxtokens} tokens.")
-                    example_context = example_context[:maxtokens * 4]
-
-                print(f' {llm_model} ({flist.index(f) + 1}/{len(flist)
-                                                            }) analyzing {f} / {tokens} tokens')
-
-                result = llm_analyze(
-                    llm_model, query_to_use, context=example_context)
-
-                if result:
-                    # Print response in light grey
-                    print(f"\033[37mResponse from {
-                          llm_model}:\n{result[:2000]}\033[0m")
-                    # Append the result to the report file
-                    # stromanbieter is the second part of the filename
-                    Stromanbietername = f.split('_')[1]
-                    report_file.write(
-                        f"-- Stromanbieter: {Stromanbietername}\n{result}\n\n")
-                    # Wait 2s
-                    time.sleep(2)
-                else:
-                    print(f"Failed to get a response from {llm_model}.")
-                    break
+    with open(report_file_path, 'w', encoding='utf-8') as report_file:
+        report_file.write(''.join(report))
+    print(f"{len(report)} results in {report_file_path}")
+    if failures:
+        print(f"Failed ({len(failures)}):")
+        for key, error in failures.items():
+            print(f"  {key}: {error}")
     return report_file_path
 
 
-def solidify_report(report_file_path='Default', query_to_use='Standard', llm_model='arli_nemo', ending='solid.txt'):
+def solidify_report(report_file_path='Default', query_to_use='Standard', llm_model='arli_nemo', ending='solid.txt',
+                    use_cache=True, cache=None, max_tokens=16000, executor=None):
     """
     Reads the content of a report file, sends it to the LLM for solidification
     using the specified query, and saves the solidified report to a new file.
 
+    A report longer than max_tokens is merged hierarchically: it is split
+    between provider sections, the parts are solidified in parallel and
+    their combined answers are solidified again until one request suffices.
+
     Args:
         report_file_path (str): The path to the report file.
         query_to_use (str): The name of the query to use for solidification.
         llm_model (str, optional): The name of the LLM model to use. Defaults to 'arli_nemo'.
+        ending (str, optional): Suffix of the output file; the file is registered
+            as the latest artifact of report_kind(ending).
+        use_cache (bool, optional): Reuse answers for unchanged inputs. Defaults to True.
+        cache (LLMResultCache, optional): Cache to use, defaults to data/llm_cache.
+        max_tokens (int, optional): The maximum number of tokens per request context. Defaults to 16000.
+        executor (LLMExecutor, optional): Executor to run requests on, defaults to get_executor().
     """
     try:
         with open(report_file_path, 'r', encoding='utf-8') as report_file:
             report_content = report_file.read()
 
         print(f"Analyzing report with {llm_model} and query: {query_to_use}")
-        solidified_result = llm_analyze(
-            llm_model, query_to_use, context=report_content)
+        if use_cache and cache is None:
+            cache = LLMResultCache()
+        elif not use_cache:
+            cache = None
+
+        name = os.path.basename(report_file_path)
+        text, level = report_content, 0
+        while True:
+            chunks = split_text(text, max_tokens)
+            keys = [name if len(chunks) == 1 else f"{name}#{level}.{i + 1}" for i in range(len(chunks))]
+            if len(chunks) > 1:
+                print(f"Level {level}: merging {len(chunks)} parts of {count_tokens(text)} tokens")
+            answers, failures = analyze_contexts(llm_model, query_to_use, dict(zip(keys, chunks)), cache, executor)
+            if failures:
+                print(f"Failed to get a solidified response from {llm_model}.")
+                return None
+            merged = '\n\n'.join(answers[key] for key in keys)
+            if len(chunks) == 1:
+                break
+            if count_tokens(merged) >= count_tokens(text):
+                print("Merged parts do not get shorter, keeping them side by side.")
+                break
+            text, level = merged, level + 1
+        solidified_result = merged
 
         if solidified_result:
             # Create solidified report file
@@ -167,6 +296,7 @@ def solidify_report(report_file_path='Default', query_to_use='Standard', llm_mod
                 0]}_{ending}'
             with open(solid_report_file_path, 'w', encoding='utf-8') as solid_report_file:
                 solid_report_file.write(solidified_result)
+            register_artifact(report_kind(ending), solid_report_file_path)
             print(f"Solidified report saved to: {solid_report_file_path}")
             return solid_report_file_path
         else:
@@ -207,10 +337,9 @@ if __name__ == '__main__':
     #    llm_model = 'amp1_gemma'
     # llm_model = 'arli_nemo'
     #    query_to_use = 'TARIFLISTE_ABFRAGE'
-    # delete files starting with report_ and not containing solid
 
+    # Reports are rewritten from cached answers, no need to delete them first
     if True:
-        del_files(contains='report_', doesnotcontain='solid')
         report_file_path = llmanalyze_files(
             llm_model='mistral_large',
             files='crawl_',
@@ -221,7 +350,6 @@ if __name__ == '__main__':
             report_file_path
         except NameError:
             report_file_path = 'data/crawls/report_20250131.txt'
-        del_files(contains='solid')
         solidify_report(
             report_file_path=report_file_path,
             query_to_use='TARIF_TABELLE',
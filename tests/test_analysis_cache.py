@@ -0,0 +1,62 @@
+import sys
+from pathlib import Path
+from datetime import datetime, timedelta
+import unittest
+import pandas as pd
+
+project_root = Path(__file__).parents[1]
+sys.path.append(str(project_root))
+
+from utils.result_cache import LRUCache
+from utils.spot_price_analyzer import SpotPriceAnalyzer
+
+def hourly_frame(start, hours, price=10.0):
+    return pd.DataFrame({'timestamp': pd.date_range(start=start, periods=hours, freq='h'),
+                         'price': [price] * hours})
+
+class TestLRUCache(unittest.TestCase):
+    def test_evicts_least_recently_used(self):
+        cache = LRUCache(max_entries=2)
+        cache.put('a', 1)
+        cache.put('b', 2)
+        cache.get('a')
+        cache.put('c', 3)
+        self.assertIn('a', cache)
+        self.assertNotIn('b', cache)
+
+    def test_byte_budget(self):
+        cache = LRUCache(max_entries=100, max_bytes=1000, sizeof=lambda v: len(v))
+        cache.put('a', 'x' * 600)
+        cache.put('b', 'x' * 600)
+        self.assertEqual(len(cache), 1)
+        self.assertLessEqual(cache.current_bytes, 1000)
+        cache.put('huge', 'x' * 5000)
+        self.assertNotIn('huge', cache)
+
+class TestAnalyzerCache(unittest.TestCase):
+    def setUp(self):
+        self.analyzer = SpotPriceAnalyzer(hourly_frame(datetime(2024, 1, 1), 24 * 60))
+
+    def test_repeated_query_hits_cache(self):
+        first = self.analyzer.average_price_analysis()
+        second = self.analyzer.average_price_analysis()
+        self.assertIs(first, second)
+        self.assertEqual(self.analyzer._cache.hits, 1)
+
+        # Same range given explicitly normalizes to the same key
+        explicit = self.analyzer.average_price_analysis(self.analyzer.data.index.min(),
+                                                        self.analyzer.data.index.max())
+        self.assertIs(explicit, first)
+
+    def test_append_invalidates(self):
+        before = self.analyzer.average_price_analysis()
+        self.assertEqual(before['all_time_average'], 10.0)
+        end = self.analyzer.data.index.max().to_pydatetime()
+        self.analyzer.append_prices(hourly_frame(end + timedelta(hours=1), 24 * 60, price=20.0))
+        after = self.analyzer.average_price_analysis()
+        self.assertEqual(self.analyzer.data_version, 1)
+        self.assertEqual(after['all_time_average'], 15.0)
+        self.assertEqual(after['last_week_average'], 20.0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,74 @@
+import sys
+from pathlib import Path
+from datetime import datetime, timedelta
+import unittest
+import numpy as np
+import pandas as pd
+
+project_root = Path(__file__).parents[1]
+sys.path.append(str(project_root))
+
+from utils.spot_price_analyzer import SpotPriceAnalyzer
+
+def reference_analysis(data, start_date, end_date):
+    """The original per-month scan, kept as the expected output."""
+    result = {
+        "all_time_average": round(data['price'].mean(), 2),
+        "selected_range_average": round(data.loc[start_date:end_date, 'price'].mean(), 2),
+        "monthly_averages": {},
+    }
+    for month in pd.date_range(end=end_date, periods=12, freq='ME'):
+        month_data = data[data.index.to_period('M') == month.to_period('M')]
+        result["monthly_averages"][month.strftime("%Y-%m")] = round(month_data['price'].mean(), 2)
+    result["last_month_average"] = round(
+        data.loc[end_date - timedelta(days=30):end_date, 'price'].mean(), 2)
+    result["last_week_average"] = round(
+        data.loc[end_date - timedelta(days=7):end_date, 'price'].mean(), 2)
+    return result
+
+class TestAnalyzerRollups(unittest.TestCase):
+    def setUp(self):
+        index = pd.date_range(start=datetime(2023, 3, 1), end=datetime(2024, 6, 30), freq='15min')
+        rng = np.random.default_rng(7)
+        prices = rng.normal(10, 5, len(index))
+        # A hole spanning a whole month and a few missing values
+        keep = ~((index >= '2023-07-01') & (index < '2023-08-01'))
+        prices[::997] = np.nan
+        self.frame = pd.DataFrame({'timestamp': index[keep], 'price': prices[keep]})
+        self.analyzer = SpotPriceAnalyzer(self.frame.copy())
+
+    def test_matches_reference(self):
+        start, end = datetime(2023, 5, 15, 13, 30), datetime(2024, 5, 31, 22, 45)
+        expected = reference_analysis(self.analyzer.data, pd.Timestamp(start), pd.Timestamp(end))
+        actual = self.analyzer.average_price_analysis(start, end)
+        for key in ('all_time_average', 'selected_range_average',
+                    'last_month_average', 'last_week_average'):
+            self.assertAlmostEqual(actual[key], expected[key], places=6, msg=key)
+        self.assertEqual(list(actual['monthly_averages']), list(expected['monthly_averages']))
+        for month, value in expected['monthly_averages'].items():
+            if np.isnan(value):
+                self.assertTrue(np.isnan(actual['monthly_averages'][month]), month)
+            else:
+                self.assertAlmostEqual(actual['monthly_averages'][month], value, places=6, msg=month)
+
+    def test_rollup_levels(self):
+        rollups = self.analyzer.rollups
+        day = rollups['day'].loc['2024-01-10']
+        raw = self.analyzer.data.loc['2024-01-10', 'price']
+        self.assertEqual(day['count'], raw.count())
+        self.assertAlmostEqual(day['mean'], raw.mean())
+        self.assertAlmostEqual(day['min'], raw.min())
+        # ISO weeks run Monday to Sunday, labelled by the Sunday
+        week = rollups['week'].loc['2024-01-14']
+        self.assertEqual(week['count'], self.analyzer.data.loc['2024-01-08':'2024-01-14', 'price'].count())
+        self.assertEqual(rollups['month'].loc[pd.Period('2023-07', 'M'), 'count'], 0)
+
+    def test_append_rebuilds_rollups(self):
+        before = self.analyzer.rollups['year']['count'].sum()
+        extra = pd.DataFrame({'timestamp': pd.date_range('2024-07-01', periods=4, freq='h'),
+                              'price': [1.0] * 4})
+        self.analyzer.append_prices(extra)
+        self.assertEqual(self.analyzer.rollups['year']['count'].sum(), before + 4)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,180 @@
+import sys
+import tempfile
+from pathlib import Path
+from datetime import date, datetime, timedelta
+import unittest
+from unittest import mock
+import numpy as np
+from sqlalchemy import create_engine, func, select, text
+from sqlalchemy.orm import Session
+
+project_root = Path(__file__).parents[1]
+sys.path.append(str(project_root))
+
+from api.models import PriceData
+from db.models.daily_stats import DailyStats
+from db.models.spot_prices import Base, SpotPrice
+from db.operations import archive
+from db.operations import coverage
+from db.operations.coverage import covered_intervals, rebuild_coverage
+from db.operations.daily_stats import get_daily_stats, rebuild_daily_stats
+from db.operations.price_arrays import load_prices
+from db.operations import spot_prices
+from db.operations.spot_prices import bulk_upsert_prices
+from db import utils
+
+def ts(day):
+    return int(datetime.combine(day, datetime.min.time()).timestamp())
+
+@unittest.skipUnless(archive.archive_available(), "pyarrow is not installed")
+class TestArchive(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.engine = create_engine(f"sqlite:///{Path(self.tmp.name) / 'test.db'}")
+        Base.metadata.create_all(self.engine)
+        self.directory = archive.archive_dir(self.engine)
+        # Hourly prices from 1 Jan to 30 Apr
+        start = datetime(2024, 1, 1)
+        prices = [PriceData(timestamp=start + timedelta(hours=h), price=float(h % 97))
+                  for h in range(24 * 121)]
+        with Session(self.engine) as session:
+            bulk_upsert_prices(session, prices, 'awattar', 'ct/kWh')
+        self.start, self.end = ts(date(2024, 1, 1)), ts(date(2024, 5, 1)) - 1
+        self.before = load_prices(self.start, self.end, engine=self.engine)
+
+    def tearDown(self):
+        self.engine.dispose()
+        self.tmp.cleanup()
+
+    def archive(self, today=date(2024, 4, 20)):
+        with Session(self.engine) as session:
+            return archive.archive_closed_months(session, ['awattar'], keep_days=60, today=today)
+
+    def sqlite_rows(self):
+        with Session(self.engine) as session:
+            return session.execute(select(func.count()).select_from(SpotPrice)).scalar()
+
+    def test_closed_months_move_to_parquet(self):
+        # 60 days before 20 Apr is 20 Feb, so January is the only closed month
+        moved = self.archive()
+        self.assertEqual(moved, {'awattar': 31 * 24})
+        self.assertEqual(archive.archived_months(self.directory, 'awattar'), [date(2024, 1, 1)])
+        self.assertEqual(self.sqlite_rows(), 24 * 121 - 31 * 24)
+        with Session(self.engine) as session:
+            self.assertEqual(session.execute(select(func.count()).select_from(DailyStats)).scalar(), 121)
+
+        after = load_prices(self.start, self.end, engine=self.engine)
+        np.testing.assert_array_equal(after.timestamps, self.before.timestamps)
+        np.testing.assert_array_equal(after.prices, self.before.prices)
+
+        # Archiving again is a no-op
+        self.assertEqual(self.archive(), {'awattar': 0})
+
+    def test_range_reads(self):
+        self.archive(today=date(2024, 6, 15))
+        self.assertEqual(len(archive.archived_months(self.directory, 'awattar')), 3)
+        # A range inside the archive, one spanning both tiers, one in SQLite only
+        for first, last in ((date(2024, 1, 10), date(2024, 2, 3)),
+                            (date(2024, 3, 25), date(2024, 4, 5)),
+                            (date(2024, 4, 10), date(2024, 4, 12))):
+            prices = load_prices(ts(first), ts(last) - 1, engine=self.engine)
+            lo, hi = np.searchsorted(self.before.timestamps, [ts(first), ts(last)])
+            np.testing.assert_array_equal(prices.timestamps, self.before.timestamps[lo:hi])
+            np.testing.assert_array_equal(prices.prices, self.before.prices[lo:hi])
+
+    def test_sqlite_wins_over_archive(self):
+        self.archive()
+        slot = datetime(2024, 1, 15, 12)
+        with Session(self.engine) as session:
+            result = bulk_upsert_prices(session, [PriceData(timestamp=slot, price=-5.0)], 'awattar', 'ct/kWh')
+        self.assertEqual((result.inserted, result.updated), (0, 1))
+        prices = load_prices(ts(date(2024, 1, 15)), ts(date(2024, 1, 16)) - 1, engine=self.engine)
+        self.assertEqual(len(prices), 24)
+        self.assertEqual(prices.prices[12], -5.0)
+
+        # The day's rollup covers the archived rows and the correction
+        with Session(self.engine) as session:
+            stats, = get_daily_stats(session, 'awattar', date(2024, 1, 15), date(2024, 1, 15))
+            self.assertEqual(stats.data_points, 24)
+            self.assertEqual(stats.min_price, -5.0)
+            self.assertEqual(stats.max_price, float(prices.prices.max()))
+            self.assertAlmostEqual(stats.avg_price, float(prices.prices.mean()))
+
+        # Re-archiving folds the correction into the existing file
+        self.assertEqual(self.archive(), {'awattar': 1})
+        prices = load_prices(ts(date(2024, 1, 15)), ts(date(2024, 1, 16)) - 1, engine=self.engine)
+        self.assertEqual(len(prices), 24)
+        self.assertEqual(prices.prices[12], -5.0)
+
+    def test_backfill_reads_archive_once(self):
+        self.archive(today=date(2024, 6, 15))
+        start = datetime(2024, 1, 1)
+        prices = [PriceData(timestamp=start + timedelta(hours=h), price=1.0) for h in range(24 * 90)]
+        with mock.patch.object(spot_prices, 'read_archive', wraps=archive.read_archive) as read:
+            with Session(self.engine) as session:
+                result = bulk_upsert_prices(session, prices, 'awattar', 'ct/kWh', chunk_size=150)
+        self.assertEqual(read.call_count, 1)
+        self.assertEqual((result.inserted, result.updated), (0, 24 * 90))
+
+    def test_rebuilds_keep_archived_history(self):
+        with Session(self.engine) as session:
+            expected_stats = [(s.date, s.data_points, s.avg_price)
+                              for s in get_daily_stats(session, 'awattar', date(2024, 1, 1), date(2024, 4, 30))]
+            expected_coverage = covered_intervals(session, 'awattar')
+        self.archive()
+        with Session(self.engine) as session:
+            rebuild_daily_stats(session, 'awattar')
+            rebuild_coverage(session, 'awattar')
+            session.commit()
+            stats = [(s.date, s.data_points, s.avg_price)
+                     for s in get_daily_stats(session, 'awattar', date(2024, 1, 1), date(2024, 4, 30))]
+            self.assertEqual(stats, expected_stats)
+            self.assertEqual(covered_intervals(session, 'awattar'), expected_coverage)
+
+    def test_readers_see_archived_days(self):
+        self.archive()
+        with Session(self.engine) as session:
+            day = spot_prices.get_day_prices(session, datetime(2024, 1, 10), 'awattar')
+            self.assertEqual(len(day), 24)
+            self.assertEqual([p.price for p in day], self.before.prices[9 * 24:10 * 24].tolist())
+            self.assertEqual(day[0].unit, 'ct/kWh')
+            self.assertEqual(len(spot_prices.get_day_prices(session, datetime(2024, 1, 10))), 24)
+            # SQLite wins over the archive
+            bulk_upsert_prices(session, [PriceData(timestamp=datetime(2024, 1, 10, 5), price=-1.0)],
+                               'awattar', 'ct/kWh')
+            self.assertEqual(spot_prices.get_day_prices(session, datetime(2024, 1, 10), 'awattar')[5].price, -1.0)
+
+        session_scope = lambda: Session(self.engine)
+        with mock.patch.object(utils, 'session_scope', session_scope):
+            check = utils.db_check()
+        self.assertEqual(check.beginning, datetime(2024, 1, 1))
+        self.assertEqual(check.end, datetime(2024, 4, 30, 23))
+
+    def test_archived_end_timestamps_are_migrated(self):
+        self.archive()
+        path = archive.month_path(self.directory, 'awattar', date(2024, 1, 1))
+        table = archive.pq.read_table(path)
+        index = table.schema.get_field_index('end_timestamp')
+        archive.pq.write_table(table.set_column(index, 'end_timestamp', archive.pa.array(
+            table['start_timestamp'].to_numpy() + 7200, archive.pa.int64())), path)
+        with Session(self.engine) as session:
+            session.execute(text("PRAGMA user_version = 0"))
+            session.commit()
+        coverage._ensured.clear()
+        with Session(self.engine) as session:
+            self.assertEqual(covered_intervals(session, 'awattar'), [(self.start, self.end + 1)])
+            session.commit()
+        starts, ends = archive.read_archive(self.directory, 'awattar', self.start, self.end,
+                                            columns=('start_timestamp', 'end_timestamp'))
+        self.assertEqual(set((ends - starts).tolist()), {3600})
+
+    def test_in_memory_database_has_no_archive(self):
+        engine = create_engine("sqlite:///:memory:")
+        self.assertIsNone(archive.archive_dir(engine))
+        Base.metadata.create_all(engine)
+        with Session(engine) as session:
+            self.assertEqual(archive.archive_closed_months(session), {})
+        engine.dispose()
+
+if __name__ == '__main__':
+    unittest.main()
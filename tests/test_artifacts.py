@@ -0,0 +1,132 @@
+import sys
+import json
+import tempfile
+import threading
+import time
+from pathlib import Path
+import unittest
+from unittest import mock
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+project_root = Path(__file__).parents[1]
+sys.path.append(str(project_root))
+
+import utils.artifacts as artifacts
+from utils.artifacts import CHART_SINGLEDAY, ArtifactIndex, register_artifact, report_kind
+from electricity.api.v1.endpoints import spotprices, tarifliste
+
+class TestArtifactIndex(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.dir = Path(self.tmp.name)
+        self.manifest = self.dir / 'artifacts.json'
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, name, content):
+        path = self.dir / 'charts' / name
+        path.parent.mkdir(exist_ok=True)
+        path.write_text(content)
+        return path
+
+    def test_register_and_resolve(self):
+        index = ArtifactIndex(self.manifest)
+        self.assertIsNone(index.latest(CHART_SINGLEDAY))
+
+        path = self.write('a.svg', '<svg>a</svg>')
+        register_artifact(CHART_SINGLEDAY, path, self.manifest, start='2025-01-01')
+        stored = json.loads(self.manifest.read_text())[CHART_SINGLEDAY]
+        self.assertEqual(stored['path'], str(Path('charts') / 'a.svg'))
+
+        artifact, content = index.read(CHART_SINGLEDAY)
+        self.assertEqual(artifact.path, path)
+        self.assertEqual(artifact.meta, {'start': '2025-01-01'})
+        self.assertEqual(content, b'<svg>a</svg>')
+
+    def test_reload_only_on_manifest_change(self):
+        index = ArtifactIndex(self.manifest)
+        register_artifact(CHART_SINGLEDAY, self.write('a.svg', 'a'), self.manifest)
+        with mock.patch.object(artifacts, '_read_manifest', wraps=artifacts._read_manifest) as read:
+            for _ in range(5):
+                index.latest(CHART_SINGLEDAY)
+            self.assertEqual(read.call_count, 1)
+            register_artifact(CHART_SINGLEDAY, self.write('b.svg', 'b'), self.manifest)
+            read.reset_mock()
+            self.assertEqual(index.read(CHART_SINGLEDAY)[1], b'b')
+            index.latest(CHART_SINGLEDAY)
+            self.assertEqual(read.call_count, 1)
+
+    def test_missing_file_is_not_latest(self):
+        index = ArtifactIndex(self.manifest)
+        path = self.write('a.svg', 'a')
+        register_artifact(CHART_SINGLEDAY, path, self.manifest)
+        path.unlink()
+        self.assertIsNone(index.latest(CHART_SINGLEDAY))
+
+    def test_lookups_trust_the_manifest(self):
+        index = ArtifactIndex(self.manifest)
+        register_artifact(CHART_SINGLEDAY, self.write('a.svg', 'a'), self.manifest)
+        index.latest(CHART_SINGLEDAY)
+        with mock.patch.object(Path, 'exists') as exists:
+            for _ in range(5):
+                self.assertIsNotNone(index.latest(CHART_SINGLEDAY))
+            exists.assert_not_called()
+
+    def test_concurrent_producers_keep_all_entries(self):
+        read = artifacts._read_manifest
+
+        def slow_read(path):
+            entries = read(path)
+            time.sleep(0.05)  # widen the window between read and replace
+            return entries
+
+        paths = [self.write(f'{i}.svg', str(i)) for i in range(6)]
+        with mock.patch.object(artifacts, '_read_manifest', side_effect=slow_read):
+            threads = [threading.Thread(target=register_artifact, args=(f'kind:{i}', p, self.manifest))
+                       for i, p in enumerate(paths)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        self.assertEqual(sorted(json.loads(self.manifest.read_text())), [f'kind:{i}' for i in range(6)])
+
+class TestEndpointsUseIndex(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.dir = Path(self.tmp.name)
+        manifest = self.dir / 'artifacts.json'
+        self.patches = [mock.patch.object(spotprices, 'artifact_index', ArtifactIndex(manifest)),
+                        mock.patch.object(tarifliste, 'artifact_index', ArtifactIndex(manifest))]
+        for patch in self.patches:
+            patch.start()
+        chart = self.dir / 'latest.svg'
+        chart.write_text('<svg>latest</svg>')
+        register_artifact(CHART_SINGLEDAY, chart, manifest)
+        report = self.dir / 'report_20250301_tab.md'
+        report.write_text('| Stromanbieter | Tarifname | Tarifart | Preisanpassung | Strompreis | Kurzbeschreibung |\n'
+                          '|---|---|---|---|---|---|\n'
+                          '| A | B | Spot | monatlich | 1 ct | kurz |\n')
+        register_artifact(report_kind('tab.md'), report, manifest)
+        app = FastAPI()
+        app.include_router(spotprices.router)
+        app.include_router(tarifliste.router)
+        self.client = TestClient(app)
+
+    def tearDown(self):
+        for patch in reversed(self.patches):
+            patch.stop()
+        self.tmp.cleanup()
+
+    def test_latest_chart(self):
+        response = self.client.get('/spotprices/chart/latest')
+        self.assertEqual(response.text, '<svg>latest</svg>')
+
+    def test_latest_report(self):
+        data = self.client.get('/tarifliste').json()
+        self.assertEqual(data['metadata']['report_date'], '2025-03-01')
+        self.assertEqual(data['tariffs'][0]['stromanbieter'], 'A')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,60 @@
+import sys
+from pathlib import Path
+from datetime import date, datetime, timedelta
+import unittest
+from unittest import mock
+
+project_root = Path(__file__).parents[1]
+sys.path.append(str(project_root))
+
+from api.awattar.client import Client
+from db.operations.update_db import group_date_ranges
+
+def fake_marketdata(url, params=None, **kwargs):
+    """Answer like the marketdata endpoint: one entry per hour in [start, end]."""
+    entries = []
+    ts = params['start']
+    while ts <= params['end']:
+        entries.append({'start_timestamp': ts, 'end_timestamp': ts + 3600000,
+                        'marketprice': 100.0, 'unit': 'Eur/MWh'})
+        ts += 3600000
+    response = mock.Mock()
+    response.json.return_value = {'object': 'list', 'data': entries}
+    return response
+
+class TestFetchRangePrices(unittest.TestCase):
+    def test_range_is_split_into_windows(self):
+        client = Client()
+        start = date(2024, 1, 1)
+        end = start + timedelta(days=299)
+        with mock.patch.object(client.session, 'get', side_effect=fake_marketdata) as get:
+            prices = client.fetch_range_prices(start, end)
+
+        self.assertEqual(get.call_count, 10)
+        timestamps = [p.timestamp for p in prices]
+        self.assertEqual(timestamps, sorted(set(timestamps)))
+        self.assertEqual(timestamps[0], datetime(2024, 1, 1))
+        self.assertEqual(timestamps[-1].date(), end)
+        self.assertEqual(prices[0].price, 10.0)
+
+    def test_day_prices_use_single_request(self):
+        client = Client()
+        with mock.patch.object(client.session, 'get', side_effect=fake_marketdata) as get:
+            prices = client.fetch_day_prices(date(2024, 6, 1))
+        self.assertEqual(get.call_count, 1)
+        self.assertEqual(len(prices), 24)
+
+class TestGroupDateRanges(unittest.TestCase):
+    def test_groups_contiguous_days(self):
+        days = [date(2024, 1, d) for d in (5, 1, 2, 3, 9, 10, 2)]
+        self.assertEqual(group_date_ranges(days), [
+            (date(2024, 1, 1), date(2024, 1, 3)),
+            (date(2024, 1, 5), date(2024, 1, 5)),
+            (date(2024, 1, 9), date(2024, 1, 10)),
+        ])
+
+    def test_empty(self):
+        self.assertEqual(group_date_ranges([]), [])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,60 @@
+import sys
+from pathlib import Path
+from datetime import datetime, timedelta
+import unittest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+project_root = Path(__file__).parents[1]
+sys.path.append(str(project_root))
+
+from api.models import PriceData
+from db.models.spot_prices import Base, SpotPrice
+from db.operations.spot_prices import bulk_upsert_prices, save_prices
+
+class TestBulkUpsert(unittest.TestCase):
+    def setUp(self):
+        self.engine = create_engine('sqlite:///:memory:')
+        Base.metadata.create_all(self.engine)
+        self.session = Session(self.engine)
+        self.day = datetime(2025, 1, 1)
+
+    def tearDown(self):
+        self.session.close()
+        Base.metadata.drop_all(self.engine)
+
+    def day_prices(self, offset=0.0):
+        return [PriceData(timestamp=self.day + timedelta(hours=h), price=h + offset)
+                for h in range(24)]
+
+    def test_insert_then_update(self):
+        result = bulk_upsert_prices(self.session, self.day_prices(), 'awattar', 'ct/kWh',
+                                    chunk_size=7)
+        self.assertEqual((result.inserted, result.updated), (24, 0))
+
+        prices = self.day_prices(offset=1.5)[:10]
+        prices.append(PriceData(timestamp=self.day + timedelta(days=1), price=99.0))
+        result = bulk_upsert_prices(self.session, prices, 'awattar', 'ct/kWh', chunk_size=7)
+        self.assertEqual((result.inserted, result.updated), (1, 10))
+
+        rows = self.session.query(SpotPrice).order_by(SpotPrice.start_timestamp).all()
+        self.assertEqual(len(rows), 25)
+        self.assertEqual(rows[3].price, 4.5)
+        self.assertEqual(rows[20].price, 20.0)
+        self.assertEqual(rows[0].end_timestamp - rows[0].start_timestamp, 3600)
+
+    def test_sources_are_separate(self):
+        save_prices(self.session, self.day_prices(), 'awattar', 'ct/kWh')
+        result = save_prices(self.session, self.day_prices(), 'smartenergy', 'ct/kWh')
+        self.assertEqual(result.inserted, 24)
+        self.assertEqual(self.session.query(SpotPrice).count(), 48)
+
+    def test_duplicates_in_batch_collapse(self):
+        prices = self.day_prices()[:2] + [PriceData(timestamp=self.day, price=7.0)]
+        result = bulk_upsert_prices(self.session, prices, 'awattar', 'ct/kWh')
+        self.assertEqual(result.total, 2)
+        row = self.session.get(SpotPrice, (int(self.day.timestamp()), 'awattar'))
+        self.assertEqual(row.price, 7.0)
+
+if __name__ == '__main__':
+    unittest.main()
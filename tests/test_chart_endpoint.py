@@ -0,0 +1,107 @@
+import sys
+import tempfile
+from pathlib import Path
+from datetime import date, datetime, timedelta
+import unittest
+from unittest import mock
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+project_root = Path(__file__).parents[1]
+sys.path.append(str(project_root))
+
+from api.models import PriceData
+from config import CONFIG
+from db.database import dispose_engines, session_scope
+from db.operations.spot_prices import bulk_upsert_prices
+from electricity.api.v1.endpoints import spotprices
+from utils.chart_cache import ChartCache
+
+DAY = date(2025, 3, 3)
+
+def day_prices(day, offset=0.0):
+    start = datetime.combine(day, datetime.min.time())
+    return [PriceData(timestamp=start + timedelta(hours=h), price=h + offset) for h in range(24)]
+
+class TestChartEndpoint(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        tmp = Path(self.tmp.name)
+        self.patches = [mock.patch.dict(CONFIG, {'db_path': tmp}),
+                        mock.patch.object(spotprices, 'chart_cache', ChartCache(tmp / 'cache'))]
+        for patch in self.patches:
+            patch.start()
+        with session_scope() as session:
+            for offset in range(3):
+                bulk_upsert_prices(session, day_prices(DAY + timedelta(days=offset)), 'awattar', 'ct/kWh')
+        app = FastAPI()
+        app.include_router(spotprices.router)
+        self.client = TestClient(app)
+
+    def tearDown(self):
+        dispose_engines()
+        for patch in reversed(self.patches):
+            patch.stop()
+        self.tmp.cleanup()
+
+    def get(self, start, end, **headers):
+        return self.client.get('/spotprices/chart', params={'start': start.isoformat(), 'end': end.isoformat()},
+                               headers=headers)
+
+    def test_render_etag_and_not_modified(self):
+        first = self.get(DAY, DAY + timedelta(days=1))
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(first.headers['content-type'], 'image/svg+xml')
+        self.assertTrue(first.content.startswith(b'<?xml'))
+        etag = first.headers['etag']
+
+        again = self.get(DAY, DAY + timedelta(days=1), **{'If-None-Match': etag})
+        self.assertEqual(again.status_code, 304)
+        self.assertEqual(again.content, b'')
+        self.assertEqual(spotprices.chart_cache.renders, 1)
+
+        # Served from the cache without rendering again
+        self.assertEqual(self.get(DAY, DAY + timedelta(days=1)).content, first.content)
+        self.assertEqual(spotprices.chart_cache.renders, 1)
+
+    def test_only_changed_ranges_are_invalidated(self):
+        both = self.get(DAY, DAY + timedelta(days=1)).headers['etag']
+        last = self.get(DAY + timedelta(days=2), DAY + timedelta(days=2)).headers['etag']
+
+        with session_scope() as session:
+            bulk_upsert_prices(session, day_prices(DAY + timedelta(days=2), offset=5), 'awattar', 'ct/kWh')
+
+        self.assertEqual(self.get(DAY, DAY + timedelta(days=1)).headers['etag'], both)
+        changed = self.get(DAY + timedelta(days=2), DAY + timedelta(days=2),
+                           **{'If-None-Match': last})
+        self.assertEqual(changed.status_code, 200)
+        self.assertNotEqual(changed.headers['etag'], last)
+
+    def test_disk_cache_survives_memory_eviction(self):
+        response = self.get(DAY, DAY)
+        spotprices.chart_cache.memory.invalidate()
+        self.assertEqual(self.get(DAY, DAY).content, response.content)
+        self.assertEqual(spotprices.chart_cache.renders, 1)
+
+    def test_no_data(self):
+        self.assertEqual(self.get(date(2020, 1, 1), date(2020, 1, 2)).status_code, 404)
+
+class TestChartCache(unittest.TestCase):
+    def test_prune_by_count_and_bytes_with_one_scan(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            directory = Path(tmp)
+            (directory / 'old.svg').write_bytes(b'x' * 10)
+            cache = ChartCache(directory, max_files=3, max_disk_bytes=40)
+            with mock.patch.object(Path, 'glob', wraps=directory.glob) as glob:
+                for key in ('a', 'b', 'c'):
+                    cache.put(key, b'y' * 10)
+                self.assertEqual(glob.call_count, 1)
+            # Count limit: the pre-existing file goes first
+            self.assertEqual(sorted(f.name for f in directory.glob('*.svg')), ['a.svg', 'b.svg', 'c.svg'])
+
+            cache.put('big', b'z' * 25)
+            self.assertEqual(sorted(f.name for f in directory.glob('*.svg')), ['big.svg', 'c.svg'])
+            self.assertEqual(cache._disk_bytes, 35)
+
+if __name__ == '__main__':
+    unittest.main()
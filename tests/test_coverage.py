@@ -0,0 +1,80 @@
+import sys
+from pathlib import Path
+from datetime import date, datetime, timedelta
+import unittest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+project_root = Path(__file__).parents[1]
+sys.path.append(str(project_root))
+
+from api.models import PriceData
+from db.models.coverage import PriceCoverage
+from db.models.spot_prices import Base, SpotPrice
+from db.operations.coverage import covered_intervals, missing_days, rebuild_coverage
+from db.operations.spot_prices import bulk_upsert_prices
+from db.operations.update_db import find_gaps
+
+def day_prices(day, hours=range(24)):
+    start = datetime.combine(day, datetime.min.time())
+    return [PriceData(timestamp=start + timedelta(hours=h), price=float(h)) for h in hours]
+
+class TestCoverage(unittest.TestCase):
+    def setUp(self):
+        self.engine = create_engine('sqlite:///:memory:')
+        Base.metadata.create_all(self.engine)
+        self.session = Session(self.engine)
+        self.day = date(2025, 3, 1)
+
+    def tearDown(self):
+        self.session.close()
+        Base.metadata.drop_all(self.engine)
+
+    def store(self, offset, hours=range(24)):
+        bulk_upsert_prices(self.session, day_prices(self.day + timedelta(days=offset), hours),
+                           'awattar', 'ct/kWh')
+
+    def test_intervals_merge_on_ingest(self):
+        self.store(0)
+        self.store(2)
+        self.assertEqual(len(covered_intervals(self.session, 'awattar')), 2)
+        self.store(1)
+        intervals = covered_intervals(self.session, 'awattar')
+        self.assertEqual(len(intervals), 1)
+        self.assertEqual(intervals[0][1] - intervals[0][0], 3 * 24 * 3600)
+
+    def test_missing_days(self):
+        for offset in (0, 1, 4, 6):
+            self.store(offset)
+        self.store(8, hours=[12])
+        missing = missing_days(self.session, 'awattar', self.day - timedelta(days=1),
+                               self.day + timedelta(days=10))
+        offsets = [(d - self.day).days for d in missing]
+        self.assertEqual(offsets, [-1, 2, 3, 5, 7, 9, 10])
+
+    def test_find_gaps_inside_day(self):
+        self.store(0, hours=[h for h in range(24) if h not in (5, 6, 7)])
+        start = datetime.combine(self.day, datetime.min.time())
+        gaps = find_gaps(self.session, start, start + timedelta(hours=23))
+        self.assertEqual(gaps, [(start + timedelta(hours=4), start + timedelta(hours=8))])
+
+    def test_rebuild_matches_incremental(self):
+        for offset in (0, 1, 3):
+            self.store(offset)
+        incremental = covered_intervals(self.session, 'awattar')
+        rebuild_coverage(self.session, 'awattar')
+        self.assertEqual(covered_intervals(self.session, 'awattar'), incremental)
+
+    def test_existing_rows_are_indexed_on_first_use(self):
+        start = int(datetime.combine(self.day, datetime.min.time()).timestamp())
+        for h in range(48):
+            self.session.add(SpotPrice(start_timestamp=start + h * 3600,
+                                       end_timestamp=start + (h + 1) * 3600,
+                                       price=1.0, unit='ct/kWh', source='awattar'))
+        self.session.commit()
+        self.assertEqual(self.session.query(PriceCoverage).count(), 0)
+        self.assertEqual(covered_intervals(self.session, 'awattar'),
+                         [(start, start + 48 * 3600)])
+
+if __name__ == '__main__':
+    unittest.main()
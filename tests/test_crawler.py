@@ -0,0 +1,185 @@
+import sys
+import tempfile
+import threading
+import time
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+import unittest
+from unittest import mock
+
+project_root = Path(__file__).parents[1]
+sys.path.append(str(project_root))
+
+import get_tarife
+from utils.crawl_manifest import CrawlManifest
+from utils.crawler import Crawler, IntervalLimiter, crawl_job
+
+DELAY = 0.3
+
+class ProxyHandler(BaseHTTPRequestHandler):
+    """
+    Stands in for a crawler proxy: /proxy?url=<page> returns the page text
+    after DELAY. Pages with 'etag' in their URL answer conditional requests.
+    """
+    requests = []
+    version = 1
+
+    def do_GET(self):
+        url = urllib.parse.parse_qs(urllib.parse.urlsplit(self.path).query)['url'][0]
+        ProxyHandler.requests.append((time.monotonic(), url, self.headers.get('Authorization'),
+                                      self.headers.get('If-None-Match')))
+        time.sleep(DELAY)
+        if 'missing' in url:
+            self.send_response(404)
+            self.end_headers()
+            return
+        etag = f'"v{ProxyHandler.version}"'
+        if 'etag' in url and self.headers.get('If-None-Match') == etag:
+            self.send_response(304)
+            self.end_headers()
+            return
+        price = 12.5 if ProxyHandler.version == 1 else 13.0
+        body = f"Tarife von {url}\r\n\r\n\r\nPreis  {price} ct/kWh ---".encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; charset=utf-8')
+        if 'etag' in url:
+            self.send_header('ETag', etag)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+class TestIntervalLimiter(unittest.TestCase):
+    def test_reserves_slots_per_key(self):
+        now = [100.0]
+        limiter = IntervalLimiter(clock=lambda: now[0])
+        self.assertEqual(limiter.reserve({'host:a': 2}), 0)
+        self.assertEqual(limiter.reserve({'host:a': 2}), 2)
+        self.assertEqual(limiter.reserve({'host:a': 2}), 4)
+        self.assertEqual(limiter.reserve({'host:b': 2}), 0)
+        now[0] = 110.0
+        self.assertEqual(limiter.reserve({'host:a': 2}), 0)
+
+    def test_mixed_proxies_and_hosts(self):
+        limiter = IntervalLimiter(clock=lambda: 0.0)
+        # busy.at is taken until t=2
+        self.assertEqual(limiter.reserve({'proxy:w3m': 0, 'host:busy.at': 2}), 0)
+        # A lynx job for the busy host waits for the host; lynx is held from then on
+        self.assertEqual(limiter.reserve({'proxy:lynx': 2, 'host:busy.at': 2}), 2)
+        # so the next lynx job for an idle host must not fire at t=2 as well
+        self.assertEqual(limiter.reserve({'proxy:lynx': 2, 'host:idle.at': 2}), 4)
+        # other proxies are not affected
+        self.assertEqual(limiter.reserve({'proxy:w3m': 0, 'host:other.at': 2}), 0)
+
+class TestCrawler(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(('127.0.0.1', 0), ProxyHandler)
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.prefix = f"http://127.0.0.1:{cls.server.server_port}/proxy?url="
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        ProxyHandler.requests = []
+        ProxyHandler.version = 1
+        self.tmp = tempfile.TemporaryDirectory()
+        self.crawl_config = {'w3m': [{"PREFIX": self.prefix, "Bearer": "secret", "min_interval": 0}]}
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_crawl_data_parallel_across_hosts(self):
+        rows = [{'crawl': 'y', 'Anbieter': f'Anbieter{i}', 'Typ': 'Bezug', 'Link': f'https://host{i}.at/tarife'}
+                for i in range(6)]
+        rows.append({'crawl': 'y', 'Anbieter': 'Kaputt', 'Typ': 'Bezug', 'Link': 'https://x.at/missing'})
+        rows.append({'crawl': 'n', 'Anbieter': 'Aus', 'Typ': 'Bezug', 'Link': 'https://y.at/'})
+        with mock.patch.dict(get_tarife.CRAWL_CONFIG, self.crawl_config, clear=True):
+            started = time.monotonic()
+            results = get_tarife.crawl_data({'sheet': rows}, n=0, verbose=False,
+                                            max_workers=8, crawl_dir=self.tmp.name)
+            elapsed = time.monotonic() - started
+
+        # Seven requests of DELAY each, run side by side
+        self.assertLess(elapsed, 4 * DELAY)
+        self.assertEqual([r.ok for r in results], [True] * 6 + [False])
+        self.assertEqual({r[2] for r in ProxyHandler.requests}, {'Bearer secret'})
+
+        files = sorted(Path(self.tmp.name).glob('crawl_*.txt'))
+        self.assertEqual(len(files), 6)
+        self.assertRegex(files[0].name, r'^crawl_Anbieter0_Bezug_\d{8}_\d{6}\.txt$')
+        self.assertEqual(files[0].read_text(encoding='utf-8'),
+                         "Energieanbieter: Anbieter0 Tarife von https://host0.at/tarife Preis 12.5 ct/kWh  ")
+
+        # A second run within fetchinterval fetches nothing
+        with mock.patch.dict(get_tarife.CRAWL_CONFIG, self.crawl_config, clear=True):
+            results = get_tarife.crawl_data({'sheet': rows[:6]}, n=0, fetchinterval=600,
+                                            verbose=False, crawl_dir=self.tmp.name)
+        self.assertEqual(results, [])
+
+    def test_n_counts_successful_crawls(self):
+        rows = [{'crawl': 'y', 'Anbieter': 'Kaputt', 'Typ': 'Bezug', 'Link': 'https://x.at/missing'}]
+        rows += [{'crawl': 'y', 'Anbieter': f'Anbieter{i}', 'Typ': 'Bezug', 'Link': f'https://host{i}.at/'}
+                 for i in range(4)]
+        with mock.patch.dict(get_tarife.CRAWL_CONFIG, self.crawl_config, clear=True):
+            results = get_tarife.crawl_data({'sheet': rows}, n=2, verbose=False, crawl_dir=self.tmp.name)
+        # The failed first entry is replaced by the next one
+        self.assertEqual([r.job.url for r in results],
+                         ['https://x.at/missing', 'https://host0.at/', 'https://host1.at/'])
+        self.assertEqual(sum(r.ok for r in results), 2)
+        self.assertEqual(len(ProxyHandler.requests), 3)
+
+    def test_same_host_is_spaced(self):
+        crawler = Crawler(max_workers=4, host_interval=0.5)
+        jobs = [crawl_job('w3m', f'https://same.at/page{i}', self.crawl_config) for i in range(3)]
+        results = crawler.run(jobs)
+        self.assertTrue(all(r.ok for r in results))
+        starts = sorted(r[0] for r in ProxyHandler.requests)
+        self.assertTrue(all(b - a >= 0.45 for a, b in zip(starts, starts[1:])))
+
+    def test_proxy_interval(self):
+        self.crawl_config['w3m'][0]['min_interval'] = 0.5
+        crawler = Crawler(max_workers=4, host_interval=0)
+        jobs = [crawl_job('w3m', f'https://host{i}.at/', self.crawl_config) for i in range(3)]
+        crawler.run(jobs)
+        starts = sorted(r[0] for r in ProxyHandler.requests)
+        self.assertTrue(all(b - a >= 0.45 for a, b in zip(starts, starts[1:])))
+        self.assertIsNone(crawl_job('lynx', 'https://a.at/', self.crawl_config))
+
+    def crawl(self, rows):
+        with mock.patch.dict(get_tarife.CRAWL_CONFIG, self.crawl_config, clear=True):
+            return get_tarife.crawl_data({'sheet': rows}, n=0, fetchinterval=0, verbose=False,
+                                         crawl_dir=self.tmp.name)
+
+    def test_unchanged_pages_are_not_rewritten(self):
+        rows = [{'crawl': 'y', 'Anbieter': 'Mit', 'Typ': 'Bezug', 'Link': 'https://a.at/etag'},
+                {'crawl': 'y', 'Anbieter': 'Ohne', 'Typ': 'Bezug', 'Link': 'https://b.at/plain'}]
+        self.assertEqual([r.changed for r in self.crawl(rows)], [True, True])
+        manifest = CrawlManifest.for_dir(self.tmp.name)
+        self.assertEqual(manifest.get('crawl_Mit_Bezug')['etag'], '"v1"')
+        files = sorted(Path(self.tmp.name).glob('crawl_*.txt'))
+
+        # Same content: a 304 for the page with an ETag, a hash match for the other
+        ProxyHandler.requests = []
+        results = self.crawl(rows)
+        self.assertEqual([r.changed for r in results], [False, False])
+        self.assertTrue(results[0].not_modified)
+        self.assertEqual({r[1]: r[3] for r in ProxyHandler.requests},
+                         {'https://a.at/etag': '"v1"', 'https://b.at/plain': None})
+        self.assertEqual(sorted(Path(self.tmp.name).glob('crawl_*.txt')), files)
+
+        ProxyHandler.version = 2
+        results = self.crawl(rows)
+        self.assertEqual([r.changed for r in results], [True, True])
+        self.assertIn('13.0 ct/kWh', results[1].path.read_text(encoding='utf-8'))
+        manifest = CrawlManifest.for_dir(self.tmp.name)
+        self.assertEqual(manifest.get('crawl_Ohne_Bezug')['file'], results[1].path.name)
+
+if __name__ == '__main__':
+    unittest.main()
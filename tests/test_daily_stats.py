@@ -0,0 +1,113 @@
+import sys
+import tempfile
+from pathlib import Path
+from datetime import date, datetime, timedelta
+import unittest
+from unittest import mock
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import Session
+
+project_root = Path(__file__).parents[1]
+sys.path.append(str(project_root))
+
+from api.models import PriceData
+from config import CONFIG
+from db.database import dispose_engines
+from db.models.spot_prices import Base, SpotPrice
+from db.models.daily_stats import DailyStats
+from db.operations import daily_stats
+from db.operations.daily_stats import data_version, get_daily_stats
+from db.operations.spot_prices import bulk_upsert_prices
+from db.utils import db_stat_timerange
+
+def day_prices(day, offset=0.0):
+    start = datetime.combine(day, datetime.min.time())
+    return [PriceData(timestamp=start + timedelta(hours=h), price=(h * 7) % 24 + offset)
+            for h in range(24)]
+
+class TestDailyStats(unittest.TestCase):
+    def setUp(self):
+        self.engine = create_engine('sqlite:///:memory:')
+        Base.metadata.create_all(self.engine)
+        self.session = Session(self.engine)
+        self.day = date(2025, 2, 1)
+
+    def tearDown(self):
+        self.session.close()
+        Base.metadata.drop_all(self.engine)
+
+    def test_rollup_follows_ingest(self):
+        prices = day_prices(self.day) + day_prices(self.day + timedelta(days=1), offset=10)
+        bulk_upsert_prices(self.session, prices, 'awattar', 'ct/kWh')
+
+        stats = get_daily_stats(self.session, 'awattar', self.day, self.day + timedelta(days=1))
+        self.assertEqual([s.date for s in stats], ['2025-02-01', '2025-02-02'])
+        first = stats[0]
+        self.assertEqual((first.min_price, first.max_price, first.data_points), (0, 23, 24))
+        self.assertAlmostEqual(first.avg_price, 11.5)
+        self.assertEqual(datetime.fromtimestamp(first.max_time).hour, 17)
+
+        # Re-ingesting one day only touches that day's row
+        bulk_upsert_prices(self.session, day_prices(self.day, offset=-5)[:1], 'awattar', 'ct/kWh')
+        stats = get_daily_stats(self.session, 'awattar', self.day, self.day + timedelta(days=1))
+        self.assertEqual(stats[0].min_price, -5)
+        self.assertEqual(stats[1].min_price, 10)
+
+    def test_existing_prices_are_rolled_up_on_first_use(self):
+        start = int(datetime.combine(self.day, datetime.min.time()).timestamp())
+        for h in range(48):
+            self.session.add(SpotPrice(start_timestamp=start + h * 3600,
+                                       end_timestamp=start + (h + 1) * 3600,
+                                       price=float(h), unit='ct/kWh', source='awattar'))
+        self.session.commit()
+        stats = get_daily_stats(self.session, 'awattar', self.day, self.day + timedelta(days=1))
+        self.assertEqual([s.data_points for s in stats], [24, 24])
+
+    def test_version_follows_prices(self):
+        bulk_upsert_prices(self.session, day_prices(self.day), 'awattar', 'ct/kWh')
+        before = data_version(self.session, 'awattar', self.day, self.day)
+        stats = get_daily_stats(self.session, 'awattar', self.day, self.day)[0]
+        aggregates = (stats.min_price, stats.min_time, stats.max_price, stats.max_time,
+                      stats.avg_price, stats.data_points)
+        # Swapping two hours keeps every aggregate
+        swapped = day_prices(self.day)[1:3]
+        swapped[0].price, swapped[1].price = swapped[1].price, swapped[0].price
+        bulk_upsert_prices(self.session, swapped, 'awattar', 'ct/kWh')
+        stats = get_daily_stats(self.session, 'awattar', self.day, self.day)[0]
+        self.assertEqual((stats.min_price, stats.min_time, stats.max_price, stats.max_time,
+                          stats.avg_price, stats.data_points), aggregates)
+        self.assertNotEqual(data_version(self.session, 'awattar', self.day, self.day), before)
+
+    def test_rows_without_digest_are_rebuilt(self):
+        bulk_upsert_prices(self.session, day_prices(self.day), 'awattar', 'ct/kWh')
+        version = data_version(self.session, 'awattar', self.day, self.day)
+        # A database from before the digest column
+        self.session.execute(text("ALTER TABLE daily_stats DROP COLUMN digest"))
+        self.session.commit()
+        daily_stats._ensured.clear()
+        self.assertEqual(data_version(self.session, 'awattar', self.day, self.day), version)
+
+    def test_db_stat_timerange_combines_days(self):
+        with tempfile.TemporaryDirectory() as tmp, \
+                mock.patch.dict(CONFIG, {'db_path': Path(tmp)}):
+            engine = create_engine(f"sqlite:///{Path(tmp) / CONFIG['db_file']}")
+            Base.metadata.create_all(engine)
+            with Session(engine) as session:
+                for offset in range(3):
+                    bulk_upsert_prices(session, day_prices(self.day + timedelta(days=offset),
+                                                           offset=offset), 'awattar', 'ct/kWh')
+                self.assertEqual(session.query(DailyStats).count(), 3)
+            engine.dispose()
+
+            last_day = datetime.combine(self.day + timedelta(days=2), datetime.min.time())
+            stats = db_stat_timerange(day=last_day, days=3)
+            dispose_engines()
+
+        self.assertEqual(len(stats), 1)
+        self.assertEqual(stats[0].records, 72)
+        self.assertEqual(stats[0].min_price[0], 0)
+        self.assertEqual(stats[0].max_price[0], 25)
+        self.assertAlmostEqual(stats[0].avg_price, 12.5)
+
+if __name__ == '__main__':
+    unittest.main()
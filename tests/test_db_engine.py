@@ -0,0 +1,49 @@
+import sys
+import tempfile
+from pathlib import Path
+from datetime import datetime
+import unittest
+from sqlalchemy import text
+
+project_root = Path(__file__).parents[1]
+sys.path.append(str(project_root))
+
+from db.database import dispose_engines, get_db_engine, session_scope
+from db.models.spot_prices import SpotPrice
+
+class TestDatabase(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.db_file = Path(self.tmp.name) / 'test.db'
+
+    def tearDown(self):
+        dispose_engines()
+        self.tmp.cleanup()
+
+    def test_engine_is_shared_and_configured(self):
+        engine = get_db_engine(self.db_file)
+        self.assertIs(engine, get_db_engine(self.db_file))
+        with engine.connect() as conn:
+            self.assertEqual(conn.execute(text("PRAGMA journal_mode")).scalar(), 'wal')
+            self.assertEqual(conn.execute(text("PRAGMA synchronous")).scalar(), 1)
+            tables = conn.execute(text("SELECT name FROM sqlite_master WHERE type='table'")).scalars().all()
+        self.assertTrue({'spot_prices', 'daily_stats', 'price_coverage'} <= set(tables))
+
+    def test_session_scope_commits_and_rolls_back(self):
+        ts = int(datetime(2025, 1, 1).timestamp())
+        with session_scope(self.db_file) as session:
+            session.add(SpotPrice(start_timestamp=ts, end_timestamp=ts + 3600, price=1.0,
+                                  unit='ct/kWh', source='awattar'))
+
+        with self.assertRaises(RuntimeError):
+            with session_scope(self.db_file) as session:
+                session.add(SpotPrice(start_timestamp=ts + 3600, end_timestamp=ts + 7200,
+                                      price=2.0, unit='ct/kWh', source='awattar'))
+                session.flush()
+                raise RuntimeError
+
+        with session_scope(self.db_file) as session:
+            self.assertEqual(session.query(SpotPrice).count(), 1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,142 @@
+import sys
+import json
+import threading
+import time
+from pathlib import Path
+from datetime import date, datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+import unittest
+from unittest import mock
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+project_root = Path(__file__).parents[1]
+sys.path.append(str(project_root))
+
+from api.awattar.client import Client as AwattarClient
+from api.smartenergy.client import Client as SmartEnergyClient
+from db.models.spot_prices import Base, SpotPrice
+from db.operations.ingest import plan_windows, run_ingestion
+
+DELAY = 0.2
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    paths = []
+
+    def do_GET(self):
+        time.sleep(DELAY)
+        url = urlparse(self.path)
+        StubHandler.paths.append(url.path)
+        if url.path == '/awattar':
+            params = {k: int(v[0]) for k, v in parse_qs(url.query).items()}
+            data = []
+            ts = params['start']
+            while ts <= params['end']:
+                data.append({'start_timestamp': ts, 'marketprice': 50.0})
+                ts += 3600000
+            body = {'data': data}
+        elif url.path == '/smartenergy':
+            today = datetime.combine(date.today(), datetime.min.time())
+            body = {'data': [{'date': (today + timedelta(minutes=15 * i)).isoformat(),
+                              'value': 12.0} for i in range(96)]}
+        else:
+            self.send_response(503)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        payload = json.dumps(body).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+class TestIngest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(('127.0.0.1', 0), StubHandler)
+        cls.base = f"http://127.0.0.1:{cls.server.server_port}"
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        self.engine = create_engine('sqlite:///:memory:')
+        Base.metadata.create_all(self.engine)
+        self.session = Session(self.engine)
+        self.awattar = AwattarClient()
+        self.awattar.base_url = f"{self.base}/awattar"
+        self.awattar.max_range_days = 2
+        self.smart = SmartEnergyClient()
+        self.smart.base_url = f"{self.base}/smartenergy"
+
+    def tearDown(self):
+        self.session.close()
+        self.awattar.close()
+        self.smart.close()
+
+    def test_plan_windows(self):
+        today = date.today()
+        missing = [today - timedelta(days=d) for d in (10, 9, 8, 7, 6, 3)]
+        self.assertEqual(len(plan_windows(self.awattar, missing)), 4)
+        self.assertEqual(plan_windows(self.smart, missing + [today]), [(today, today)])
+
+    def test_concurrent_ingestion(self):
+        today = date.today()
+        missing = {'awattar': [today - timedelta(days=d) for d in range(10)],
+                   'smartenergy': [today]}
+
+        started = time.perf_counter()
+        results = run_ingestion(self.session, [self.awattar, self.smart],
+                                find_missing=lambda session, source: missing[source],
+                                max_concurrency=6)
+        elapsed = time.perf_counter() - started
+
+        self.assertEqual(results['awattar'].windows, 5)
+        self.assertEqual(results['awattar'].inserted, 240)
+        self.assertEqual(results['smartenergy'].inserted, 96)
+        self.assertFalse(results['awattar'].errors)
+        # Six requests of DELAY each, run side by side
+        self.assertLess(elapsed, 6 * DELAY)
+        self.assertEqual(self.session.query(SpotPrice).count(), 336)
+
+    def test_failed_window_is_reported(self):
+        self.awattar.base_url = f"{self.base}/missing"
+        results = run_ingestion(self.session, [self.awattar],
+                                find_missing=lambda session, source: [date.today()])
+        self.assertEqual(len(results['awattar'].errors), 1)
+        self.assertEqual(results['awattar'].inserted, 0)
+
+    def test_smartenergy_downloads_once_per_run(self):
+        # The endpoint always returns everything; two windows must not mean two downloads
+        StubHandler.paths = []
+        today = date.today()
+        self.smart.max_range_days = 1
+        missing = [today, today + timedelta(days=1)]
+        results = run_ingestion(self.session, [self.smart], find_missing=lambda session, source: missing)
+        self.assertEqual(results['smartenergy'].windows, 2)
+        self.assertEqual(results['smartenergy'].inserted, 96)
+        self.assertEqual(StubHandler.paths, ['/smartenergy'])
+
+    def test_update_db_closes_clients_on_error(self):
+        import db.maintenance as maintenance
+        clients = [mock.Mock(), mock.Mock()]
+        with mock.patch.object(maintenance, 'AwattarClient', return_value=clients[0]), \
+             mock.patch.object(maintenance, 'SmartEnergyClient', return_value=clients[1]), \
+             mock.patch.object(maintenance, 'session_scope'), \
+             mock.patch.object(maintenance, 'run_ingestion', side_effect=RuntimeError('boom')):
+            with self.assertRaises(RuntimeError):
+                maintenance.update_db()
+        for client in clients:
+            client.close.assert_called_once()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,125 @@
+import os
+import sys
+import tempfile
+from pathlib import Path
+import unittest
+from unittest import mock
+
+project_root = Path(__file__).parents[1]
+sys.path.append(str(project_root))
+
+import llm_analyze
+from utils.crawl_manifest import CrawlManifest
+from utils.llm_cache import LLMResultCache
+from utils.llm_client import LLMTaskResult
+
+QUERIES = {'TEST_QUERY': [{"QUERY": "Liste die Tarife."}],
+           'TEST_MERGE': [{"QUERY": "Vereinheitliche."}]}
+
+class FakeExecutor:
+    """Runs LLMTasks through fake_llm of the test instead of HTTP."""
+    def __init__(self, fake_llm):
+        self.fake_llm = fake_llm
+
+    def map(self, tasks, on_result=None):
+        outcomes = []
+        for task in tasks:
+            query, context = task.prompt.split('\n\n', 1)
+            outcome = LLMTaskResult(task=task, result=self.fake_llm(task.provider, query, context), attempts=1)
+            if on_result:
+                on_result(outcome)
+            outcomes.append(outcome)
+        return outcomes
+
+class TestIncrementalAnalysis(unittest.TestCase):
+    def setUp(self):
+        self.cwd = os.getcwd()
+        self.tmp = tempfile.TemporaryDirectory()
+        os.chdir(self.tmp.name)
+        self.crawls = Path('data/crawls')
+        self.crawls.mkdir(parents=True)
+        for name in ('Alpha', 'Beta', 'Gamma'):
+            self.write(name, f"Energieanbieter: {name} Tarif 10 ct/kWh")
+        self.calls = []
+        patches = [
+            mock.patch.dict(llm_analyze.QUERY_CONFIG, QUERIES),
+            mock.patch.object(llm_analyze, 'register_artifact'),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        self.tmp.cleanup()
+
+    def write(self, provider, text):
+        (self.crawls / f"crawl_{provider}_Bezug_20250101_000000.txt").write_text(text, encoding='utf-8')
+
+    def fake_llm(self, model, query, context=None):
+        self.calls.append((model, query, context))
+        return f"{model}: {context.split(' Tarif')[0]}"
+
+    def analyze(self, model='m1'):
+        path = llm_analyze.llmanalyze_files(llm_model=model, query_to_use='TEST_QUERY',
+                                            executor=FakeExecutor(self.fake_llm))
+        return Path(path).read_text(encoding='utf-8')
+
+    def test_only_changed_crawls_are_sent(self):
+        first = self.analyze()
+        self.assertEqual(len(self.calls), 3)
+        self.assertIn("-- Stromanbieter: Beta\nm1: Energieanbieter: Beta\n", first)
+
+        # Unchanged crawls: no calls and the report is rebuilt, not appended to
+        self.assertEqual(self.analyze(), first)
+        self.assertEqual(len(self.calls), 3)
+
+        self.write('Beta', "Energieanbieter: Beta2 Tarif 11 ct/kWh")
+        report = self.analyze()
+        self.assertEqual(len(self.calls), 4)
+        self.assertIn("m1: Energieanbieter: Beta2\n", report)
+        self.assertNotIn("m1: Energieanbieter: Beta\n", report)
+
+        # Another model or query text is another key
+        self.analyze(model='m2')
+        self.assertEqual(len(self.calls), 7)
+        with mock.patch.dict(llm_analyze.QUERY_CONFIG, {'TEST_QUERY': [{"QUERY": "Neu."}]}):
+            self.analyze()
+        self.assertEqual(len(self.calls), 10)
+
+    def test_only_current_crawl_per_target(self):
+        (self.crawls / "crawl_Beta_Bezug_20240101_000000.txt").write_text("Energieanbieter: Alt Tarif", encoding='utf-8')
+        (self.crawls / "crawl_Beta_Bezug_20250201_000000.txt").write_text("Energieanbieter: Neu Tarif", encoding='utf-8')
+        self.assertEqual(llm_analyze.current_crawl_files('data/crawls'),
+                         ['crawl_Alpha_Bezug_20250101_000000.txt', 'crawl_Beta_Bezug_20250201_000000.txt',
+                          'crawl_Gamma_Bezug_20250101_000000.txt'])
+        report = self.analyze()
+        self.assertEqual(report.count('-- Stromanbieter: Beta'), 1)
+        self.assertIn("m1: Energieanbieter: Neu\n", report)
+
+        # The manifest names the current file, e.g. when a newer crawl was unchanged
+        manifest = CrawlManifest.for_dir(self.crawls)
+        manifest.changed('crawl_Beta_Bezug', 'https://beta.at', 'h', 'crawl_Beta_Bezug_20250101_000000.txt')
+        manifest.save()
+        self.assertIn('crawl_Beta_Bezug_20250101_000000.txt', llm_analyze.current_crawl_files('data/crawls'))
+
+    def test_solidify_reuses_answer_for_unchanged_report(self):
+        report = llm_analyze.llmanalyze_files(llm_model='m1', query_to_use='TEST_QUERY',
+                                              executor=FakeExecutor(self.fake_llm))
+        for _ in range(2):
+            solid = llm_analyze.solidify_report(report, query_to_use='TEST_MERGE', llm_model='m1',
+                                                executor=FakeExecutor(self.fake_llm))
+        self.assertEqual([c[1] for c in self.calls].count('Vereinheitliche.'), 1)
+        self.assertTrue(Path(solid).exists())
+
+    def test_cache_keys(self):
+        cache = LLMResultCache(Path('cache'))
+        key = cache.key('m', 'Q', 'prompt', 'context')
+        self.assertNotEqual(key, cache.key('m', 'Q', 'promptc', 'ontext'))
+        self.assertIsNone(cache.get(key))
+        cache.put(key, 'answer', file='x')
+        self.assertEqual(cache.get(key), 'answer')
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,142 @@
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+import unittest
+from unittest import mock
+
+project_root = Path(__file__).parents[1]
+sys.path.append(str(project_root))
+
+import llm_analyze
+from utils.llm_client import LLMExecutor, LLMTask, TokenBucket
+
+DELAY = 0.2
+
+class FakeOpenAIHandler(BaseHTTPRequestHandler):
+    """
+    OpenAI-compatible /chat/completions and /v1/completions. Prompts
+    containing FLAKY get a 429 on their first request, prompts containing
+    BROKEN always get a 500.
+    """
+    seen = {}
+    lock = threading.Lock()
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        prompt = body['messages'][0]['content'] if 'messages' in body else body['prompt']
+        with self.lock:
+            attempt = self.seen[prompt] = self.seen.get(prompt, 0) + 1
+        time.sleep(DELAY)
+        if 'BROKEN' in prompt or ('FLAKY' in prompt and attempt == 1):
+            status = 500 if 'BROKEN' in prompt else 429
+            self.send_response(status)
+            self.send_header('Retry-After', '0')
+            self.end_headers()
+            return
+        answer = f"{body['model']} sagt: {prompt.splitlines()[-1]}"
+        if self.path == '/v1/completions':
+            payload = {'choices': [{'text': answer}]}
+        else:
+            self.assert_auth()
+            payload = {'choices': [{'message': {'role': 'assistant', 'content': answer}}]}
+        data = json.dumps(payload).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def assert_auth(self):
+        assert self.headers['Authorization'] == 'Bearer key123'
+
+    def log_message(self, *args):
+        pass
+
+class TestTokenBucket(unittest.TestCase):
+    def test_rate(self):
+        now = [0.0]
+        bucket = TokenBucket(rate=2.0, capacity=1.0, clock=lambda: now[0])
+        self.assertEqual(bucket.reserve(), 0.0)
+        self.assertAlmostEqual(bucket.reserve(), 0.5)
+        self.assertAlmostEqual(bucket.reserve(), 1.0)
+        now[0] = 10.0
+        self.assertEqual(bucket.reserve(), 0.0)
+
+class TestLLMExecutor(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(('127.0.0.1', 0), FakeOpenAIHandler)
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        base = f"http://127.0.0.1:{cls.server.server_port}"
+        cls.llm_config = {
+            'fake_chat': [{"BASEURL": base, "APIKEY": "fake_key", "MODEL": "chat-1",
+                           "RPM": 6000, "MAX_CONCURRENCY": 8}],
+            'amp1_fake': [{"BASEURL": base + "/", "APIKEY": "fake_key", "MODEL": "comp-1", "RPM": 6000}],
+            'slow_fake': [{"BASEURL": base, "APIKEY": "fake_key", "MODEL": "chat-1", "RPM": 120}],
+        }
+        cls.passwords = {'fake_key': 'key123'}
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        FakeOpenAIHandler.seen = {}
+        self.executor = LLMExecutor(self.llm_config, self.passwords, max_workers=8, max_retries=2, backoff=0.01)
+
+    def test_concurrent_with_retries_and_failures(self):
+        prompts = [f"Frage\n\nAnbieter{i}" for i in range(8)] + ["Frage\n\nFLAKY", "Frage\n\nBROKEN"]
+        tasks = [LLMTask(key=str(i), provider='fake_chat', prompt=p) for i, p in enumerate(prompts)]
+        started = time.monotonic()
+        outcomes = self.executor.map(tasks)
+        elapsed = time.monotonic() - started
+
+        # 13 requests of DELAY each including retries; the longest chain is BROKEN's three
+        self.assertLess(elapsed, 5 * DELAY)
+        self.assertEqual([o.task.key for o in outcomes], [str(i) for i in range(10)])
+        self.assertEqual(outcomes[0].result, "chat-1 sagt: Anbieter0")
+        self.assertTrue(outcomes[8].ok)
+        self.assertEqual(outcomes[8].attempts, 2)
+        self.assertFalse(outcomes[9].ok)
+        self.assertIn('HTTP 500', outcomes[9].error)
+        self.assertEqual(outcomes[9].attempts, self.executor.max_retries + 1)
+
+    def test_completions_api_and_errors(self):
+        self.assertEqual(self.executor.complete('amp1_fake', 'Hallo').result, 'comp-1 sagt: Hallo')
+        self.assertIn('No configuration', self.executor.complete('unknown', 'x').error)
+        executor = LLMExecutor(self.llm_config, {}, max_workers=2)
+        self.assertIn('No API key', executor.complete('fake_chat', 'x').error)
+
+    def test_provider_rate_limit(self):
+        # 120 RPM: one request every 0.5 s, whatever the number of workers
+        tasks = [LLMTask(key=str(i), provider='slow_fake', prompt=f"R{i}") for i in range(3)]
+        started = time.monotonic()
+        outcomes = self.executor.map(tasks)
+        self.assertTrue(all(o.ok for o in outcomes))
+        self.assertGreaterEqual(time.monotonic() - started, 1.0)
+
+    def test_llmanalyze_files_collects_failures(self):
+        cwd = os.getcwd()
+        with tempfile.TemporaryDirectory() as tmp:
+            os.chdir(tmp)
+            try:
+                Path('data/crawls').mkdir(parents=True)
+                for name in ('Alpha', 'Beta', 'BROKEN', 'Delta'):
+                    Path(f'data/crawls/crawl_{name}_Bezug_20250101_000000.txt').write_text(name)
+                with mock.patch.dict(llm_analyze.QUERY_CONFIG, {'Q': [{"QUERY": "Frage"}]}):
+                    path = llm_analyze.llmanalyze_files(llm_model='fake_chat', query_to_use='Q',
+                                                        executor=self.executor)
+                report = Path(path).read_text(encoding='utf-8')
+            finally:
+                os.chdir(cwd)
+        self.assertIn("-- Stromanbieter: Delta\nchat-1 sagt: Delta\n", report)
+        self.assertEqual(report.count('-- Stromanbieter'), 3)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,106 @@
+import sys
+from pathlib import Path
+from datetime import datetime, timedelta
+import unittest
+from unittest import mock
+import numpy as np
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+project_root = Path(__file__).parents[1]
+sys.path.append(str(project_root))
+
+from db.operations.price_buffer import PriceBuffer
+from electricity.api.v1.endpoints import spotprices
+from utils.load_optimizer import ApplianceProfile, PriceSeries
+
+STEP = 900
+START = 1_740_000_000 - 1_740_000_000 % STEP
+
+def brute_window(timestamps, prices, slots, lo, hi):
+    best = None
+    for i in range(lo, hi - slots + 1):
+        if timestamps[i + slots - 1] - timestamps[i] != (slots - 1) * STEP:
+            continue
+        total = prices[i:i + slots].sum()
+        if best is None or total < best[0]:
+            best = (total, i)
+    return best
+
+class TestPriceSeries(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(11)
+        timestamps = START + STEP * np.arange(192)
+        # Drop an hour to create a gap
+        keep = (np.arange(192) < 80) | (np.arange(192) >= 84)
+        self.timestamps = timestamps[keep]
+        self.prices = rng.normal(10, 6, len(self.timestamps)).round(3)
+        self.series = PriceSeries(self.timestamps, self.prices, STEP)
+
+    def test_window_matches_brute_force(self):
+        for hours in (0.25, 1, 2.5, 6):
+            for earliest, latest in ((None, None), (START + 3600 * 5, START + 3600 * 30)):
+                window = self.series.cheapest_window(hours, earliest, latest)
+                lo = 0 if earliest is None else int(np.searchsorted(self.timestamps, earliest))
+                hi = len(self.timestamps) if latest is None else int(
+                    np.searchsorted(self.timestamps, latest - STEP, side='right'))
+                slots = int(hours * 4)
+                total, i = brute_window(self.timestamps, self.prices, slots, lo, hi)
+                self.assertEqual(window.start_timestamp, self.timestamps[i])
+                self.assertAlmostEqual(window.avg_price, total / slots)
+                self.assertEqual(window.end_timestamp - window.start_timestamp, slots * STEP)
+                if latest is not None:
+                    self.assertLessEqual(window.end_timestamp, latest)
+
+    def test_slots(self):
+        schedule = self.series.cheapest_slots(energy_kwh=7, max_power_kw=11)
+        # 2.75 kWh per quarter hour: two full slots and 1.5 kWh in the third
+        expected = np.sort(self.prices)[:3]
+        self.assertEqual(len(schedule.slots), 3)
+        self.assertEqual(sorted(s['price'] for s in schedule.slots), expected.tolist())
+        self.assertAlmostEqual(sum(s['energy_kwh'] for s in schedule.slots), 7)
+        self.assertAlmostEqual(schedule.cost, expected[:2].sum() * 2.75 + expected[2] * 1.5)
+        starts = [s['start_timestamp'] for s in schedule.slots]
+        self.assertEqual(starts, sorted(starts))
+
+    def test_slots_respect_bounds_and_capacity(self):
+        latest = START + 4 * 3600
+        schedule = self.series.cheapest_slots(10, 3.7, latest=latest)
+        self.assertTrue(all(s['start_timestamp'] + STEP <= latest for s in schedule.slots))
+        self.assertIsNone(self.series.cheapest_slots(100, 3.7, latest=latest))
+
+    def test_batch_equals_single(self):
+        profiles = [ApplianceProfile('dishwasher', duration_hours=2, energy_kwh=1.2),
+                    ApplianceProfile('ev', kind='slots', energy_kwh=20, max_power_kw=11),
+                    ApplianceProfile('dryer', duration_hours=2, earliest=START + 36000)]
+        batch = self.series.optimize(profiles)
+        self.assertEqual(batch[0], self.series.cheapest_window(2, name='dishwasher', energy_kwh=1.2))
+        self.assertEqual(batch[1], self.series.cheapest_slots(20, 11, name='ev'))
+        self.assertGreaterEqual(batch[2].start_timestamp, START + 36000)
+        self.assertAlmostEqual(batch[0].cost, batch[0].avg_price * 1.2)
+
+class TestOptimizeEndpoint(unittest.TestCase):
+    def test_optimize(self):
+        now = datetime.now()
+        start = int(datetime.combine(now.date(), datetime.min.time()).timestamp())
+        series = PriceSeries(start + 3600 * np.arange(48), np.arange(48, 0, -1, dtype=float), 3600)
+        buffer = mock.create_autospec(PriceBuffer, instance=True)
+        buffer.series.return_value = (series, start + 3600 * now.hour)
+        with mock.patch.object(spotprices, 'price_buffer', buffer):
+            app = FastAPI()
+            app.include_router(spotprices.router)
+            client = TestClient(app)
+            response = client.post('/spotprices/optimize', json={'profiles': [
+                {'name': 'wash', 'duration_hours': 3},
+                {'name': 'ev', 'kind': 'slots', 'energy_kwh': 22, 'max_power_kw': 11},
+                {'name': 'long', 'duration_hours': 48}]})
+            self.assertEqual(response.status_code, 200)
+            wash, ev, too_long = response.json()['schedules']
+            self.assertEqual(wash['start_timestamp'], start + 45 * 3600)
+            self.assertEqual([s['price'] for s in ev['slots']], [2.0, 1.0])
+            self.assertIsNone(too_long)
+            bad = client.post('/spotprices/optimize', json={'profiles': [{'name': 'x', 'kind': 'slots'}]})
+            self.assertEqual(bad.status_code, 422)
+
+if __name__ == '__main__':
+    unittest.main()
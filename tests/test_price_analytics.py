@@ -0,0 +1,74 @@
+import sys
+import tempfile
+from pathlib import Path
+from datetime import date, datetime, timedelta
+import unittest
+import numpy as np
+import pandas as pd
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+project_root = Path(__file__).parents[1]
+sys.path.append(str(project_root))
+
+from api.models import PriceData
+from db.models.spot_prices import Base
+from db.operations import archive
+from db.operations.price_analytics import get_spot_price_data, iter_spot_price_data
+from db.operations.spot_prices import bulk_upsert_prices
+
+class TestPriceAnalytics(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.engine = create_engine(f"sqlite:///{Path(self.tmp.name) / 'test.db'}")
+        Base.metadata.create_all(self.engine)
+        # Hourly prices for 1 Jan - 31 Mar and a second source that must not leak in
+        self.start = datetime(2024, 1, 1)
+        self.hours = 24 * 91
+        with Session(self.engine) as session:
+            bulk_upsert_prices(session, [PriceData(timestamp=self.start + timedelta(hours=h), price=h / 4)
+                                         for h in range(self.hours)], 'awattar', 'ct/kWh')
+            bulk_upsert_prices(session, [PriceData(timestamp=self.start, price=-1.0)], 'other', 'ct/kWh')
+
+    def tearDown(self):
+        self.engine.dispose()
+        self.tmp.cleanup()
+
+    def test_typed_columns_and_inclusive_bounds(self):
+        df = get_spot_price_data(self.start + timedelta(hours=10), self.start + timedelta(hours=20),
+                                 engine=self.engine)
+        self.assertEqual(list(df.columns), ['timestamp', 'price'])
+        self.assertTrue(pd.api.types.is_datetime64_dtype(df['timestamp']))
+        self.assertEqual(df['price'].dtype, np.float64)
+        self.assertEqual(len(df), 11)
+        self.assertEqual(df['timestamp'].iloc[0], self.start + timedelta(hours=10))
+        self.assertEqual(df['price'].iloc[-1], 5.0)
+
+        df = get_spot_price_data(engine=self.engine, price_dtype=np.float32)
+        self.assertEqual(len(df), self.hours)
+        self.assertEqual(df['price'].dtype, np.float32)
+
+    def check_chunks(self, chunksize):
+        full = get_spot_price_data(engine=self.engine)
+        chunks = list(get_spot_price_data(engine=self.engine, chunksize=chunksize))
+        self.assertTrue(all(len(chunk) == chunksize for chunk in chunks[:-1]))
+        self.assertLessEqual(len(chunks[-1]), chunksize)
+        pd.testing.assert_frame_equal(pd.concat(chunks, ignore_index=True), full)
+
+    def test_chunked(self):
+        self.check_chunks(500)
+        self.check_chunks(self.hours)
+        self.assertEqual(list(iter_spot_price_data(datetime(2030, 1, 1), engine=self.engine)), [])
+
+    @unittest.skipUnless(archive.archive_available(), "pyarrow is not installed")
+    def test_chunked_across_tiers(self):
+        with Session(self.engine) as session:
+            archive.archive_closed_months(session, ['awattar'], keep_days=30, today=date(2024, 4, 5))
+        self.assertEqual(len(archive.archived_months(archive.archive_dir(self.engine), 'awattar')), 2)
+        self.check_chunks(500)
+        self.check_chunks(1000)
+        df = get_spot_price_data(datetime(2024, 1, 31, 12), datetime(2024, 2, 1, 11), engine=self.engine)
+        self.assertEqual(len(df), 24)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,74 @@
+import os
+import sys
+import time
+import tempfile
+from pathlib import Path
+from datetime import datetime, timedelta
+import unittest
+import numpy as np
+
+project_root = Path(__file__).parents[1]
+sys.path.append(str(project_root))
+
+from api.models import PriceData
+from db.database import dispose_engines, get_db_engine, session_scope
+from db.operations.price_arrays import load_price_arrays, load_prices, to_local_datetime64
+from db.operations.spot_prices import bulk_upsert_prices
+
+class TestPriceArrays(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.db_file = Path(self.tmp.name) / 'test.db'
+        self.engine = get_db_engine(self.db_file)
+        self.start = datetime(2024, 3, 1)
+        prices = [PriceData(timestamp=self.start + timedelta(hours=h), price=h / 10)
+                  for h in range(24 * 60)]
+        with session_scope(self.db_file) as session:
+            bulk_upsert_prices(session, prices, 'awattar', 'ct/kWh')
+            bulk_upsert_prices(session, prices[:24], 'smartenergy', 'ct/kWh')
+
+    def tearDown(self):
+        dispose_engines()
+        self.tmp.cleanup()
+
+    def test_load_range(self):
+        start_ts = int(self.start.timestamp())
+        result = load_price_arrays(start_ts, start_ts + 47 * 3600,
+                                   ('awattar', 'smartenergy'), engine=self.engine)
+        awattar = result['awattar']
+        self.assertEqual(awattar.timestamps.dtype, np.int64)
+        self.assertEqual(awattar.prices.dtype, np.float64)
+        self.assertEqual(len(awattar), 48)
+        self.assertTrue(np.all(np.diff(awattar.timestamps) > 0))
+        self.assertEqual(len(result['smartenergy']), 24)
+
+        empty = load_prices(0, 10, 'awattar', engine=self.engine)
+        self.assertEqual(len(empty), 0)
+
+    def test_frame(self):
+        start_ts = int(self.start.timestamp())
+        frame = load_prices(start_ts, start_ts + 23 * 3600, engine=self.engine).to_frame()
+        self.assertEqual(frame.index.name, 'timestamp')
+        self.assertEqual(frame.index[0].to_pydatetime(), self.start)
+        self.assertAlmostEqual(frame['price'].iloc[-1], 2.3)
+
+    def test_local_times_match_fromtimestamp_across_dst(self):
+        old_tz = os.environ.get('TZ')
+        os.environ['TZ'] = 'Europe/Vienna'
+        time.tzset()
+        try:
+            timestamps = np.arange(int(datetime(2023, 1, 1).timestamp()),
+                                   int(datetime(2025, 1, 1).timestamp()), 1800, dtype=np.int64)
+            local = to_local_datetime64(timestamps)
+            expected = np.array([datetime.fromtimestamp(t) for t in timestamps.tolist()],
+                                dtype='datetime64[s]')
+            np.testing.assert_array_equal(local, expected)
+        finally:
+            if old_tz is None:
+                del os.environ['TZ']
+            else:
+                os.environ['TZ'] = old_tz
+            time.tzset()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,113 @@
+import sys
+import tempfile
+from pathlib import Path
+from datetime import datetime, timedelta
+import unittest
+from unittest import mock
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+project_root = Path(__file__).parents[1]
+sys.path.append(str(project_root))
+
+from api.models import PriceData
+from db.models.spot_prices import Base
+from db.operations import price_buffer as buffer_module
+from db.operations.price_buffer import PriceBuffer, notify_prices_changed
+from db.operations.spot_prices import bulk_upsert_prices
+from electricity.api.v1.endpoints import spotprices
+
+def hourly(start, hours, price):
+    return [PriceData(timestamp=start + timedelta(hours=h), price=price(h)) for h in range(hours)]
+
+class TestPriceBuffer(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.notify = Path(self.tmp.name) / 'prices.updated'
+        self.engine = create_engine(f"sqlite:///{Path(self.tmp.name) / 'test.db'}")
+        Base.metadata.create_all(self.engine)
+        self.today = datetime.combine(datetime.now().date(), datetime.min.time())
+        # Yesterday, today and tomorrow; cheapest three hours tomorrow 13-15
+        prices = hourly(self.today - timedelta(days=1), 72,
+                        lambda h: 1.0 if h in (61, 62, 63) else 10.0 + h % 24)
+        with Session(self.engine) as session:
+            bulk_upsert_prices(session, prices, 'awattar', 'ct/kWh')
+        self.buffer = PriceBuffer(sources=('awattar',), engine=self.engine)
+
+    def tearDown(self):
+        self.engine.dispose()
+        self.tmp.cleanup()
+
+    def test_served_from_memory(self):
+        self.buffer.load()
+        with mock.patch.object(buffer_module, 'load_price_arrays') as load:
+            now = self.today + timedelta(hours=5, minutes=30)
+            slot = self.buffer.current_price('awattar', now)
+            self.assertEqual(slot.price, 15.0)
+            self.assertEqual(slot.start_timestamp, int((self.today + timedelta(hours=5)).timestamp()))
+            self.assertEqual(len(self.buffer.day_curve('awattar')), 24)
+            window = self.buffer.cheapest_window('awattar', 3, now)
+            self.assertEqual(datetime.fromtimestamp(window.start_timestamp),
+                             self.today + timedelta(days=1, hours=13))
+            self.assertEqual(window.avg_price, 1.0)
+            load.assert_not_called()
+
+    def test_reload_on_notify(self):
+        self.assertEqual(self.buffer.current_price('awattar', self.today).price, 10.0)
+        self.assertEqual(self.buffer.loads, 1)
+        with Session(self.engine) as session:
+            bulk_upsert_prices(session, [PriceData(timestamp=self.today, price=-3.0)], 'awattar', 'ct/kWh',
+                               commit=False)
+            self.assertEqual(self.buffer.current_price('awattar', self.today).price, 10.0)
+            session.commit()
+        # Nothing notified for an uncommitted upsert
+        self.assertEqual(self.buffer.current_price('awattar', self.today).price, 10.0)
+        notify_prices_changed(self.notify)
+        self.assertEqual(self.buffer.current_price('awattar', self.today).price, -3.0)
+        self.assertEqual(self.buffer.loads, 2)
+
+        # A committed upsert notifies by itself, through the file next to its database
+        with Session(self.engine) as session:
+            bulk_upsert_prices(session, [PriceData(timestamp=self.today, price=-4.0)], 'awattar', 'ct/kWh')
+        self.assertEqual(self.buffer.current_price('awattar', self.today).price, -4.0)
+        self.assertEqual(self.buffer.loads, 3)
+
+    def test_notify_follows_database(self):
+        self.assertEqual(buffer_module.notify_path(self.engine), self.notify.resolve())
+        memory = create_engine('sqlite:///:memory:')
+        Base.metadata.create_all(memory)
+        self.assertIsNone(buffer_module.notify_path(memory))
+        with mock.patch('db.operations.spot_prices.notify_prices_changed') as notify, Session(memory) as session:
+            bulk_upsert_prices(session, [PriceData(timestamp=self.today, price=1.0)], 'awattar', 'ct/kWh')
+        notify.assert_not_called()
+        other = Path(self.tmp.name) / 'other.updated'
+        with Session(self.engine) as session:
+            bulk_upsert_prices(session, [PriceData(timestamp=self.today, price=2.0)], 'awattar', 'ct/kWh',
+                               notify_file=other)
+        self.assertTrue(other.exists())
+        memory.dispose()
+
+    def test_window_must_not_span_gaps(self):
+        self.buffer.load()
+        self.assertIsNone(self.buffer.cheapest_window('awattar', 30, self.today + timedelta(days=1)))
+
+    def test_endpoints(self):
+        with mock.patch.object(spotprices, 'price_buffer', self.buffer):
+            app = FastAPI()
+            app.include_router(spotprices.router)
+            client = TestClient(app)
+            self.assertIn('price', client.get('/spotprices/now').json())
+            curve = client.get('/spotprices/today', params={'day': 'tomorrow'}).json()
+            self.assertEqual(len(curve['prices']), 24)
+            cheapest = client.get('/spotprices/cheapest', params={'hours': 3}).json()
+            self.assertEqual(cheapest['price'], 1.0)
+            self.assertEqual(client.get('/spotprices/now', params={'source': 'x'}).status_code, 404)
+            # Bugs are not disguised as unknown sources
+            with mock.patch.object(self.buffer, 'current_price', side_effect=KeyError('bug')):
+                with self.assertRaises(KeyError):
+                    client.get('/spotprices/now')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,71 @@
+import sys
+from pathlib import Path
+from datetime import datetime
+import unittest
+import numpy as np
+import pandas as pd
+
+project_root = Path(__file__).parents[1]
+sys.path.append(str(project_root))
+
+from utils.price_kpis import compute_kpis
+from utils.spot_price_analyzer import SpotPriceAnalyzer
+
+class TestPriceKpis(unittest.TestCase):
+    def setUp(self):
+        self.index = pd.date_range(start=datetime(2023, 1, 1), end=datetime(2024, 3, 31, 23), freq='h')
+        rng = np.random.default_rng(3)
+        # Expensive weekday daytime, a handful of negative night hours
+        base = np.where((self.index.hour >= 8) & (self.index.hour < 20) & (self.index.dayofweek < 5), 15.0, 8.0)
+        self.prices = base + rng.normal(0, 2, len(self.index))
+        self.prices[self.index.hour == 3] -= 9
+        self.frame = pd.DataFrame({'price': self.prices}, index=self.index)
+        self.kpis = compute_kpis(self.index.values, self.prices, reference_price=12.0)
+
+    def test_profiles_match_pandas(self):
+        hourly = self.frame.groupby(self.index.hour)['price'].mean().round(2)
+        self.assertEqual(self.kpis['patterns']['hourly_profile'], hourly.to_dict())
+        weekday = self.frame.groupby(self.index.dayofweek)['price'].mean()
+        self.assertAlmostEqual(self.kpis['patterns']['weekday_profile']['Sunday'], weekday[6], places=2)
+        self.assertEqual(self.kpis['peak_offpeak']['optimal_hours'][0], 3)
+
+    def test_volatility_matches_pandas(self):
+        monthly = self.frame['price'].groupby(self.index.to_period('M')).std()
+        first = self.kpis['volatility']['monthly_std'][0]
+        self.assertEqual(first['month'], '2023-01')
+        self.assertAlmostEqual(first['std'], monthly.iloc[0], places=2)
+        weeks = self.kpis['volatility']['weekly_std']
+        self.assertEqual(len(weeks), 13)
+        last = self.frame.loc[weeks[-1]['week_start']:, 'price']
+        self.assertEqual(pd.Timestamp(weeks[-1]['week_start']).dayofweek, 0)
+        self.assertAlmostEqual(weeks[-1]['std'], last.std(), places=2)
+
+    def test_peak_offpeak_and_savings(self):
+        peak = self.kpis['peak_offpeak']
+        self.assertGreater(peak['ratio'], 1.5)
+        savings = self.kpis['savings']
+        negative = (self.prices < 0).sum()
+        self.assertEqual(savings['negative_count'], negative)
+        self.assertAlmostEqual(savings['negative_pct'], negative / len(self.prices) * 100, places=2)
+
+        # Load shifting against a per-day reference computed with pandas
+        by_day = self.frame.groupby(self.index.date)['price']
+        expected = (by_day.mean() - by_day.apply(lambda p: p.nsmallest(4).mean())).mean()
+        self.assertAlmostEqual(savings['load_shifting']['avg_saving'], expected, places=2)
+        self.assertEqual(savings['reference_tariff']['price'], 12.0)
+
+    def test_trends(self):
+        trends = self.kpis['trends']
+        self.assertEqual(trends['year_over_year']['month']['month'], '2024-03')
+        self.assertIsNotNone(trends['model'])
+        daily = self.frame['price'].resample('D').mean()
+        self.assertAlmostEqual(trends['moving_average_7d']['latest'], daily.iloc[-7:].mean(), places=2)
+
+    def test_analyzer_kpis_are_cached(self):
+        analyzer = SpotPriceAnalyzer(self.frame.reset_index(names='timestamp'))
+        first = analyzer.kpi_analysis(datetime(2023, 6, 1), datetime(2024, 3, 1))
+        self.assertIs(analyzer.kpi_analysis(datetime(2023, 6, 1), datetime(2024, 3, 1)), first)
+        self.assertEqual(first['volatility']['monthly_std'][0]['month'], '2023-06')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,128 @@
+import sys
+import os
+import time
+import tempfile
+from pathlib import Path
+from datetime import date, datetime, timedelta
+import unittest
+from unittest import mock
+import numpy as np
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+project_root = Path(__file__).parents[1]
+sys.path.append(str(project_root))
+
+from api.models import PriceData
+from config import CONFIG
+from db.database import dispose_engines, session_scope
+from db.operations.price_arrays import PriceArrays, bucket_starts, resample_prices
+from db.operations.spot_prices import bulk_upsert_prices
+from electricity.api.v1.endpoints import spotprices
+
+# Contains the switch to summer time on 2025-03-30
+FIRST = date(2025, 3, 28)
+DAYS = 4
+
+_old_tz = None
+
+def setUpModule():
+    global _old_tz
+    _old_tz = os.environ.get('TZ')
+    os.environ['TZ'] = 'Europe/Vienna'
+    time.tzset()
+
+def tearDownModule():
+    if _old_tz is None:
+        del os.environ['TZ']
+    else:
+        os.environ['TZ'] = _old_tz
+    time.tzset()
+
+class TestResample(unittest.TestCase):
+    def test_day_buckets_follow_local_midnight(self):
+        start = int(datetime(2025, 3, 29).timestamp())
+        timestamps = start + 3600 * np.arange(24 + 23 + 24)
+        buckets = np.unique(bucket_starts(timestamps, 86400))
+        expected = [int(datetime(2025, 3, d).timestamp()) for d in (29, 30, 31)]
+        self.assertEqual(buckets.tolist(), expected)
+
+    def test_down_and_up(self):
+        start = int(datetime(2025, 1, 1).timestamp())
+        quarters = PriceArrays('x', start + 900 * np.arange(8), np.arange(8, dtype=float))
+        hourly = resample_prices(quarters, 3600, native_step=900)
+        self.assertEqual(hourly.prices.tolist(), [1.5, 5.5])
+        back = resample_prices(hourly, 900)
+        self.assertEqual(back.timestamps.tolist(), quarters.timestamps.tolist())
+        self.assertEqual(back.prices.tolist(), [1.5] * 4 + [5.5] * 4)
+
+class TestPricesEndpoint(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.patch = mock.patch.dict(CONFIG, {'db_path': Path(self.tmp.name)})
+        self.patch.start()
+        start = datetime.combine(FIRST, datetime.min.time())
+        end = datetime.combine(FIRST + timedelta(days=DAYS), datetime.min.time())
+        self.prices = []
+        ts = start
+        while ts < end:
+            self.prices.append(PriceData(timestamp=ts, price=float(ts.hour)))
+            ts = datetime.fromtimestamp(ts.timestamp() + 3600)
+        with session_scope() as session:
+            bulk_upsert_prices(session, self.prices, 'awattar', 'ct/kWh')
+        app = FastAPI()
+        app.include_router(spotprices.router)
+        self.client = TestClient(app)
+
+    def tearDown(self):
+        dispose_engines()
+        self.patch.stop()
+        self.tmp.cleanup()
+
+    def get(self, **params):
+        params.setdefault('start', FIRST.isoformat())
+        params.setdefault('end', (FIRST + timedelta(days=DAYS - 1)).isoformat())
+        return self.client.get('/spotprices/prices', params=params)
+
+    def test_hourly_columnar(self):
+        data = self.get(resolution='1h').json()
+        self.assertEqual(len(data['timestamps']), len(self.prices))
+        self.assertEqual(data['timestamps'][0], int(self.prices[0].timestamp.timestamp()))
+        self.assertEqual(data['prices'][:3], [0.0, 1.0, 2.0])
+        self.assertIsNone(data['next_cursor'])
+
+    def test_daily_means_and_records(self):
+        data = self.get(resolution='1d', format='records').json()
+        self.assertEqual([p['timestamp'][:10] for p in data['prices']],
+                         [(FIRST + timedelta(days=d)).isoformat() for d in range(DAYS)])
+        # The 23 hour DST day skips hour 2
+        self.assertAlmostEqual(data['prices'][2]['price'], round((276 - 2) / 23, 4))
+
+    def test_pagination_covers_range_once(self):
+        collected, cursor = [], None
+        while True:
+            params = {'resolution': '15m', 'limit': 50}
+            if cursor:
+                params['cursor'] = cursor
+            page = self.get(**params).json()
+            self.assertLessEqual(len(page['timestamps']), 50)
+            collected += page['timestamps']
+            cursor = page['next_cursor']
+            if cursor is None:
+                break
+        self.assertEqual(len(collected), 4 * len(self.prices))
+        self.assertEqual(collected, sorted(set(collected)))
+
+    def test_gzip(self):
+        response = self.client.get('/spotprices/prices', params={
+            'start': FIRST.isoformat(), 'end': (FIRST + timedelta(days=DAYS - 1)).isoformat(),
+            'resolution': '15m', 'format': 'records'}, headers={'Accept-Encoding': 'gzip'})
+        self.assertEqual(response.headers['content-encoding'], 'gzip')
+        self.assertEqual(len(response.json()['prices']), 4 * len(self.prices))
+
+    def test_bad_cursor(self):
+        self.assertEqual(self.get(cursor='abc').status_code, 400)
+        self.assertEqual(self.get(cursor='0').status_code, 400)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,95 @@
+import sys
+from pathlib import Path
+from datetime import datetime, timedelta
+import unittest
+from unittest import mock
+from sqlalchemy import create_engine, select, text
+from sqlalchemy.orm import Session
+
+project_root = Path(__file__).parents[1]
+sys.path.append(str(project_root))
+
+from api.models import PriceData
+from db.models.spot_prices import Base, SpotPrice
+from db.operations import coverage
+from db.operations.coverage import END_TIMESTAMPS_VERSION, covered_intervals, migrate_end_timestamps, missing_days
+from db.operations.daily_stats import get_daily_stats
+from db.operations.price_arrays import load_prices
+from db.operations.sources import source_resolution
+from db.operations.spot_prices import bulk_upsert_prices
+from db.operations.update_db import find_gaps
+
+DAY = datetime(2025, 2, 3)
+
+def quarters(start, count, skip=()):
+    return [PriceData(timestamp=start + timedelta(minutes=15 * q), price=float(q))
+            for q in range(count) if q not in skip]
+
+class TestMixedResolution(unittest.TestCase):
+    def setUp(self):
+        self.engine = create_engine('sqlite:///:memory:')
+        Base.metadata.create_all(self.engine)
+        self.session = Session(self.engine)
+
+    def tearDown(self):
+        self.session.close()
+        Base.metadata.drop_all(self.engine)
+
+    def test_registry(self):
+        self.assertEqual(source_resolution('awattar'), 3600)
+        self.assertEqual(source_resolution('smartenergy'), 900)
+        self.assertEqual(source_resolution('unknown'), 3600)
+
+    def test_quarter_hours_do_not_overlap(self):
+        bulk_upsert_prices(self.session, quarters(DAY, 96), 'smartenergy', 'ct/kWh')
+        rows = self.session.execute(select(SpotPrice.start_timestamp, SpotPrice.end_timestamp)
+                                    .order_by(SpotPrice.start_timestamp)).all()
+        self.assertEqual(len(rows), 96)
+        self.assertTrue(all(end - start == 900 for start, end in rows))
+        self.assertTrue(all(a[1] == b[0] for a, b in zip(rows, rows[1:])))
+        self.assertEqual(covered_intervals(self.session, 'smartenergy'),
+                         [(int(DAY.timestamp()), int((DAY + timedelta(days=1)).timestamp()))])
+        self.assertEqual(get_daily_stats(self.session, 'smartenergy', DAY.date(), DAY.date())[0].data_points, 96)
+
+    def test_gaps_use_source_step(self):
+        bulk_upsert_prices(self.session, quarters(DAY, 96, skip={40, 41}), 'smartenergy', 'ct/kWh')
+        gaps = find_gaps(self.session, DAY, DAY + timedelta(hours=23, minutes=45), source='smartenergy')
+        self.assertEqual(gaps, [(DAY + timedelta(minutes=15 * 39), DAY + timedelta(minutes=15 * 42))])
+        self.assertEqual(missing_days(self.session, 'smartenergy', DAY.date(), DAY.date() + timedelta(days=1)),
+                         [DAY.date() + timedelta(days=1)])
+
+    def test_old_hour_long_rows_are_fixed(self):
+        start = int(DAY.timestamp())
+        for q in range(8):
+            self.session.add(SpotPrice(start_timestamp=start + 900 * q, end_timestamp=start + 900 * q + 3600,
+                                       price=1.0, unit='ct/kWh', source='smartenergy'))
+        self.session.commit()
+        self.assertEqual(covered_intervals(self.session, 'smartenergy'), [(start, start + 7200)])
+        ends = self.session.execute(select(SpotPrice.end_timestamp - SpotPrice.start_timestamp)).scalars()
+        self.assertEqual(set(ends), {900})
+
+    def test_end_timestamps_migrate_once(self):
+        start = int(DAY.timestamp())
+        self.session.add(SpotPrice(start_timestamp=start, end_timestamp=start + 3600,
+                                   price=1.0, unit='ct/kWh', source='smartenergy'))
+        self.session.commit()
+        self.assertTrue(migrate_end_timestamps(self.session))
+        self.session.commit()
+        self.assertEqual(self.session.execute(text("PRAGMA user_version")).scalar(), END_TIMESTAMPS_VERSION)
+        # Later processes only read the marker
+        coverage._ensured.clear()
+        with mock.patch.object(coverage, 'normalize_end_timestamps') as normalize:
+            self.assertEqual(covered_intervals(self.session, 'smartenergy'), [(start, start + 900)])
+        normalize.assert_not_called()
+
+    def test_load_resampled(self):
+        bulk_upsert_prices(self.session, quarters(DAY, 96), 'smartenergy', 'ct/kWh')
+        start, end = int(DAY.timestamp()), int((DAY + timedelta(days=1)).timestamp()) - 1
+        hourly = load_prices(start, end, 'smartenergy', engine=self.engine, resolution=3600)
+        self.assertEqual(len(hourly), 24)
+        self.assertEqual(hourly.prices[0], 1.5)
+        native = load_prices(start, end, 'smartenergy', engine=self.engine)
+        self.assertEqual(len(native), 96)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,69 @@
+import sys
+import io
+import re
+from pathlib import Path
+from datetime import datetime
+import unittest
+import xml.etree.ElementTree as ET
+import numpy as np
+
+project_root = Path(__file__).parents[1]
+sys.path.append(str(project_root))
+
+from utils.svg_chart import ChartLayout, decimate_minmax, render_price_chart
+
+SVG = '{http://www.w3.org/2000/svg}'
+
+class TestDecimation(unittest.TestCase):
+    def test_short_series_untouched(self):
+        x = np.arange(100, dtype=float)
+        np.testing.assert_array_equal(decimate_minmax(x, x, 700), np.arange(100))
+
+    def test_keeps_column_extremes(self):
+        rng = np.random.default_rng(1)
+        x = np.arange(35040, dtype=float)      # one year of 15 minute slots
+        y = rng.normal(10, 5, len(x))
+        keep = decimate_minmax(x, y, 700)
+        self.assertLessEqual(len(keep), 4 * 700)
+        self.assertTrue(np.all(np.diff(keep) > 0))
+        self.assertIn(y.argmin(), keep)
+        self.assertIn(y.argmax(), keep)
+        self.assertEqual((keep[0], keep[-1]), (0, len(x) - 1))
+        # Every column still spans its full min/max range
+        column = np.minimum((x * 700 / x[-1]).astype(int), 699)
+        for c in (0, 350, 699):
+            in_column = column == c
+            kept = keep[column[keep] == c]
+            self.assertEqual(y[kept].min(), y[in_column].min())
+            self.assertEqual(y[kept].max(), y[in_column].max())
+
+class TestRenderPriceChart(unittest.TestCase):
+    def render(self, timestamps, values):
+        stream = io.StringIO()
+        vertices = render_price_chart(stream, timestamps, values, minmaxdot=True)
+        return ET.fromstring(stream.getvalue().encode()), vertices
+
+    def test_year_of_quarter_hours(self):
+        start = int(datetime(2024, 1, 1).timestamp())
+        timestamps = start + 900 * np.arange(35136)
+        values = 10 + 8 * np.sin(np.arange(35136) / 50.0)
+        values[12345] = -7.5
+        root, vertices = self.render(timestamps, values)
+
+        self.assertLessEqual(vertices, 4 * ChartLayout().plot_width)
+        line = root.find(f"{SVG}path[@class='price-line']")
+        self.assertEqual(len(re.findall('L', line.get('d'))) + 1, vertices)
+        min_label = root.findall(f"{SVG}text[@class='dot-label']")[0]
+        self.assertEqual(min_label.text, '-7.5')
+
+    def test_day_chart_keeps_every_point(self):
+        start = int(datetime(2024, 3, 4).timestamp())
+        timestamps = start + 3600 * np.arange(24)
+        root, vertices = self.render(timestamps, np.arange(24, dtype=float))
+        self.assertEqual(vertices, 24)
+        labels = [t.text for t in root.findall(f"{SVG}text[@class='axis-text']")]
+        self.assertIn('Montag', labels)
+        self.assertIn('04.03.', labels)
+
+if __name__ == '__main__':
+    unittest.main()
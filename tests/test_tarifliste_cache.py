@@ -0,0 +1,77 @@
+import sys
+import os
+import tempfile
+from pathlib import Path
+import unittest
+from unittest import mock
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+project_root = Path(__file__).parents[1]
+sys.path.append(str(project_root))
+
+from utils.artifacts import ArtifactIndex, register_artifact, report_kind
+from electricity.api.v1.endpoints import tarifliste
+
+HEADER = ('| Stromanbieter | Tarifname | Tarifart | Preisanpassung | Strompreis | Kurzbeschreibung |\n'
+          '|---|---|---|---|---|---|\n')
+
+def table(n, name='Anbieter'):
+    return HEADER + ''.join(f'| {name} {i} | Tarif {i} | Bezug | monatlich | {i} ct | kurz {i} |\n'
+                            for i in range(n))
+
+class TestTariflisteCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        tmp = Path(self.tmp.name)
+        manifest = tmp / 'artifacts.json'
+        self.report = tmp / 'report_20250301_tab.md'
+        self.report.write_text(table(30), encoding='utf-8')
+        register_artifact(report_kind('tab.md'), self.report, manifest)
+        self.patches = [mock.patch.object(tarifliste, 'artifact_index', ArtifactIndex(manifest)),
+                        mock.patch.object(tarifliste, '_parsed', None)]
+        for patch in self.patches:
+            patch.start()
+        app = FastAPI()
+        app.include_router(tarifliste.router)
+        self.client = TestClient(app)
+
+    def tearDown(self):
+        for patch in reversed(self.patches):
+            patch.stop()
+        self.tmp.cleanup()
+
+    def test_body_and_rows(self):
+        data = self.client.get('/tarifliste', params={'rows': 5}).json()
+        self.assertEqual(len(data['tariffs']), 5)
+        self.assertEqual(data['tariffs'][4], {'stromanbieter': 'Anbieter 4', 'tarifname': 'Tarif 4',
+                                              'tarifart': 'Bezug', 'preisanpassung': 'monatlich',
+                                              'strompreis': '4 ct', 'kurzbeschreibung': 'kurz 4'})
+        self.assertEqual(data['metadata']['report_date'], '2025-03-01')
+        self.assertEqual(len(self.client.get('/tarifliste', params={'rows': 100}).json()['tariffs']), 30)
+
+    def test_parsed_once_until_file_changes(self):
+        with mock.patch.object(tarifliste, 'parse_markdown_table',
+                               wraps=tarifliste.parse_markdown_table) as parse:
+            for rows in (1, 5, 10, 5):
+                self.client.get('/tarifliste', params={'rows': rows})
+            self.assertEqual(parse.call_count, 1)
+
+            self.report.write_text(table(3, name='Neu'), encoding='utf-8')
+            st = self.report.stat()
+            os.utime(self.report, ns=(st.st_atime_ns, st.st_mtime_ns + 10 ** 9))
+            data = self.client.get('/tarifliste').json()
+            self.assertEqual(parse.call_count, 2)
+            self.assertEqual(data['tariffs'][0]['stromanbieter'], 'Neu 0')
+
+    def test_conditional_requests(self):
+        response = self.client.get('/tarifliste')
+        etag, last_modified = response.headers['etag'], response.headers['last-modified']
+        self.assertEqual(self.client.get('/tarifliste', headers={'If-None-Match': etag}).status_code, 304)
+        self.assertEqual(self.client.get('/tarifliste', headers={'If-Modified-Since': last_modified}).status_code, 304)
+        # A different rows value is a different representation
+        self.assertEqual(self.client.get('/tarifliste', params={'rows': 3},
+                                         headers={'If-None-Match': etag}).status_code, 200)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,143 @@
+import io
+import os
+import sys
+from contextlib import redirect_stdout
+import tempfile
+from pathlib import Path
+import unittest
+from unittest import mock
+
+project_root = Path(__file__).parents[1]
+sys.path.append(str(project_root))
+
+import llm_analyze
+from utils.llm_client import LLMTaskResult
+from utils.text_chunks import count_tokens, estimate_tokens, merge_partials, split_text
+
+class TestSplitText(unittest.TestCase):
+    def test_short_text_is_one_chunk(self):
+        self.assertEqual(split_text("Strom Fix 12,5 ct/kWh", 100), ["Strom Fix 12,5 ct/kWh"])
+
+    def test_paragraphs_then_sentences(self):
+        paragraphs = [f"Absatz {i}. " + "Ein Satz über Tarife. " * 20 for i in range(6)]
+        text = "\n\n".join(paragraphs)
+        chunks = split_text(text, 150)
+        self.assertEqual(''.join(chunks), text)
+        self.assertTrue(all(count_tokens(c) <= 150 for c in chunks))
+        # Paragraphs fit on their own, so every chunk starts at one
+        self.assertTrue(all(c.startswith("Absatz") for c in chunks))
+
+        # A single flattened paragraph falls back to sentences
+        flat = " ".join(p.strip() for p in paragraphs)
+        chunks = split_text(flat, 100)
+        self.assertEqual(''.join(chunks), flat)
+        self.assertTrue(all(c.rstrip().endswith('.') for c in chunks))
+
+    def test_report_sections(self):
+        report = ''.join(f"-- Stromanbieter: A{i}\n" + "Tarif X 10 ct/kWh\n" * 10 + "\n" for i in range(5))
+        chunks = split_text(report, 2 * count_tokens(report) // 5)
+        self.assertGreater(len(chunks), 1)
+        self.assertTrue(all(c.startswith("-- Stromanbieter:") for c in chunks))
+        self.assertEqual(''.join(chunks), report)
+
+    def test_no_separators(self):
+        text = "x" * 1000
+        chunks = split_text(text, 50)
+        self.assertEqual(''.join(chunks), text)
+        self.assertTrue(all(count_tokens(c) <= 50 for c in chunks))
+
+    def test_estimate(self):
+        self.assertEqual(estimate_tokens("Tarif"), 2)
+        self.assertEqual(estimate_tokens("12,5 ct/kWh"), 6)
+        # About 4 characters per token on plain text, never the len/4 undercount for numbers
+        self.assertGreater(estimate_tokens("1234567890" * 10), 100 / 4)
+
+    def test_merge_partials(self):
+        parts = ["| A | B |\n|---|---|\n| x | 1 |", None, "| A | B |\n|---|---|\n| y | 2 |"]
+        self.assertEqual(merge_partials(parts), "| A | B |\n|---|---|\n| x | 1 |\n| y | 2 |")
+
+class FakeExecutor:
+    """Answers every task with the tariff lines found in its context; prompts containing fail fail."""
+    def __init__(self, fail=None):
+        self.prompts = []
+        self.fail = fail
+
+    def map(self, tasks, on_result=None):
+        outcomes = []
+        for task in tasks:
+            self.prompts.append(task.prompt)
+            query, context = task.prompt.split('\n\n', 1)
+            lines = [l for l in context.splitlines() if 'ct/kWh' in l or l.startswith('Stand')]
+            if self.fail and self.fail in task.prompt:
+                outcome = LLMTaskResult(task=task, error='HTTP 500: down', attempts=1)
+            else:
+                outcome = LLMTaskResult(task=task, result='\n'.join(lines) or 'nichts', attempts=1)
+            if on_result:
+                on_result(outcome)
+            outcomes.append(outcome)
+        return outcomes
+
+class TestMapReduce(unittest.TestCase):
+    def setUp(self):
+        self.cwd = os.getcwd()
+        self.tmp = tempfile.TemporaryDirectory()
+        os.chdir(self.tmp.name)
+        Path('data/crawls').mkdir(parents=True)
+        queries = {'Q': [{"QUERY": "Extrahiere."}], 'MERGE': [{"QUERY": "Vereinheitliche."}]}
+        for patch in (mock.patch.dict(llm_analyze.QUERY_CONFIG, queries),
+                      mock.patch.object(llm_analyze, 'register_artifact')):
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        self.tmp.cleanup()
+
+    def test_tables_at_the_bottom_are_kept(self):
+        filler = "\n".join(f"Navigation Punkt {i} Impressum Kontakt Newsletter" for i in range(400))
+        text = f"Energieanbieter: Lang\n{filler}\n| Strom Fix | 12,5 ct/kWh |\n| Strom Flex | 9,9 ct/kWh |"
+        Path('data/crawls/crawl_Lang_Bezug_20250101_000000.txt').write_text(text, encoding='utf-8')
+        Path('data/crawls/crawl_Kurz_Bezug_20250101_000000.txt').write_text(
+            "Energieanbieter: Kurz\n| Kurz Tarif | 11 ct/kWh |", encoding='utf-8')
+
+        executor = FakeExecutor()
+        path = llm_analyze.llmanalyze_files(llm_model='m', query_to_use='Q', maxtokens=1000,
+                                            use_cache=False, executor=executor)
+        report = Path(path).read_text(encoding='utf-8')
+        self.assertGreater(len(executor.prompts), 2)
+        self.assertTrue(all(count_tokens(p) <= 1000 + 10 for p in executor.prompts))
+        self.assertIn("| Strom Fix | 12,5 ct/kWh |\n| Strom Flex | 9,9 ct/kWh |", report)
+        self.assertTrue(any("Energieanbieter: Lang (Teil 2/" in p for p in executor.prompts))
+        self.assertIn("-- Stromanbieter: Kurz\n| Kurz Tarif | 11 ct/kWh |", report)
+
+    def test_file_with_failed_chunk_is_left_out(self):
+        filler = "\n".join(f"Navigation Punkt {i} Impressum Kontakt Newsletter" for i in range(400))
+        Path('data/crawls/crawl_Lang_Bezug_20250101_000000.txt').write_text(
+            f"Energieanbieter: Lang\n| Strom Fix | 12,5 ct/kWh |\n{filler}", encoding='utf-8')
+        Path('data/crawls/crawl_Kurz_Bezug_20250101_000000.txt').write_text(
+            "Energieanbieter: Kurz\n| Kurz Tarif | 11 ct/kWh |", encoding='utf-8')
+
+        out = io.StringIO()
+        with redirect_stdout(out):
+            path = llm_analyze.llmanalyze_files(llm_model='m', query_to_use='Q', maxtokens=1000, use_cache=False,
+                                                executor=FakeExecutor(fail="Lang (Teil 2/"))
+        report = Path(path).read_text(encoding='utf-8')
+        self.assertNotIn("Lang", report)
+        self.assertIn("-- Stromanbieter: Kurz", report)
+        self.assertRegex(out.getvalue(), r"crawl_Lang_Bezug_20250101_000000\.txt: 1 of \d+ chunks failed")
+
+    def test_hierarchical_solidify(self):
+        sections = ''.join(f"-- Stromanbieter: A{i}\n" + "Beschreibung ohne Preis\n" * 30 +
+                           f"Tarif {i}: {10 + i} ct/kWh\n\n" for i in range(8))
+        Path('data/crawls/report_x.txt').write_text(sections, encoding='utf-8')
+        executor = FakeExecutor()
+        solid = llm_analyze.solidify_report('data/crawls/report_x.txt', query_to_use='MERGE',
+                                            llm_model='m', max_tokens=400, use_cache=False,
+                                            executor=executor)
+        result = Path(solid).read_text(encoding='utf-8')
+        # Several parts on the first level, then one request over their answers
+        self.assertGreater(len(executor.prompts), 2)
+        self.assertEqual(result, '\n'.join(f"Tarif {i}: {10 + i} ct/kWh" for i in range(8)))
+
+if __name__ == '__main__':
+    unittest.main()
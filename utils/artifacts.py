@@ -0,0 +1,170 @@
+# utils/artifacts.py
+# Registry of the latest generated artifacts (charts, reports). Producers
+# record what they wrote in a small JSON manifest next to the database; the
+# API resolves "latest" from an in-memory copy that is reloaded only when
+# the manifest file changes.
+import json
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Iterator, Optional
+from config import CONFIG
+
+try:
+    import fcntl
+except ImportError:  # not on Windows; writers are then not serialized
+    fcntl = None
+
+CHART_SINGLEDAY = 'chart:singleday'
+CHART_RANGE = 'chart:range'
+
+
+def report_kind(ending: str) -> str:
+    """Artifact kind of solidified reports written with the given file ending."""
+    return f'report:{ending}'
+
+
+def manifest_path() -> Path:
+    return CONFIG['db_path'] / CONFIG.get('artifact_manifest', 'artifacts.json')
+
+
+@dataclass
+class Artifact:
+    kind: str
+    path: Path
+    updated_at: float
+    meta: dict = field(default_factory=dict)
+
+
+def _read_manifest(path: Path) -> dict:
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+    except json.JSONDecodeError:
+        print(f"Warning: artifact manifest {path} is not valid JSON, ignoring it.")
+        return {}
+
+
+@contextmanager
+def _locked(manifest: Path) -> Iterator[None]:
+    """Exclusive lock on a sidecar file, held across read-modify-replace of manifest."""
+    if fcntl is None:
+        yield
+        return
+    with open(manifest.with_name(manifest.name + '.lock'), 'a') as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+def register_artifact(kind: str, path, manifest: Optional[Path] = None, **meta) -> Artifact:
+    """
+    Record path as the latest artifact of kind.
+
+    The manifest is rewritten through a temp file and os.replace, so readers
+    always see either the old or the new version. Writers hold an exclusive
+    lock on a sidecar .lock file while reading and replacing it, so
+    concurrent producers do not drop each other's entries. Paths below the
+    manifest directory are stored relative to it.
+
+    Args:
+        kind: Artifact kind, e.g. CHART_SINGLEDAY
+        path: File that was just written
+        manifest: Manifest file, defaults to manifest_path()
+        **meta: Extra JSON-serializable fields stored with the entry
+
+    Returns:
+        The registered Artifact
+    """
+    manifest = Path(manifest or manifest_path())
+    manifest.parent.mkdir(parents=True, exist_ok=True)
+    path = Path(path).resolve()
+    try:
+        stored = str(path.relative_to(manifest.parent.resolve()))
+    except ValueError:
+        stored = str(path)
+
+    artifact = Artifact(kind=kind, path=path, updated_at=time.time(), meta=meta)
+    with _locked(manifest):
+        entries = _read_manifest(manifest)
+        entries[kind] = {'path': stored, 'updated_at': artifact.updated_at, 'meta': meta}
+
+        fd, tmp = tempfile.mkstemp(dir=manifest.parent, prefix='.artifacts', suffix='.tmp')
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(entries, f, indent=2)
+        os.replace(tmp, manifest)
+    return artifact
+
+
+class ArtifactIndex:
+    """
+    In-memory view of the artifact manifest.
+
+    Each lookup costs one stat() of the manifest; it is re-read only when
+    its mtime or size changed. Entries whose file is missing are dropped on
+    that reload, not checked per lookup. File contents are cached per entry
+    and dropped when the entry is replaced.
+    """
+
+    def __init__(self, manifest: Optional[Path] = None):
+        self._manifest = manifest
+        self._signature = None
+        self._entries: dict[str, Artifact] = {}
+        self._content: dict[str, tuple[Artifact, bytes]] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def manifest(self) -> Path:
+        return Path(self._manifest or manifest_path())
+
+    def _refresh(self):
+        manifest = self.manifest
+        try:
+            st = manifest.stat()
+            signature = (str(manifest), st.st_mtime_ns, st.st_size)
+        except FileNotFoundError:
+            signature = None
+        if signature == self._signature:
+            return
+
+        with self._lock:
+            entries = {}
+            for kind, entry in _read_manifest(manifest).items() if signature else ():
+                path = Path(entry['path'])
+                if not path.is_absolute():
+                    path = manifest.parent / path
+                if not path.exists():
+                    continue
+                entries[kind] = Artifact(kind=kind, path=path, updated_at=entry['updated_at'],
+                                         meta=entry.get('meta', {}))
+            self._entries = entries
+            self._content = {k: v for k, v in self._content.items() if entries.get(k) == v[0]}
+            self._signature = signature
+
+    def latest(self, kind: str) -> Optional[Artifact]:
+        """Latest artifact of kind, or None if none is registered or its file was gone at the last reload."""
+        self._refresh()
+        return self._entries.get(kind)
+
+    def read(self, kind: str) -> Optional[tuple[Artifact, bytes]]:
+        """Latest artifact of kind with its content, read from disk once per version."""
+        artifact = self.latest(kind)
+        if artifact is None:
+            return None
+        cached = self._content.get(kind)
+        if cached is not None and cached[0] == artifact:
+            return cached
+        try:
+            cached = (artifact, artifact.path.read_bytes())
+        except FileNotFoundError:
+            return None
+        self._content[kind] = cached
+        return cached
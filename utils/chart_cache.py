@@ -0,0 +1,93 @@
+# utils/chart_cache.py
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Callable, Optional
+from utils.result_cache import LRUCache
+
+
+class ChartCache:
+    """
+    Two level cache for rendered charts: an in-memory LRU in front of a
+    directory of files named after the key.
+
+    Keys are content addresses (a hash of the render parameters and the
+    data version), so entries never go stale; a changed input simply
+    produces a new key. The directory is pruned to max_files and
+    max_disk_bytes, oldest first. The files on disk are scanned once; after
+    that an in-memory index with their sizes keeps the totals.
+    """
+
+    def __init__(self, directory: Path, max_entries: int = 64,
+                 max_bytes: int = 8 * 1024 * 1024, max_files: int = 512,
+                 max_disk_bytes: int = 64 * 1024 * 1024, suffix: str = '.svg'):
+        self.directory = Path(directory)
+        self.max_files = max_files
+        self.max_disk_bytes = max_disk_bytes
+        self.suffix = suffix
+        self.memory = LRUCache(max_entries, max_bytes, sizeof=len)
+        self.renders = 0
+        self._files: Optional[OrderedDict] = None   # key -> size, oldest first
+        self._disk_bytes = 0
+        self._lock = threading.Lock()
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{key}{self.suffix}"
+
+    def get(self, key: str) -> Optional[bytes]:
+        content = self.memory.get(key)
+        if content is not None:
+            return content
+        try:
+            content = self._path(key).read_bytes()
+        except FileNotFoundError:
+            return None
+        self.memory.put(key, content)
+        return content
+
+    def put(self, key: str, content: bytes) -> None:
+        self.memory.put(key, content)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        # Write to a temp file and rename, so readers never see partial files
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        with os.fdopen(fd, 'wb') as f:
+            f.write(content)
+        os.replace(tmp, self._path(key))
+        with self._lock:
+            files = self._index()
+            self._disk_bytes -= files.pop(key, 0)
+            files[key] = len(content)
+            self._disk_bytes += len(content)
+            self._prune()
+
+    def get_or_render(self, key: str, render: Callable[[], bytes]) -> bytes:
+        content = self.get(key)
+        if content is None:
+            content = render()
+            self.renders += 1
+            self.put(key, content)
+        return content
+
+    def _index(self) -> OrderedDict:
+        """Files on disk by age; scans the directory on first use only."""
+        if self._files is None:
+            entries = []
+            for f in self.directory.glob(f"*{self.suffix}"):
+                try:
+                    stat = f.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, f.name[:-len(self.suffix)], stat.st_size))
+            entries.sort()
+            self._files = OrderedDict((key, size) for _, key, size in entries)
+            self._disk_bytes = sum(self._files.values())
+        return self._files
+
+    def _prune(self) -> None:
+        files = self._files
+        while len(files) > 1 and (len(files) > self.max_files or self._disk_bytes > self.max_disk_bytes):
+            key, size = files.popitem(last=False)
+            self._disk_bytes -= size
+            self._path(key).unlink(missing_ok=True)
@@ -0,0 +1,97 @@
+# utils/crawl_manifest.py
+# What the crawler last saw per crawl target (crawl_<Anbieter>_<Typ>): HTTP
+# validators for conditional requests, the hash of the cleaned text and the
+# file holding the current content. Unchanged pages are not rewritten, and
+# the LLM stage analyzes only the current file of each target.
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Optional
+
+MANIFEST_NAME = 'manifest.json'
+
+
+def content_hash(text: str) -> str:
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+class CrawlManifest:
+    """
+    JSON manifest in the crawl directory, one entry per crawl target:
+
+        {"url", "etag", "last_modified", "hash", "file", "checked_at", "changed_at"}
+
+    Updates are thread-safe and kept in memory until save(), which
+    replaces the file atomically.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            data = {}
+        except json.JSONDecodeError:
+            print(f"Warning: crawl manifest {self.path} is not valid JSON, ignoring it.")
+            data = {}
+        self.entries: dict = data.get('entries', {})
+
+    @classmethod
+    def for_dir(cls, crawl_dir: Path) -> 'CrawlManifest':
+        return cls(Path(crawl_dir) / MANIFEST_NAME)
+
+    def get(self, key: str) -> dict:
+        return self.entries.get(key, {})
+
+    def conditional_headers(self, key: str, url: str) -> dict:
+        """If-None-Match / If-Modified-Since for the last response of key, if it was for url."""
+        entry = self.get(key)
+        if entry.get('url') != url:
+            return {}
+        headers = {}
+        if entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if entry.get('last_modified'):
+            headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    def latest_file(self, key: str, crawl_dir: Path) -> Optional[Path]:
+        """File holding the current content of key, None if it is gone."""
+        name = self.get(key).get('file')
+        if not name or not (Path(crawl_dir) / name).exists():
+            return None
+        return Path(crawl_dir) / name
+
+    def checked(self, key: str, url: str, etag: Optional[str] = None,
+                last_modified: Optional[str] = None):
+        """Record an unchanged check of key."""
+        with self._lock:
+            entry = self.entries.setdefault(key, {})
+            entry['url'] = url
+            entry['checked_at'] = time.time()
+            if etag:
+                entry['etag'] = etag
+            if last_modified:
+                entry['last_modified'] = last_modified
+
+    def changed(self, key: str, url: str, digest: str, file: str,
+                etag: Optional[str] = None, last_modified: Optional[str] = None):
+        """Record new content of key, stored in file."""
+        with self._lock:
+            now = time.time()
+            self.entries[key] = {'url': url, 'etag': etag, 'last_modified': last_modified,
+                                 'hash': digest, 'file': file, 'checked_at': now, 'changed_at': now}
+
+    def save(self):
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=self.path.parent, prefix='.manifest', suffix='.tmp')
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump({'entries': self.entries}, f, indent=2)
+            os.replace(tmp, self.path)
@@ -0,0 +1,167 @@
+# utils/crawler.py
+# Concurrent fetching of provider pages through the crawler proxies in
+# CRAWL_CONFIG. Politeness is enforced per proxy and per target host, so
+# requests to different hosts run in parallel while each host (and each
+# proxy) still sees at most one request per interval.
+import threading
+import time
+import urllib.parse
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Mapping, Optional
+import requests
+from requests.adapters import HTTPAdapter
+
+# Minimum seconds between two requests to the same target host
+HOST_INTERVAL = 2.0
+# Used for proxies whose CRAWL_CONFIG entry has no 'min_interval'
+PROXY_INTERVAL = 2.0
+TIMEOUT = 60
+
+
+class IntervalLimiter:
+    """
+    Spaces out calls per key by at least the key's interval.
+
+    A call can be bound by several keys (proxy and host). wait() reserves
+    one start time that is free for all of them under a lock and sleeps
+    outside it, so waiting on one key never blocks other keys.
+    """
+
+    def __init__(self, clock: Callable[[], float] = time.monotonic,
+                 sleep: Callable[[float], None] = time.sleep):
+        self.clock = clock
+        self.sleep = sleep
+        self._next: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def reserve(self, intervals: Mapping[str, float]) -> float:
+        """
+        Seconds to wait before a call bound by every key of intervals may
+        start. The call starts at the latest next-free time of its keys,
+        and each key's next slot is counted from that start.
+        """
+        with self._lock:
+            now = self.clock()
+            start = max([now] + [self._next.get(key, now) for key in intervals])
+            for key, interval in intervals.items():
+                self._next[key] = start + interval
+            return start - now
+
+    def wait(self, intervals: Mapping[str, float]) -> float:
+        delay = self.reserve(intervals)
+        if delay > 0:
+            self.sleep(delay)
+        return delay
+
+
+@dataclass
+class CrawlJob:
+    url: str
+    crawler: str
+    prefix: str
+    bearer: str = ''
+    proxy_interval: float = PROXY_INTERVAL
+    headers: dict = field(default_factory=dict)  # extra request headers, e.g. validators
+
+    @property
+    def host(self) -> str:
+        return urllib.parse.urlsplit(self.url).netloc.lower()
+
+    @property
+    def crawl_url(self) -> str:
+        return f"{self.prefix}{urllib.parse.quote_plus(self.url)}"
+
+
+@dataclass
+class CrawlResult:
+    job: CrawlJob
+    response: Optional[requests.Response] = None
+    error: Optional[Exception] = None
+    seconds: float = 0.0
+    changed: Optional[bool] = None   # set by whoever stores the result
+    path: Optional[Path] = None
+
+    @property
+    def not_modified(self) -> bool:
+        return self.response is not None and self.response.status_code == 304
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+def crawl_job(name: str, url: str, crawl_config: dict) -> Optional[CrawlJob]:
+    """CrawlJob for url through the proxy name of crawl_config, None if it is not configured."""
+    entries = crawl_config.get(name) or []
+    if not entries:
+        return None
+    entry = entries[0]
+    return CrawlJob(url=url, crawler=name, prefix=entry.get('PREFIX', ''),
+                    bearer=entry.get('Bearer', ''),
+                    proxy_interval=float(entry.get('min_interval', PROXY_INTERVAL)))
+
+
+class Crawler:
+    """
+    Thread pool crawler with pooled keep-alive connections.
+
+    Each worker thread keeps one requests.Session, so connections to a
+    proxy are reused across jobs.
+    """
+
+    def __init__(self, max_workers: int = 8, host_interval: float = HOST_INTERVAL,
+                 timeout: float = TIMEOUT, limiter: Optional[IntervalLimiter] = None):
+        self.max_workers = max_workers
+        self.host_interval = host_interval
+        self.timeout = timeout
+        self.limiter = limiter or IntervalLimiter()
+        self._local = threading.local()
+
+    def session(self) -> requests.Session:
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=4)
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            self._local.session = session
+        return session
+
+    def fetch(self, job: CrawlJob) -> CrawlResult:
+        """Fetch one job, waiting for its proxy and host slots first."""
+        self.limiter.wait({f"proxy:{job.crawler}": job.proxy_interval,
+                           f"host:{job.host}": self.host_interval})
+        headers = dict(job.headers)
+        if job.bearer:
+            headers['Authorization'] = f'Bearer {job.bearer}'
+        started = time.monotonic()
+        try:
+            response = self.session().get(job.crawl_url, headers=headers, timeout=self.timeout)
+            response.raise_for_status()
+            return CrawlResult(job=job, response=response, seconds=time.monotonic() - started)
+        except requests.exceptions.RequestException as e:
+            return CrawlResult(job=job, error=e, seconds=time.monotonic() - started)
+
+    def run(self, jobs: Iterable[CrawlJob],
+            on_result: Optional[Callable[[CrawlResult], None]] = None) -> List[CrawlResult]:
+        """
+        Fetch all jobs concurrently.
+
+        Args:
+            jobs: Jobs to fetch
+            on_result: Called in the worker thread with every result, e.g.
+                to write it to disk while other jobs are still running
+
+        Returns:
+            Results in the order of jobs
+        """
+        def work(job):
+            result = self.fetch(job)
+            if on_result is not None:
+                on_result(result)
+            return result
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            return list(pool.map(work, jobs))
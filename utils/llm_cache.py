@@ -0,0 +1,57 @@
+# utils/llm_cache.py
+# Persistent cache of LLM answers. An answer depends only on the model, the
+# query and the text sent, so it is stored under a hash of exactly those
+# and reused until one of them changes.
+import hashlib
+import json
+import os
+import tempfile
+import time
+from pathlib import Path
+from typing import Optional
+
+
+def prompt_hash(prompt: str, context: Optional[str] = None) -> str:
+    digest = hashlib.sha256(prompt.encode('utf-8'))
+    digest.update(b'\0')
+    digest.update((context or '').encode('utf-8'))
+    return digest.hexdigest()
+
+
+class LLMResultCache:
+    """
+    One JSON file per answer in directory, named by the hash of
+    (model, query name, prompt_hash(prompt, context)). Files are written
+    atomically, so concurrent writers never leave partial entries.
+    """
+
+    def __init__(self, directory: Path = Path('data/llm_cache')):
+        self.directory = Path(directory)
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(model: str, query_name: str, prompt: str, context: Optional[str] = None) -> str:
+        parts = json.dumps([model, query_name, prompt_hash(prompt, context)])
+        return hashlib.sha256(parts.encode('utf-8')).hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{key}.json"
+
+    def get(self, key: str) -> Optional[str]:
+        try:
+            with open(self._path(key), 'r', encoding='utf-8') as f:
+                result = json.load(f)['result']
+        except (FileNotFoundError, json.JSONDecodeError, KeyError):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return result
+
+    def put(self, key: str, result: str, **meta):
+        """Store result under key; meta (model, query, source file, ...) is kept for inspection."""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump({'result': result, 'created_at': time.time(), **meta}, f, ensure_ascii=False)
+        os.replace(tmp, self._path(key))
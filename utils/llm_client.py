@@ -0,0 +1,237 @@
+# utils/llm_client.py
+# Concurrent requests to the LLM providers in LLM_CONFIG: persistent HTTP
+# sessions, a token bucket per provider, retries with exponential backoff
+# on 429/5xx and connection errors, and per-task failures instead of
+# aborting a whole run.
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Sequence
+import requests
+from requests.adapters import HTTPAdapter
+
+# Defaults for LLM_CONFIG entries without 'RPM' / 'MAX_CONCURRENCY'
+DEFAULT_RPM = 60
+DEFAULT_CONCURRENCY = 4
+TIMEOUT = 120
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+
+class LLMError(Exception):
+    pass
+
+
+class TokenBucket:
+    """
+    Allows `rate` acquisitions per second on average with bursts of up to
+    `capacity`. acquire() blocks until a token is available.
+    """
+
+    def __init__(self, rate: float, capacity: float = 1.0,
+                 clock: Callable[[], float] = time.monotonic,
+                 sleep: Callable[[float], None] = time.sleep):
+        self.rate = rate
+        self.capacity = capacity
+        self.clock = clock
+        self.sleep = sleep
+        self._tokens = capacity
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """Take a token, possibly from the future; returns the seconds to wait for it."""
+        with self._lock:
+            now = self.clock()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            return 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+
+    def acquire(self) -> float:
+        delay = self.reserve()
+        if delay > 0:
+            self.sleep(delay)
+        return delay
+
+
+@dataclass
+class LLMProvider:
+    """One LLM_CONFIG entry with its API key resolved."""
+    name: str
+    base_url: str
+    model: str
+    api_key: str
+    rpm: float = DEFAULT_RPM
+    max_concurrency: int = DEFAULT_CONCURRENCY
+
+    @classmethod
+    def from_config(cls, name: str, llm_config: dict, passwords: dict) -> 'LLMProvider':
+        entries = llm_config.get(name)
+        if not entries:
+            raise LLMError(f"No configuration found for LLM model: {name}")
+        entry = entries[0]
+        api_key = passwords.get(entry.get("APIKEY"))
+        if not api_key:
+            raise LLMError(f"No API key found for {entry.get('APIKEY')}")
+        return cls(name=name, base_url=entry.get("BASEURL", '').rstrip('/'), model=entry.get("MODEL"),
+                   api_key=api_key, rpm=float(entry.get("RPM", DEFAULT_RPM)),
+                   max_concurrency=int(entry.get("MAX_CONCURRENCY", DEFAULT_CONCURRENCY)))
+
+    @property
+    def completions_api(self) -> bool:
+        # amp1 serves the plain completions API, everybody else chat completions
+        return 'amp1' in self.name
+
+    def request(self, prompt: str):
+        """URL, headers and JSON body for prompt."""
+        headers = {"Content-Type": "application/json"}
+        if self.completions_api:
+            return f"{self.base_url}/v1/completions", headers, {"prompt": prompt, "model": self.model}
+        headers['Authorization'] = f'Bearer {self.api_key}'
+        return (f"{self.base_url}/chat/completions", headers,
+                {"model": self.model, "messages": [{"role": "user", "content": prompt}]})
+
+    def parse(self, payload: dict) -> str:
+        if self.completions_api:
+            return payload['choices'][0]['text']
+        return payload['choices'][0]['message']['content']
+
+
+@dataclass
+class LLMTask:
+    key: str            # caller's identifier, e.g. the crawl file
+    provider: str       # LLM_CONFIG name
+    prompt: str
+
+
+@dataclass
+class LLMTaskResult:
+    task: LLMTask
+    result: Optional[str] = None
+    error: Optional[str] = None
+    attempts: int = 0
+    seconds: float = 0.0
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+class LLMExecutor:
+    """
+    Runs LLM requests concurrently, within each provider's request rate
+    (token bucket of RPM per minute) and concurrency limit.
+
+    Each worker thread keeps one requests.Session per provider host, so
+    connections are reused across requests.
+    """
+
+    def __init__(self, llm_config: dict, passwords: dict, max_workers: int = 8,
+                 timeout: float = TIMEOUT, max_retries: int = 4, backoff: float = 1.0,
+                 max_backoff: float = 60.0, sleep: Callable[[float], None] = time.sleep):
+        self.llm_config = llm_config
+        self.passwords = passwords
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.sleep = sleep
+        self._providers: Dict[str, LLMProvider] = {}
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._slots: Dict[str, threading.Semaphore] = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def provider(self, name: str) -> LLMProvider:
+        with self._lock:
+            provider = self._providers.get(name)
+            if provider is None:
+                provider = LLMProvider.from_config(name, self.llm_config, self.passwords)
+                self._providers[name] = provider
+                self._buckets[name] = TokenBucket(provider.rpm / 60.0, capacity=1.0, sleep=self.sleep)
+                self._slots[name] = threading.Semaphore(provider.max_concurrency)
+            return provider
+
+    def session(self) -> requests.Session:
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=8, pool_maxsize=8)
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            self._local.session = session
+        return session
+
+    def _delay(self, attempt: int, response: Optional[requests.Response]) -> float:
+        retry_after = response.headers.get('Retry-After') if response is not None else None
+        if retry_after:
+            try:
+                return min(float(retry_after), self.max_backoff)
+            except ValueError:
+                pass
+        delay = min(self.backoff * 2 ** attempt, self.max_backoff)
+        return delay * (0.5 + random.random() / 2)
+
+    def complete(self, provider_name: str, prompt: str) -> LLMTaskResult:
+        """Run one request, retrying transient failures; never raises."""
+        return self._run(LLMTask(key=provider_name, provider=provider_name, prompt=prompt))
+
+    def _run(self, task: LLMTask) -> LLMTaskResult:
+        started = time.monotonic()
+        outcome = LLMTaskResult(task=task)
+        try:
+            provider = self.provider(task.provider)
+        except LLMError as e:
+            outcome.error = str(e)
+            return outcome
+        url, headers, body = provider.request(task.prompt)
+
+        for attempt in range(self.max_retries + 1):
+            outcome.attempts = attempt + 1
+            response = None
+            with self._slots[task.provider]:
+                self._buckets[task.provider].acquire()
+                try:
+                    response = self.session().post(url, headers=headers, json=body, timeout=self.timeout)
+                except requests.exceptions.RequestException as e:
+                    outcome.error = f"{type(e).__name__}: {e}"
+            if response is not None:
+                if response.status_code < 400:
+                    try:
+                        outcome.result = provider.parse(response.json())
+                        outcome.error = None
+                    except (KeyError, IndexError, TypeError, ValueError) as e:
+                        outcome.error = f"Error parsing response from {task.provider}: {e!r}"
+                    break
+                outcome.error = f"HTTP {response.status_code}: {response.text[:200]}"
+                if response.status_code not in RETRY_STATUS:
+                    break
+            if attempt < self.max_retries:
+                self.sleep(self._delay(attempt, response))
+
+        outcome.seconds = time.monotonic() - started
+        return outcome
+
+    def map(self, tasks: Sequence[LLMTask],
+            on_result: Optional[Callable[[LLMTaskResult], None]] = None) -> List[LLMTaskResult]:
+        """
+        Run all tasks concurrently.
+
+        Args:
+            tasks: Requests to run, possibly for different providers
+            on_result: Called in the worker thread with every finished task
+
+        Returns:
+            Results in the order of tasks; failures have error set
+        """
+        def work(task):
+            outcome = self._run(task)
+            if on_result is not None:
+                on_result(outcome)
+            return outcome
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            return list(pool.map(work, tasks))
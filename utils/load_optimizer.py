@@ -0,0 +1,144 @@
+# utils/load_optimizer.py
+# When to run loads: cheapest contiguous windows for appliances that run
+# uninterrupted, and cheapest individual slots for loads that can be split
+# (EV charging, heat pumps). Works on epoch-second/price NumPy arrays and
+# answers many appliance profiles with shared intermediate results.
+import math
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence
+import numpy as np
+
+
+@dataclass
+class ApplianceProfile:
+    """
+    A load to schedule.
+
+    kind 'window' runs for duration_hours without interruption; kind 'slots'
+    needs energy_kwh at up to max_power_kw in any slots. earliest/latest
+    (epoch seconds) restrict when the load may run.
+    """
+    name: str
+    kind: str = 'window'
+    duration_hours: Optional[float] = None
+    energy_kwh: Optional[float] = None
+    max_power_kw: Optional[float] = None
+    earliest: Optional[int] = None
+    latest: Optional[int] = None
+
+
+@dataclass
+class Schedule:
+    name: str
+    start_timestamp: int
+    end_timestamp: int
+    avg_price: float
+    cost: Optional[float] = None           # price unit x kWh, e.g. ct
+    slots: List[dict] = field(default_factory=list)
+
+
+def _bounds(timestamps: np.ndarray, step: int, earliest: Optional[int], latest: Optional[int]):
+    """Index range of slots lying completely inside [earliest, latest]."""
+    lo = 0 if earliest is None else int(np.searchsorted(timestamps, earliest, side='left'))
+    hi = len(timestamps) if latest is None else int(np.searchsorted(timestamps, latest - step, side='right'))
+    return lo, max(lo, hi)
+
+
+class PriceSeries:
+    """
+    Prices prepared for repeated queries: prefix sums for window costs,
+    one stable sort for slot selection and a gap marker so windows never
+    span missing slots.
+    """
+
+    def __init__(self, timestamps: np.ndarray, prices: np.ndarray, step: int):
+        self.timestamps = np.asarray(timestamps, dtype=np.int64)
+        self.prices = np.asarray(prices, dtype=np.float64)
+        self.step = step
+        self.cumsum = np.concatenate(([0.0], np.cumsum(self.prices)))
+        # Number of gaps before each slot; a window is contiguous if it has none inside
+        gaps = np.diff(self.timestamps) != step
+        self.gap_count = np.concatenate(([0], np.cumsum(gaps)))
+        self.order = np.argsort(self.prices, kind='stable')
+        self._window_sums: Dict[int, np.ndarray] = {}
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
+
+    def window_sums(self, slots: int) -> np.ndarray:
+        """Sum of every window of `slots` slots by start index, inf where it spans a gap."""
+        sums = self._window_sums.get(slots)
+        if sums is None:
+            sums = self.cumsum[slots:] - self.cumsum[:-slots]
+            sums[self.gap_count[slots - 1:] != self.gap_count[:len(self) - slots + 1]] = np.inf
+            self._window_sums[slots] = sums
+        return sums
+
+    def cheapest_window(self, duration_hours: float, earliest: Optional[int] = None,
+                        latest: Optional[int] = None, name: str = 'window',
+                        energy_kwh: Optional[float] = None) -> Optional[Schedule]:
+        """
+        Cheapest contiguous run of duration_hours inside [earliest, latest].
+
+        Returns:
+            Schedule of the window, None if no gap-free window fits
+        """
+        slots = max(int(round(duration_hours * 3600 / self.step)), 1)
+        lo, hi = _bounds(self.timestamps, self.step, earliest, latest)
+        if hi - lo < slots:
+            return None
+        sums = self.window_sums(slots)[lo:hi - slots + 1]
+        best = int(np.argmin(sums))
+        if not np.isfinite(sums[best]):
+            return None
+        start = int(self.timestamps[lo + best])
+        avg = float(sums[best] / slots)
+        return Schedule(name=name, start_timestamp=start, end_timestamp=start + slots * self.step,
+                        avg_price=avg, cost=None if energy_kwh is None else avg * energy_kwh)
+
+    def cheapest_slots(self, energy_kwh: float, max_power_kw: float,
+                       earliest: Optional[int] = None, latest: Optional[int] = None,
+                       name: str = 'slots') -> Optional[Schedule]:
+        """
+        Cheapest set of (not necessarily adjacent) slots delivering energy_kwh
+        at up to max_power_kw. All chosen slots run at full power except the
+        most expensive one, which takes the remainder.
+
+        Returns:
+            Schedule with the chosen slots in time order, None if the
+            available slots cannot deliver the energy
+        """
+        per_slot = max_power_kw * self.step / 3600
+        needed = math.ceil(energy_kwh / per_slot - 1e-9)
+        lo, hi = _bounds(self.timestamps, self.step, earliest, latest)
+        if needed > hi - lo:
+            return None
+        order = self.order
+        if lo > 0 or hi < len(self):
+            order = order[(order >= lo) & (order < hi)]
+        chosen = order[:needed]
+
+        energy = np.full(needed, per_slot)
+        energy[-1] = energy_kwh - per_slot * (needed - 1)
+        cost = float(np.dot(self.prices[chosen], energy))
+        in_time = np.argsort(chosen)
+        chosen, energy = chosen[in_time], energy[in_time]
+        slots = [{'start_timestamp': int(self.timestamps[i]), 'price': float(self.prices[i]),
+                  'energy_kwh': float(e)} for i, e in zip(chosen, energy)]
+        return Schedule(name=name, start_timestamp=int(self.timestamps[chosen[0]]),
+                        end_timestamp=int(self.timestamps[chosen[-1]]) + self.step,
+                        avg_price=cost / energy_kwh, cost=cost, slots=slots)
+
+    def optimize(self, profiles: Sequence[ApplianceProfile]) -> List[Optional[Schedule]]:
+        """Schedules for many profiles; window sums are shared per duration."""
+        results = []
+        for profile in profiles:
+            if profile.kind == 'slots':
+                results.append(self.cheapest_slots(profile.energy_kwh, profile.max_power_kw,
+                                                   profile.earliest, profile.latest, profile.name))
+            elif profile.kind == 'window':
+                results.append(self.cheapest_window(profile.duration_hours, profile.earliest,
+                                                    profile.latest, profile.name, profile.energy_kwh))
+            else:
+                raise ValueError(f"Unknown profile kind: {profile.kind}")
+        return results
@@ -0,0 +1,307 @@
+# utils/price_kpis.py
+# KPI families from description/stats.md computed from one pass over the
+# price arrays. Calendar keys (hour, weekday, day, ISO week, month) are
+# derived once and every metric is a bincount over one of them.
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+import numpy as np
+
+DAY = 86400
+WEEKDAYS = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+
+# Peak: 8am-8pm on weekdays; day/night volatility uses the same hours
+PEAK_HOURS = (8, 20)
+# |z| above this, relative to the price profile of the hour, is an anomaly
+ANOMALY_Z = 3.0
+# Consumption that can be moved freely within a day, in hours
+SHIFTABLE_HOURS = 4
+
+
+def _round(value, digits=2):
+    value = float(value)
+    return None if np.isnan(value) else round(value, digits)
+
+
+def _pct_change(new, old):
+    if old is None or new is None or old == 0:
+        return None
+    return round((new - old) / abs(old) * 100, 2)
+
+
+@dataclass
+class _Groups:
+    """Count, sum and sum of squares per key, from a single bincount each."""
+    count: np.ndarray
+    total: np.ndarray
+    squares: np.ndarray
+    offset: int = 0
+
+    @classmethod
+    def of(cls, keys: np.ndarray, values: np.ndarray, offset: int = 0, size: int = 0) -> '_Groups':
+        keys = keys - offset
+        size = max(size, int(keys.max()) + 1 if len(keys) else 0)
+        return cls(count=np.bincount(keys, minlength=size),
+                   total=np.bincount(keys, weights=values, minlength=size),
+                   squares=np.bincount(keys, weights=values * values, minlength=size),
+                   offset=offset)
+
+    @property
+    def mean(self) -> np.ndarray:
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return self.total / self.count
+
+    @property
+    def std(self) -> np.ndarray:
+        """Sample standard deviation (ddof=1), NaN for fewer than two values."""
+        with np.errstate(invalid='ignore', divide='ignore'):
+            var = (self.squares - self.total * self.total / self.count) / (self.count - 1)
+            var = np.where(self.count > 1, np.maximum(var, 0.0), np.nan)
+        return np.sqrt(var)
+
+
+def _std(values: np.ndarray) -> Optional[float]:
+    return _round(values.std(ddof=1)) if len(values) > 1 else None
+
+
+def _month_label(month: int) -> str:
+    return str(np.datetime64(int(month), 'M'))
+
+
+def _day_label(day: int) -> str:
+    return str(np.datetime64(int(day), 'D'))
+
+
+def compute_kpis(timestamps: np.ndarray, prices: np.ndarray,
+                 peak_hours: tuple[int, int] = PEAK_HOURS,
+                 reference_price: Optional[float] = None,
+                 shiftable_hours: int = SHIFTABLE_HOURS) -> Dict[str, Any]:
+    """
+    Volatility, peak/off-peak, pattern, trend and savings KPIs.
+
+    Args:
+        timestamps: Naive local datetime64 values, ascending
+        prices: Price per timestamp; NaN values are ignored
+        peak_hours: First and last (exclusive) peak hour on weekdays
+        reference_price: Fixed tariff to compare against, omitted if None
+        shiftable_hours: Hours per day of consumption that can be moved
+
+    Returns:
+        Dictionary with the sections volatility, peak_offpeak, patterns,
+        trends and savings. Prices are rounded to 2 decimals, time series
+        carry ISO dates for plotting.
+    """
+    seconds = np.asarray(timestamps).astype('datetime64[s]').astype(np.int64)
+    prices = np.asarray(prices, dtype=np.float64)
+    valid = ~np.isnan(prices)
+    seconds, prices = seconds[valid], prices[valid]
+    if not len(prices):
+        return {}
+
+    # Calendar keys, computed once and shared by all metrics
+    day = seconds // DAY
+    hour = (seconds % DAY) // 3600
+    weekday = (day + 3) % 7                      # 1970-01-01 was a Thursday
+    week = (day + 3) // 7                        # Monday based week ordinal
+    month = seconds.astype('datetime64[s]').astype('datetime64[M]').astype(np.int64)
+    is_weekend = weekday >= 5
+    is_day = (hour >= peak_hours[0]) & (hour < peak_hours[1])
+    is_peak = is_day & ~is_weekend
+
+    first_day, first_week, first_month = int(day[0]), int(week[0]), int(month[0])
+    by_hour = _Groups.of(hour, prices, size=24)
+    by_weekday = _Groups.of(weekday, prices, size=7)
+    by_day = _Groups.of(day, prices, offset=first_day)
+    by_week = _Groups.of(week, prices, offset=first_week)
+    by_month = _Groups.of(month, prices, offset=first_month)
+    peak_month = _Groups.of(month[is_peak], prices[is_peak], offset=first_month,
+                            size=len(by_month.count))
+    offpeak_month = _Groups.of(month[~is_peak], prices[~is_peak], offset=first_month,
+                               size=len(by_month.count))
+
+    overall_mean = prices.mean()
+    return {
+        'volatility': _volatility(prices, is_weekend, is_day, by_week, by_month, first_week, first_month),
+        'peak_offpeak': _peak_offpeak(prices, is_peak, peak_month, offpeak_month,
+                                      by_hour, first_month, peak_hours),
+        'patterns': _patterns(seconds, prices, hour, by_hour, by_weekday, month),
+        'trends': _trends(by_day, by_week, by_month, first_day, first_week, first_month),
+        'savings': _savings(prices, day, by_hour, overall_mean, reference_price, shiftable_hours),
+    }
+
+
+def _volatility(prices, is_weekend, is_day, by_week, by_month, first_week, first_month):
+    week_std = by_week.std
+    recent = [w for w in range(max(0, len(week_std) - 13), len(week_std)) if by_week.count[w]]
+    month_std = by_month.std
+    monthly = []
+    previous = None
+    for m in np.flatnonzero(by_month.count):
+        std = _round(month_std[m])
+        monthly.append({'month': _month_label(m + first_month), 'std': std,
+                        'change_pct': _pct_change(std, previous)})
+        previous = std
+
+    weekday_std, weekend_std = _std(prices[~is_weekend]), _std(prices[is_weekend])
+    day_std, night_std = _std(prices[is_day]), _std(prices[~is_day])
+    return {
+        'overall_std': _std(prices),
+        'weekly_std': [{'week_start': _day_label((w + first_week) * 7 - 3), 'std': _round(week_std[w])}
+                       for w in recent],
+        'weekday_std': weekday_std,
+        'weekend_std': weekend_std,
+        'weekend_vs_weekday_pct': _pct_change(weekend_std, weekday_std),
+        'day_std': day_std,
+        'night_std': night_std,
+        'night_vs_day_pct': _pct_change(night_std, day_std),
+        'monthly_std': monthly,
+    }
+
+
+def _peak_offpeak(prices, is_peak, peak_month, offpeak_month, by_hour, first_month, peak_hours):
+    peak_avg = _round(prices[is_peak].mean()) if is_peak.any() else None
+    offpeak_avg = _round(prices[~is_peak].mean()) if (~is_peak).any() else None
+    monthly = []
+    previous = None
+    peak_mean, offpeak_mean = peak_month.mean, offpeak_month.mean
+    for m in np.flatnonzero(peak_month.count + offpeak_month.count):
+        differential = _round(peak_mean[m] - offpeak_mean[m])
+        monthly.append({'month': _month_label(m + first_month),
+                        'peak_avg': _round(peak_mean[m]),
+                        'offpeak_avg': _round(offpeak_mean[m]),
+                        'differential': differential,
+                        'change_pct': _pct_change(differential, previous)})
+        previous = differential
+
+    hourly = by_hour.mean
+    hours = [h for h in np.argsort(hourly, kind='stable') if by_hour.count[h]]
+    return {
+        'peak_hours': list(peak_hours),
+        'peak_avg': peak_avg,
+        'offpeak_avg': offpeak_avg,
+        'ratio': round(peak_avg / offpeak_avg, 2) if peak_avg is not None and offpeak_avg else None,
+        'monthly': monthly,
+        'optimal_hours': [int(h) for h in hours[:3]],
+    }
+
+
+def _patterns(seconds, prices, hour, by_hour, by_weekday, month):
+    # Anomalies: prices far from the usual level of their hour of day
+    hour_mean, hour_std = by_hour.mean, by_hour.std
+    with np.errstate(invalid='ignore', divide='ignore'):
+        z = (prices - hour_mean[hour]) / hour_std[hour]
+    z = np.nan_to_num(z)
+    anomalous = np.flatnonzero(np.abs(z) > ANOMALY_Z)
+    top = anomalous[np.argsort(-np.abs(z[anomalous]), kind='stable')[:10]]
+
+    calendar_month = month % 12
+    seasonal = _Groups.of(calendar_month, prices, size=12)
+    return {
+        'hourly_profile': {int(h): _round(v) for h, v in enumerate(hour_mean) if by_hour.count[h]},
+        'weekday_profile': {WEEKDAYS[d]: _round(v) for d, v in enumerate(by_weekday.mean)
+                            if by_weekday.count[d]},
+        'seasonal_profile': {m + 1: _round(v) for m, v in enumerate(seasonal.mean) if seasonal.count[m]},
+        'anomalies': {
+            'count': int(len(anomalous)),
+            'pct': round(len(anomalous) / len(prices) * 100, 2),
+            'threshold_z': ANOMALY_Z,
+            'events': [{'timestamp': str(seconds[i].astype('datetime64[s]')),
+                        'price': _round(prices[i]), 'z': _round(z[i])} for i in sorted(top)],
+        },
+    }
+
+
+def _trends(by_day, by_week, by_month, first_day, first_week, first_month):
+    days = np.flatnonzero(by_day.count)
+    daily = by_day.mean[days]
+
+    # 7-day moving average over calendar days (days without data are skipped)
+    moving = None
+    if len(days) >= 7:
+        kernel = np.ones(7) / 7
+        ma = np.convolve(daily, kernel, mode='valid')
+        moving = {
+            'latest': _round(ma[-1]),
+            'week_ago': _round(ma[-8]) if len(ma) >= 8 else None,
+            'change_pct': _pct_change(_round(ma[-1]), _round(ma[-8])) if len(ma) >= 8 else None,
+            'series': [{'date': _day_label(d + first_day), 'value': _round(v)}
+                       for d, v in zip(days[6:][-90:], ma[-90:])],
+        }
+
+    weeks = np.flatnonzero(by_week.count)
+    weekly_mean = by_week.mean
+    short_term = [{'week_start': _day_label((w + first_week) * 7 - 3), 'avg': _round(weekly_mean[w])}
+                  for w in weeks[-13:]]
+
+    # Year over year: latest week and month against the same one a year earlier
+    yoy = {}
+    last_week = weeks[-1]
+    if last_week - 52 >= 0 and by_week.count[last_week - 52]:
+        now, before = _round(weekly_mean[last_week]), _round(weekly_mean[last_week - 52])
+        yoy['week'] = {'week_start': _day_label((last_week + first_week) * 7 - 3),
+                       'avg': now, 'previous_year_avg': before, 'change_pct': _pct_change(now, before)}
+    months = np.flatnonzero(by_month.count)
+    last_month = months[-1]
+    if last_month - 12 >= 0 and by_month.count[last_month - 12]:
+        now, before = _round(by_month.mean[last_month]), _round(by_month.mean[last_month - 12])
+        yoy['month'] = {'month': _month_label(last_month + first_month),
+                        'avg': now, 'previous_year_avg': before, 'change_pct': _pct_change(now, before)}
+
+    # Linear and quadratic fit of daily means; the quadratic term tells
+    # whether the trend is accelerating
+    model = None
+    if len(days) >= 3:
+        x = days - days[0]
+        slope, _ = np.polyfit(x, daily, 1)
+        curvature = np.polyfit(x, daily, 2)[0]
+        model = {'slope_per_day': _round(slope, 4),
+                 'slope_per_month': _round(slope * 30),
+                 'acceleration_per_day2': _round(2 * curvature, 6),
+                 'direction': 'rising' if slope > 0 else 'falling',
+                 'accelerating': bool(np.sign(curvature) == np.sign(slope) and curvature != 0)}
+
+    return {'moving_average_7d': moving, 'short_term_weekly': short_term,
+            'year_over_year': yoy, 'model': model}
+
+
+def _savings(prices, day, by_hour, overall_mean, reference_price, shiftable_hours):
+    n = len(prices)
+    negative = prices < 0
+    below = prices < overall_mean
+
+    # Load shifting: the cheapest slots of each day against the day's average.
+    # Rows are ranked inside their day by one lexsort; slots per hour follow
+    # from the number of rows of the day (15 min data: 4 per hour).
+    order = np.lexsort((prices, day))
+    sorted_day = day[order]
+    starts = np.flatnonzero(np.r_[True, sorted_day[1:] != sorted_day[:-1]])
+    counts = np.diff(np.r_[starts, n])
+    rank = np.arange(n) - np.repeat(starts, counts)
+    slots_per_hour = np.maximum(np.rint(counts / 24), 1)
+    cheap = rank < np.repeat(slots_per_hour * shiftable_hours, counts)
+    day_ids = np.repeat(np.arange(len(starts)), counts)
+    sorted_prices = prices[order]
+    cheap_mean = (np.bincount(day_ids[cheap], weights=sorted_prices[cheap], minlength=len(starts))
+                  / np.bincount(day_ids[cheap], minlength=len(starts)))
+    day_mean = np.bincount(day_ids, weights=sorted_prices) / counts
+    shift_saving = float(np.mean(day_mean - cheap_mean))
+
+    hourly = by_hour.mean
+    hours = [int(h) for h in np.argsort(hourly, kind='stable') if by_hour.count[h]]
+    result = {
+        'negative_count': int(negative.sum()),
+        'negative_pct': round(negative.mean() * 100, 2),
+        'below_average_pct': round(below.mean() * 100, 2),
+        'below_average_discount': _round(overall_mean - prices[below].mean()) if below.any() else None,
+        'load_shifting': {'shiftable_hours': shiftable_hours,
+                          'avg_saving': _round(shift_saving),
+                          'saving_pct': _round(shift_saving / abs(day_mean.mean()) * 100)
+                          if day_mean.mean() else None},
+        'best_hours': hours[:3],
+        'worst_hours': hours[-3:][::-1],
+    }
+    if reference_price is not None:
+        result['reference_tariff'] = {'price': reference_price,
+                                      'spot_avg': _round(overall_mean),
+                                      'difference': _round(overall_mean - reference_price),
+                                      'difference_pct': _pct_change(overall_mean, reference_price)}
+    return result
@@ -1,49 +1,155 @@
+import numpy as np
 import pandas as pd
 from datetime import datetime, timedelta
 from typing import Dict, Any, Optional
-from functools import lru_cache
+from utils.price_kpis import compute_kpis
+from utils.result_cache import LRUCache
 
 
 class SpotPriceAnalyzer:
+    # Bounds of the per-analyzer result cache
+    cache_entries = 64
+    cache_bytes = 4 * 1024 * 1024
+
     def __init__(self, data: pd.DataFrame):
         self.data = data
         self.data['timestamp'] = pd.to_datetime(self.data['timestamp'])
         self.data.set_index('timestamp', inplace=True)
         self.data.sort_index(inplace=True)
+        # Bumped whenever self.data changes; part of every cache key
+        self.data_version = 0
+        self._cache = LRUCache(self.cache_entries, self.cache_bytes)
+        self._rollups = None
+
+    @classmethod
+    def from_db(cls, start: datetime, end: datetime, source: str = 'awattar') -> 'SpotPriceAnalyzer':
+        """Analyzer over the stored prices of source between start and end."""
+        from db.operations.price_arrays import load_price_frame
+        frame = load_price_frame(int(start.timestamp()), int(end.timestamp()), source)
+        return cls(frame.reset_index())
+
+    def append_prices(self, data: pd.DataFrame) -> None:
+        """
+        Add new prices (columns 'timestamp' and 'price'); rows with an existing
+        timestamp replace the old value. Cached results are dropped.
+        """
+        new = data.copy()
+        new['timestamp'] = pd.to_datetime(new['timestamp'])
+        new = new.set_index('timestamp')
+        combined = pd.concat([self.data, new])
+        self.data = combined[~combined.index.duplicated(keep='last')].sort_index()
+        self.data_version += 1
+        self._cache.invalidate()
+        self._rollups = None
+
+    @property
+    def rollups(self) -> Dict[str, Any]:
+        """
+        Period aggregates built in one pass over the raw prices.
+
+        The raw series is resampled once to hours (sum, count, min, max);
+        day, ISO week, month and year are rolled up from the hourly frame.
+        Prefix sums over the raw prices answer arbitrary range means with
+        two binary searches.
+        """
+        if self._rollups is None:
+            price = self.data['price']
+            values = price.to_numpy(dtype=np.float64)
+            valid = ~np.isnan(values)
+
+            hour = price.resample('h').agg(['sum', 'count', 'min', 'max'])
+            coarse = {'sum': 'sum', 'count': 'sum', 'min': 'min', 'max': 'max'}
+            rollups = {
+                'hour': hour,
+                'day': hour.resample('D').agg(coarse),
+                'week': hour.resample('W-SUN').agg(coarse),
+                'month': hour.resample('MS').agg(coarse),
+                'year': hour.resample('YS').agg(coarse),
+                'index': self.data.index.values,
+                'cumsum': np.concatenate(([0.0], np.cumsum(np.where(valid, values, 0.0)))),
+                'cumcount': np.concatenate(([0], np.cumsum(valid))),
+            }
+            for frame in ('hour', 'day', 'week', 'month', 'year'):
+                rollups[frame]['mean'] = rollups[frame]['sum'] / rollups[frame]['count']
+            rollups['month'].index = rollups['month'].index.to_period('M')
+            self._rollups = rollups
+        return self._rollups
+
+    def range_mean(self, start, end) -> float:
+        """Mean price of all rows with start <= timestamp <= end, NaN if there are none."""
+        rollups = self.rollups
+        index = rollups['index']
+        lo = np.searchsorted(index, np.datetime64(pd.Timestamp(start)), side='left')
+        hi = np.searchsorted(index, np.datetime64(pd.Timestamp(end)), side='right')
+        count = rollups['cumcount'][hi] - rollups['cumcount'][lo]
+        if count == 0:
+            return float('nan')
+        return (rollups['cumsum'][hi] - rollups['cumsum'][lo]) / count
+
+    def _normalize_range(self, start_date, end_date) -> tuple[pd.Timestamp, pd.Timestamp]:
+        start = self.data.index.min() if start_date is None else pd.Timestamp(start_date)
+        end = self.data.index.max() if end_date is None else pd.Timestamp(end_date)
+        return start, end
+
+    def _cached(self, name: str, start_date, end_date, compute):
+        start, end = self._normalize_range(start_date, end_date)
+        key = (name, self.data_version, start, end)
+        return self._cache.get_or_compute(key, lambda: compute(start, end))
 
-    @lru_cache(maxsize=32)
     def average_price_analysis(self, start_date: Optional[datetime] = None, end_date: Optional[datetime] = None) -> Dict[str, Any]:
-        if start_date is None:
-            start_date = self.data.index.min()
-        if end_date is None:
-            end_date = self.data.index.max()
+        """
+        Average prices for the whole data, the selected range, the last 12
+        months, the last 30 and the last 7 days before end_date.
 
-        data_range = self.data.loc[start_date:end_date]
+        Results are cached per (data version, start, end); treat the
+        returned dict as read-only.
+        """
+        return self._cached('average', start_date, end_date, self._average_price_analysis)
+
+    def _average_price_analysis(self, start_date: pd.Timestamp, end_date: pd.Timestamp) -> Dict[str, Any]:
+        rollups = self.rollups
+        years = rollups['year']
 
         result = {
-            "all_time_average": round(self.data['price'].mean(), 2),
-            "selected_range_average": round(data_range['price'].mean(), 2),
+            "all_time_average": round(years['sum'].sum() / years['count'].sum(), 2),
+            "selected_range_average": round(self.range_mean(start_date, end_date), 2),
             "monthly_averages": {},
             "last_month_average": 0,
             "last_week_average": 0
         }
 
         # Monthly averages for the past 12 months
+        monthly = rollups['month']['mean']
         last_12_months = pd.date_range(end=end_date, periods=12, freq='ME')
         for month in last_12_months:
-            month_data = self.data[self.data.index.to_period(
-                'M') == month.to_period('M')]
-            result["monthly_averages"][month.strftime(
-                "%Y-%m")] = round(month_data['price'].mean(), 2)
+            period = month.to_period('M')
+            mean = monthly.get(period, float('nan'))
+            result["monthly_averages"][month.strftime("%Y-%m")] = round(mean, 2)
 
         # Last month average
         last_month_start = end_date - timedelta(days=30)
         result["last_month_average"] = round(
-            self.data.loc[last_month_start:end_date, 'price'].mean(), 2)
+            self.range_mean(last_month_start, end_date), 2)
 
         # Last week average
         last_week_start = end_date - timedelta(days=7)
         result["last_week_average"] = round(
-            self.data.loc[last_week_start:end_date, 'price'].mean(), 2)
+            self.range_mean(last_week_start, end_date), 2)
 
         return result
+
+    def kpi_analysis(self, start_date: Optional[datetime] = None, end_date: Optional[datetime] = None,
+                     reference_price: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Volatility, peak/off-peak, pattern, trend and savings KPIs for the
+        prices between start_date and end_date (see utils/price_kpis.py).
+
+        Cached like average_price_analysis.
+        """
+        def compute(start, end):
+            index = self.rollups['index']
+            lo = np.searchsorted(index, np.datetime64(start), side='left')
+            hi = np.searchsorted(index, np.datetime64(end), side='right')
+            prices = self.data['price'].to_numpy(dtype=np.float64)
+            return compute_kpis(index[lo:hi], prices[lo:hi], reference_price=reference_price)
+        return self._cached(('kpi', reference_price), start_date, end_date, compute)
@@ -0,0 +1,185 @@
+# utils/svg_chart.py
+# Price chart rendered straight to a text stream. Coordinates are computed
+# with NumPy and long series are reduced to at most a few points per pixel
+# column before any string is built.
+import math
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import TextIO
+import numpy as np
+
+WEEKDAYS_DE = ['Montag', 'Dienstag', 'Mittwoch', 'Donnerstag', 'Freitag', 'Samstag', 'Sonntag']
+
+STYLE = '''    <style>
+        .grid { stroke: gray; stroke-width: 0.5; opacity: 0.3; stroke-dasharray: 4,4; }
+        .grid-midnight { stroke: gray; stroke-width: 1; opacity: 0.5; }
+        .axis { stroke: black; stroke-width: 1; }
+        .price-line { stroke: #268358; stroke-width: 2; fill: none; }
+        .axis-text { font-family: Arial; font-size: 12px; }
+        .title { font-family: Arial; font-size: 16px; font-weight: bold; }
+        .min-dot { fill: #0066cc; }
+        .max-dot { fill: #cc0000; }
+        .dot-label { font-family: Arial; font-size: 11px; }
+        .brand-card { fill: white; stroke: #ddd; stroke-width: 1; rx: 4; }
+        .brand-text { font-family: Arial; font-size: 10px; fill: #666; }
+    </style>
+    <!-- Gradient definition -->
+    <linearGradient id="priceGradient" gradientUnits="userSpaceOnUse" x1="0" y1="50" x2="0" y2="350">
+      <stop offset="0%" stop-color="#6bc86e" stop-opacity="1"/>  <!-- Lighter Green -->
+      <stop offset="60%" stop-color="#6bc86e" stop-opacity="0.2"/> <!-- Softer transition -->
+      <stop offset="100%" stop-color="#6bc86e" stop-opacity="0.0"/> <!-- Transparent -->
+    </linearGradient>'''
+
+
+@dataclass
+class ChartLayout:
+    width: int = 800
+    height: int = 400
+    padding: int = 50
+
+    @property
+    def plot_width(self) -> int:
+        return self.width - 2 * self.padding
+
+    @property
+    def plot_height(self) -> int:
+        return self.height - 2 * self.padding
+
+
+def decimate_minmax(x: np.ndarray, y: np.ndarray, buckets: int) -> np.ndarray:
+    """
+    Indices of the points to draw when x is spread over `buckets` pixel columns.
+
+    Keeps the first, last, minimum and maximum point of every column, so
+    the drawn line covers exactly the same vertical extent as the full
+    series. Series with at most 4 points per column are returned whole.
+
+    Args:
+        x: Ascending x positions
+        y: Values per position
+        buckets: Number of pixel columns
+
+    Returns:
+        Ascending indices into x and y
+    """
+    n = len(x)
+    if n <= 4 * buckets or n < 2:
+        return np.arange(n)
+
+    span = x[-1] - x[0] or 1
+    column = np.minimum(((x - x[0]) * buckets / span).astype(np.int64), buckets - 1)
+    starts = np.flatnonzero(np.r_[True, column[1:] != column[:-1]])
+    ends = np.r_[starts[1:], n] - 1
+    counts = ends - starts + 1
+    segment = np.repeat(np.arange(len(starts)), counts)
+
+    # First position of the minimum / maximum inside each column
+    lows = np.repeat(np.minimum.reduceat(y, starts), counts) == y
+    highs = np.repeat(np.maximum.reduceat(y, starts), counts) == y
+    low_idx = np.flatnonzero(lows)
+    high_idx = np.flatnonzero(highs)
+    low_idx = low_idx[np.unique(segment[low_idx], return_index=True)[1]]
+    high_idx = high_idx[np.unique(segment[high_idx], return_index=True)[1]]
+
+    return np.unique(np.concatenate((starts, ends, low_idx, high_idx)))
+
+
+def _points(x: np.ndarray, y: np.ndarray) -> str:
+    return ' L '.join(f'{a:.2f},{b:.2f}' for a, b in zip(x.tolist(), y.tolist()))
+
+
+def render_price_chart(stream: TextIO, timestamps: np.ndarray, values: np.ndarray,
+                       minmaxdot: bool = False, title: str = 'Spot Tarif stündlich EPEXAT',
+                       layout: ChartLayout = ChartLayout()) -> int:
+    """
+    Write an SVG price chart to stream.
+
+    Args:
+        stream: Text stream to write to (open file, StringIO, ...)
+        timestamps: Epoch seconds, ascending
+        values: Price per timestamp in ct/kWh
+        minmaxdot: Mark the exact minimum and maximum price
+        title: Chart title
+        layout: Canvas size and padding
+
+    Returns:
+        Number of vertices in the price line
+    """
+    timestamps = np.asarray(timestamps, dtype=np.int64)
+    values = np.asarray(values, dtype=np.float64)
+    width, height, padding = layout.width, layout.height, layout.padding
+    plot_width, plot_height = layout.plot_width, layout.plot_height
+    write = stream.write
+
+    first_ts = int(timestamps[0])
+    time_span = int(timestamps[-1]) - first_ts or 1
+
+    # Round min/max to nearest 10 cents
+    min_price = math.floor(min(0, float(values.min())) / 10) * 10
+    max_price = math.ceil(float(values.max()) / 10) * 10
+    price_range = (max_price - min_price) or 10
+
+    def to_y(price):
+        return padding + plot_height * (1 - (price - min_price) / price_range)
+
+    write('<?xml version="1.0" encoding="UTF-8" standalone="no"?>\n'
+          f'<svg width="{width}" height="{height}" xmlns="http://www.w3.org/2000/svg">\n')
+    write(STYLE)
+    write(f'''
+    <!-- Title -->
+    <text x="{width/2}" y="25" text-anchor="middle" class="title">
+        {title}
+    </text>
+
+    <!-- Y-axis label -->
+    <text x="{width-padding+25}" y="{padding-20}" text-anchor="middle" class="axis-text">
+        ct/kWh
+    </text>''')
+
+    # Grid lines every 10 cents
+    step = 10
+    parts = []
+    for price in range(min_price, max_price + step, step):
+        y = to_y(price)
+        parts.append(f'''
+    <line class="grid" x1="{padding}" y1="{y}" x2="{width-padding}" y2="{y}" />
+    <text class="axis-text" x="{width-padding+5}" y="{y+5}" text-anchor="start">{price:.0f}</text>''')
+
+    # Time axis: midnight lines, noon lines with weekday and date
+    current_time = datetime.fromtimestamp(first_ts)
+    last_time = datetime.fromtimestamp(int(timestamps[-1]))
+    while current_time <= last_time:
+        x = padding + plot_width * (current_time.timestamp() - first_ts) / time_span
+        if current_time.hour == 0:
+            parts.append(f'''
+    <line class="grid-midnight" x1="{x}" y1="{padding}" x2="{x}" y2="{height-padding}" />''')
+        elif current_time.hour == 12:
+            parts.append(f'''
+    <line class="grid" x1="{x}" y1="{padding}" x2="{x}" y2="{height-padding}" />
+    <text class="axis-text" x="{x}" y="{height-padding+15}" text-anchor="middle">{WEEKDAYS_DE[current_time.weekday()]}</text>
+    <text class="axis-text" x="{x}" y="{height-padding+30}" text-anchor="middle">{current_time.strftime('%d.%m.')}</text>''')
+        current_time += timedelta(hours=12)
+    write(''.join(parts))
+
+    # Price line and area, decimated to the pixel width of the plot
+    xs = padding + plot_width * (timestamps - first_ts) / time_span
+    ys = to_y(values)
+    keep = decimate_minmax(xs, values, plot_width)
+    line = _points(xs[keep], ys[keep])
+    base_y = to_y(0)
+    write(f'''
+    <path class="price-area" fill="url(#priceGradient)" d="M {line} L {padding + plot_width},{base_y} L {padding},{base_y} Z" />
+    <path class="price-line" d="M {line}" />''')
+
+    if minmaxdot:
+        for css, idx in (('min-dot', int(values.argmin())), ('max-dot', int(values.argmax()))):
+            write(f'''
+    <circle class="{css}" cx="{xs[idx]}" cy="{ys[idx]}" r="4" />
+    <text class="dot-label" x="{xs[idx]}" y="{ys[idx]-10}" text-anchor="middle">{values[idx]:.1f}</text>''')
+
+    write(f'''
+    <!-- Brand card -->
+    <rect class="brand-card" x="{width-padding-65}" y="{height-padding-40}" width="60" height="20"/>
+    <text class="brand-text" x="{width-padding-35}" y="{height-padding-26}" text-anchor="middle">by skale.dev</text>
+</svg>''')
+    return len(keep)
@@ -0,0 +1,130 @@
+# utils/text_chunks.py
+# Token counting and structure-aware splitting of long texts (crawls,
+# reports) into chunks that fit an LLM context window.
+import re
+from typing import List, Optional, Sequence
+
+try:
+    import tiktoken
+except ImportError:  # optional; the estimator below is used instead
+    tiktoken = None
+
+_encoding = None
+_encoding_failed = False
+
+# BPE vocabularies merge up to about four letters of common words and up to
+# three digits into one token; punctuation is a token of its own.
+_PIECES = re.compile(r'\d+|[^\W\d_]+|[^\w\s]|_')
+
+# Boundaries to split on, coarsest first. The separator stays with the
+# text before it; a provider section header starts a new piece.
+SEPARATORS = (
+    r'\n(?=-- Stromanbieter:)',   # sections of a combined report
+    r'\n[ \t]*\n',                # paragraphs
+    r'\n',                        # lines, markdown table rows
+    r'(?<=[.!?:;])\s+',           # sentences
+    r'\s+(?=\|)',                 # table cells of flattened tables
+    r'\s+',                       # words
+)
+
+
+def _tiktoken_encoding():
+    global _encoding, _encoding_failed
+    if _encoding is None and tiktoken is not None and not _encoding_failed:
+        try:
+            _encoding = tiktoken.get_encoding('cl100k_base')
+        except Exception as e:  # the vocabulary is downloaded on first use
+            print(f"Warning: tiktoken encoding unavailable ({e}), estimating tokens.")
+            _encoding_failed = True
+    return _encoding
+
+
+def estimate_tokens(text: str) -> int:
+    """Token count estimate without a vocabulary; errs on the high side for German text."""
+    tokens = 0
+    for piece in _PIECES.findall(text):
+        if piece[0].isdigit():
+            tokens += (len(piece) + 2) // 3
+        elif piece[0].isalpha():
+            tokens += (len(piece) + 3) // 4
+        else:
+            tokens += 1
+    return tokens
+
+
+def count_tokens(text: str) -> int:
+    """Tokens of text with tiktoken's cl100k_base if available, else estimate_tokens."""
+    encoding = _tiktoken_encoding()
+    if encoding is not None:
+        return len(encoding.encode(text, disallowed_special=()))
+    return estimate_tokens(text)
+
+
+def _split(text: str, pattern: str) -> List[str]:
+    """Split on pattern, keeping every separator at the end of the piece before it."""
+    parts = re.split(f'({pattern})', text)
+    pieces = [parts[i] + (parts[i + 1] if i + 1 < len(parts) else '') for i in range(0, len(parts), 2)]
+    return [p for p in pieces if p]
+
+
+def _hard_split(text: str, max_tokens: int) -> List[str]:
+    """Last resort for text without separators: cut by the estimated characters per token."""
+    size = max(1, len(text) * max_tokens // max(count_tokens(text), 1))
+    return [text[i:i + size] for i in range(0, len(text), size)]
+
+
+def split_text(text: str, max_tokens: int, separators: Sequence[str] = SEPARATORS) -> List[str]:
+    """
+    Split text into chunks of at most max_tokens, on the coarsest boundaries
+    that make the pieces fit. Joining the chunks gives back text exactly.
+
+    Args:
+        text: Text to split
+        max_tokens: Token budget per chunk (see count_tokens)
+        separators: Regex boundaries, coarsest first
+
+    Returns:
+        List of chunks, [text] if it fits
+    """
+    if count_tokens(text) <= max_tokens:
+        return [text]
+    if not separators:
+        return _hard_split(text, max_tokens)
+
+    pieces = _split(text, separators[0])
+    if len(pieces) == 1:
+        return split_text(text, max_tokens, separators[1:])
+
+    chunks: List[str] = []
+    current, current_tokens = '', 0
+    for piece in pieces:
+        tokens = count_tokens(piece)
+        if tokens > max_tokens:
+            if current:
+                chunks.append(current)
+                current, current_tokens = '', 0
+            chunks.extend(split_text(piece, max_tokens, separators[1:]))
+            continue
+        if current and current_tokens + tokens > max_tokens:
+            chunks.append(current)
+            current, current_tokens = '', 0
+        current += piece
+        current_tokens += tokens
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def merge_partials(parts: Sequence[Optional[str]]) -> str:
+    """Join partial answers for one input, dropping lines repeated verbatim."""
+    seen = set()
+    lines = []
+    for part in parts:
+        for line in (part or '').strip().splitlines():
+            key = line.strip()
+            if key and key in seen:
+                continue
+            if key:
+                seen.add(key)
+            lines.append(line)
+    return '\n'.join(lines)